@@ -5,7 +5,8 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import QDate, QTime, Qt, QTimer, pyqtSignal
 import json
-import os
+
+from Email_and_Timesheet_Automation.settingsStore import get_settings_store
 
 
 class SettingsWindow(QWidget):
@@ -22,74 +23,74 @@ class SettingsWindow(QWidget):
 
         # Functional Area Config
         self.functional_area_input = QTextEdit()
-        self.functional_area_input.setText(",".join(self.parent.settings.get("functional_areas", [])))
+        self.functional_area_input.setText(",".join(self.parent.settings.functional_areas))
         self.layout.addWidget(QLabel("Functional Areas"))
         self.layout.addWidget(self.functional_area_input)
 
         # Assignment Config
         self.assignment_input = QTextEdit()
-        self.assignment_input.setText(",".join(self.parent.settings.get("assignments", [])))
+        self.assignment_input.setText(",".join(self.parent.settings.assignments))
         self.layout.addWidget(QLabel("Assignments"))
         self.layout.addWidget(self.assignment_input)
 
         # Task Type Config
         self.task_type_input = QTextEdit()
-        self.task_type_input.setText(",".join(self.parent.settings.get("task_types", [])))
+        self.task_type_input.setText(",".join(self.parent.settings.task_types))
         self.layout.addWidget(QLabel("Task Types"))
         self.layout.addWidget(self.task_type_input)
 
 
         self.email_to_user = QTextEdit()
-        self.email_to_user.setText(",".join(self.parent.settings.get("to_user", [])))
+        self.email_to_user.setText(",".join(self.parent.settings.to_user))
         self.layout.addWidget(QLabel("Send To"))
         self.layout.addWidget(self.email_to_user)
 
         self.cc_email_to_user = QTextEdit()
-        self.cc_email_to_user.setText(",".join(self.parent.settings.get("cc_user", [])))
+        self.cc_email_to_user.setText(",".join(self.parent.settings.cc_user))
         self.layout.addWidget(QLabel("CC"))
         self.layout.addWidget(self.cc_email_to_user)
 
 
         # Webhook URL
         self.webhook_url_input = QLineEdit()
-        self.webhook_url_input.setText(self.parent.settings.get("webhook_url", ""))
+        self.webhook_url_input.setText(self.parent.settings.webhook_url)
         self.layout.addWidget(QLabel("Webhook URL"))
         self.layout.addWidget(self.webhook_url_input)
 
         # Role
         self.role_input = QLineEdit()
-        self.role_input.setText(self.parent.settings.get("role", ""))
+        self.role_input.setText(self.parent.settings.role)
         self.layout.addWidget(QLabel("Role"))
         self.layout.addWidget(self.role_input)
 
         # Name
         self.name_input = QLineEdit()
-        self.name_input.setText(self.parent.settings.get("name", ""))
+        self.name_input.setText(self.parent.settings.name)
         self.layout.addWidget(QLabel("Name"))
         self.layout.addWidget(self.name_input)
 
         # Mobile No
         self.mobile_input = QLineEdit()
-        self.mobile_input.setText(self.parent.settings.get("mobile_no", ""))
+        self.mobile_input.setText(self.parent.settings.mobile_no)
         self.layout.addWidget(QLabel("Mobile No"))
         self.layout.addWidget(self.mobile_input)
 
         # Email
         self.email_input = QLineEdit()
-        self.email_input.setText(self.parent.settings.get("email", ""))
+        self.email_input.setText(self.parent.settings.email)
         self.layout.addWidget(QLabel("Email"))
         self.layout.addWidget(self.email_input)
 
         # Monthly Timesheet
         self.timesheet_input = QLineEdit()
-        self.timesheet_input.setText(self.parent.settings.get("timesheet_link", ""))
+        self.timesheet_input.setText(self.parent.settings.timesheet_link)
         self.layout.addWidget(QLabel("Monthly Timesheet Link"))
         self.layout.addWidget(self.timesheet_input)
 
         # Email Scheduling Time
         self.schedule_time_input = QTimeEdit()
         self.schedule_time_input.setDisplayFormat("HH:mm")
-        self.schedule_time_input.setTime(QTime.fromString(self.parent.settings.get("schedule_time", "09:00"), "HH:mm"))
+        self.schedule_time_input.setTime(QTime.fromString(self.parent.settings.schedule_time, "HH:mm"))
         self.layout.addWidget(QLabel("Email Schedule Time"))
         self.layout.addWidget(self.schedule_time_input)
 
@@ -116,8 +117,9 @@ class SettingsWindow(QWidget):
         email = self.email_input.text()
         timesheet = self.timesheet_input.text()
 
-        # Save to a configuration file
-        config = {
+        # Save through the settings store, keeping keys this window does not edit
+        config = self.parent.settings.to_dict()
+        config.update({
             "functional_areas": functional_areas,
             "assignments": assignments,
             "task_types": task_types,
@@ -130,17 +132,10 @@ class SettingsWindow(QWidget):
             "mobile_no": mobile_no,
             "email": email,
             "timesheet_link": timesheet
-        }
-
-        # Get the directory of the current script
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        config_path = os.path.join(script_dir, "../settings.json")
-
-
+        })
 
         try:
-            with open(config_path, "w+") as config_file:
-                json.dump(config, config_file, indent=4)
+            get_settings_store().save_settings(config)
             QMessageBox.information(self, "Success", "Settings have been saved.")
             print(json.dumps(config, indent=4))  # Ensure config is populated correctly
 
@@ -1,43 +1,72 @@
-import os
-import sqlite3
 import json
-import requests
-import faiss
-import numpy as np
 from datetime import datetime
-from sentence_transformers import SentenceTransformer
 from PyQt5.QtWidgets import (
-    QApplication, QWidget, QTableWidget, QTableWidgetItem, QVBoxLayout,
+    QApplication, QWidget, QTableView, QHeaderView, QVBoxLayout,
     QPushButton, QComboBox, QCheckBox, QCalendarWidget, QTimeEdit,
-    QFormLayout, QLineEdit, QLabel, QTextEdit, QHBoxLayout, QMessageBox,QTabWidget
+    QFormLayout, QLineEdit, QLabel, QTextEdit, QHBoxLayout, QMessageBox,QTabWidget,
+    QListWidget, QListWidgetItem, QFileDialog
 )
 from PyQt5.QtCore import QDate, QTime, Qt, QTimer
 from Email_and_Timesheet_Automation.SettingWindow import SettingsWindow
 from Email_and_Timesheet_Automation.VersionHistory import VersionHistoryWindow
-from Email_and_Timesheet_Automation.dbConfig import init_sqlite_db
-from Email_and_Timesheet_Automation.htmlGenerator import HtmlGenerator
+from Email_and_Timesheet_Automation.buttonDelegate import ButtonDelegate
+from Email_and_Timesheet_Automation.dbConfig import (
+    DB_FILE, MOM_DB_FILE, get_connection_manager, get_vector_index_path
+)
+from Email_and_Timesheet_Automation.embeddingService import EmbeddingService
+from Email_and_Timesheet_Automation.embeddings import build_task_text, build_version_text
+from Email_and_Timesheet_Automation.httpClient import configure_http_client, dumps_compact
 from Email_and_Timesheet_Automation.momSignature import generate_signature
 from Email_and_Timesheet_Automation.mom_setting import MomSettingsWindow
+from Email_and_Timesheet_Automation.outboxWorker import OutboxWorker
+from Email_and_Timesheet_Automation.reportScheduler import next_fire_time, run_due
+from Email_and_Timesheet_Automation.reportService import render_daily_report
+from Email_and_Timesheet_Automation.settingsStore import get_settings_store
+from Email_and_Timesheet_Automation.settingsWatcher import SettingsWatcher
+from Email_and_Timesheet_Automation.taskStore import TaskStoreError, open_task_store, uses_offline_sync
+from Email_and_Timesheet_Automation.taskStoreWorker import TaskStoreWorker
+from Email_and_Timesheet_Automation.taskTableModel import DELETE_COLUMN, TaskTableModel
+from Email_and_Timesheet_Automation.timesheetExport import HEADERS as TIMESHEET_HEADERS, write_timesheet
+from Email_and_Timesheet_Automation.webhookOutbox import WebhookOutbox
 
 
 class TaskApp(QWidget):
     def __init__(self):
         super().__init__()
-        self.settings = {}
+        # Both settings files are parsed once; the watcher reloads them when they change on disk
+        self.settings_store = get_settings_store()
+        self.settings_watcher = SettingsWatcher(self.settings_store, self)
+        self.settings_watcher.settings_changed.connect(self.on_settings_changed)
         self.load_settings()
-        self.setup_email_scheduler()
-        self.conn = init_sqlite_db()
-        # Initialize SentenceTransformer model (for task embeddings)
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')  # Pre-trained sentence transformer
-
-        # Dynamically set the dimension based on the model's embedding output
-        dummy_embedding = self.model.encode(["dummy task"])[0]  # Generate a dummy embedding
-        self.dimension = len(dummy_embedding)  # Set dimension dynamically based on embedding size
-
-        # Initialize FAISS index with the determined dimension
-        self.index = faiss.IndexFlatL2(self.dimension)
+        # Databases are opened (and their schemas migrated) once and shared for the app's lifetime
+        self.db = get_connection_manager()
+        self.db.open_all()
+        self.conn = self.db.connection(DB_FILE)
+        self.mom_conn = self.db.connection(MOM_DB_FILE)
+        # Tasks live in tasks.db, or on the shared task server if server_url is set (read at startup)
+        self.store = open_task_store(self.settings, self.conn)
+        self.offline_sync = uses_offline_sync(self.settings, self.store)
+        # Reads for the vector index and similar-task search, and offline syncs, run on a worker off the GUI thread
+        self.store_worker = TaskStoreWorker(self.settings)
+        self.store_worker.result_ready.connect(self.on_store_result)
+        self.store_worker.failed.connect(self.on_store_failed)
+
+        # The embedding model is loaded on a worker thread once the window is shown;
+        # the persistent vector store is opened when the model reports its dimension.
+        self.embedder = EmbeddingService()
+        self.embedder.model_ready.connect(self.on_model_ready)
+        self.embedder.model_failed.connect(self.on_model_failed)
+        self.embedder.encoded.connect(self.on_embedding_ready)
+        self.dimension = None
+        self.vector_store = None
+
+        # Webhook payloads are queued in SQLite and delivered by a background worker;
+        # anything left over from a previous run is delivered once the worker starts.
+        configure_http_client(gzip_bodies=self.settings.webhook_gzip)
+        self.outbox = WebhookOutbox(self.conn)
+        self.outbox_worker = OutboxWorker()
+        self.outbox_worker.status_changed.connect(self.on_webhook_status)
 
-        self.metadata = []  # To store metadata (task data)
         self.setWindowTitle("Task Management")
         self.setGeometry(100, 100, 900, 700)
         self.layout = QVBoxLayout()
@@ -46,6 +75,90 @@ class TaskApp(QWidget):
         self.initUI()
         self.update_dropdowns()
 
+        # Runs after the event loop starts, i.e. after the window is shown
+        QTimer.singleShot(0, self.embedder.start)
+        QTimer.singleShot(0, self.store_worker.start)
+        QTimer.singleShot(0, self.outbox_worker.start)
+        self.setup_email_scheduler()
+
+    def on_model_ready(self, dimension):
+        from Email_and_Timesheet_Automation.vectorStore import VectorStore
+
+        # Open the persistent FAISS index with the dimension reported by the model
+        self.dimension = dimension
+        self.vector_store = VectorStore(get_vector_index_path(), self.dimension,
+                                        index_config=self.settings.vector_index)
+
+        self.embed_missing_tasks()
+
+    def on_model_failed(self, message):
+        # Without a model there is no semantic search; everything else keeps working
+        print(f"Embedding model failed to load: {message}")
+        self.similar_search_timer.stop()
+        self.similar_query_id = None
+        self.similar_search_input.setEnabled(False)
+        self.similar_search_input.setPlaceholderText("Similar task search is unavailable")
+        self.similar_results.clear()
+        self.similar_results.addItem(f"Embedding model failed to load: {message}")
+        self.clone_button.setEnabled(False)
+
+    def embed_missing_tasks(self):
+        # The ids are read on the store worker; on_store_result reconciles the index with them
+        self.store_worker.submit(("task_ids",), "task_ids")
+
+    def on_embedding_ready(self, key, vectors):
+        kind, task_ids = key
+        if kind == "query":
+            self.show_similar_tasks(task_ids, vectors[0])
+            return
+        if kind != "tasks" or self.vector_store is None:
+            return
+        # Skip tasks that were deleted while their embedding was queued
+        self.store_worker.submit(("embedded", task_ids, vectors), "task_rows", task_ids)
+
+    def on_store_result(self, key, result):
+        kind = key[0]
+        if kind == "task_ids":
+            # Only tasks that are not in the index yet need to be encoded
+            missing_ids = self.vector_store.reconcile_ids(result)
+            print(f"Vector index has {len(self.vector_store)} tasks, {len(missing_ids)} to embed.")
+            for start in range(0, len(missing_ids), 64):
+                self.store_worker.submit(("embed_rows",), "task_rows", missing_ids[start:start + 64])
+        elif kind == "embed_rows" and result:
+            # Rows are (id, *TASK_FIELDS): task_name, description, start_date, due_date come first
+            self.embedder.submit(("tasks", [row[0] for row in result]),
+                                 [build_task_text(*row[1:5]) for row in result])
+        elif kind == "embedded":
+            _, task_ids, vectors = key
+            existing = {row[0] for row in result}
+            keep = [i for i, task_id in enumerate(task_ids) if task_id in existing]
+            if keep:
+                self.vector_store.add([task_ids[i] for i in keep], vectors[keep])
+        elif kind == "similar":
+            self.show_similar_results(key[1], key[2], result)
+        elif kind == "sync":
+            self.on_sync_finished(*result)
+
+    def on_store_failed(self, key, message):
+        if key[0] == "sync":
+            # When offline, the local tasks are used as they are
+            self.sync_button.setEnabled(True)
+            QMessageBox.warning(self, "Working Offline", f"Could not sync with the task server: {message}")
+            self.load_recent_tasks()
+            return
+        print(f"Could not read tasks ({key[0]}): {message}")
+        if key[0] == "similar" and key[1] == self.similar_query_id:
+            self.similar_results.clear()
+            self.similar_results.addItem(f"Could not read similar tasks: {message}")
+
+    def closeEvent(self, event):
+        self.outbox_worker.stop()
+        self.embedder.stop()
+        self.store_worker.stop()
+        if self.vector_store is not None:
+            self.vector_store.close()
+        self.db.close()
+        super().closeEvent(event)
 
     def initUI(self):
         # Main layout with tabs
@@ -65,6 +178,10 @@ class TaskApp(QWidget):
         self.initMomManagementTab()
         self.tabs.addTab(self.mom_tab, "MOM Management")
 
+        # Webhook delivery status
+        self.webhook_status_label = QLabel("")
+        self.layout.addWidget(self.webhook_status_label)
+
         self.setLayout(self.layout)
 
 
@@ -73,17 +190,22 @@ class TaskApp(QWidget):
         """Initialize the Task Management tab."""
         task_tab_layout = QVBoxLayout(self.task_tab)
 
-        # Create Table for displaying tasks
-        self.tableWidget = QTableWidget()
-        self.tableWidget.setColumnCount(10)
-        self.tableWidget.setHorizontalHeaderLabels([
-            "Task Name", "Description", "Start Date", "Due Date",
-            "Time Spent (hrs)", "Functional Area", "Assignment",
-            "Task Type", "Status", "Delete"
-        ])
-        task_tab_layout.addWidget(self.tableWidget)
-
-        # Add Button for adding tasks
+        # Table of all tasks, newest first, loaded page by page as it scrolls
+        self.task_model = TaskTableModel(self.store, parent=self)
+        self.task_table = QTableView()
+        self.task_table.setModel(self.task_model)
+        self.task_table.setSelectionBehavior(QTableView.SelectRows)
+        # Fixed row heights keep scrolling cheap: the view never measures rows
+        self.task_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.task_table.verticalHeader().setDefaultSectionSize(28)
+        self.delete_delegate = ButtonDelegate("Delete", self.task_table)
+        self.delete_delegate.clicked.connect(
+            lambda index: self.delete_task(self.task_model.task_id(index.row())))
+        self.task_table.setItemDelegateForColumn(DELETE_COLUMN, self.delete_delegate)
+        task_tab_layout.addWidget(self.task_table)
+        self.editing_task_id = None  # Task loaded from the dropdown; saving updates it in place
+
+        # Add Button for adding tasks (or saving the task being edited)
         self.add_button = QPushButton("Add Task")
         self.add_button.clicked.connect(self.add_task)
         task_tab_layout.addWidget(self.add_button)
@@ -108,6 +230,11 @@ class TaskApp(QWidget):
         self.version_history_button.clicked.connect(self.open_version_history)
         task_tab_layout.addWidget(self.version_history_button)
 
+        # Export Timesheet Button
+        self.export_timesheet_button = QPushButton("Export Timesheet")
+        self.export_timesheet_button.clicked.connect(self.export_timesheet)
+        task_tab_layout.addWidget(self.export_timesheet_button)
+
         # Dropdown for selecting a task
         self.task_dropdown = QComboBox()
         self.task_dropdown.addItem("Select a Task")
@@ -159,6 +286,28 @@ class TaskApp(QWidget):
 
         task_tab_layout.addLayout(self.formLayout)
 
+        # Semantic search over previous tasks
+        self.similar_search_input = QLineEdit()
+        self.similar_search_input.setPlaceholderText("Search similar past tasks...")
+        self.similar_search_input.textChanged.connect(self.schedule_similar_search)
+        task_tab_layout.addWidget(self.similar_search_input)
+
+        self.similar_results = QListWidget()
+        self.similar_results.setMaximumHeight(120)
+        self.similar_results.itemDoubleClicked.connect(self.clone_similar_task)
+        task_tab_layout.addWidget(self.similar_results)
+
+        self.clone_button = QPushButton("Clone Selected Task")
+        self.clone_button.clicked.connect(lambda: self.clone_similar_task(self.similar_results.currentItem()))
+        task_tab_layout.addWidget(self.clone_button)
+
+        # Debounce keystrokes: only search once typing pauses
+        self.similar_search_timer = QTimer(self)
+        self.similar_search_timer.setSingleShot(True)
+        self.similar_search_timer.setInterval(300)
+        self.similar_search_timer.timeout.connect(self.run_similar_search)
+        self.similar_query_id = None
+
     def initMomManagementTab(self):
         """Initialize the MOM Management tab."""
         mom_tab_layout = QVBoxLayout(self.mom_tab)
@@ -237,27 +386,20 @@ class TaskApp(QWidget):
     def load_email_groups(self):
         """Load email groups from settings."""
         try:
-            # Load settings from the file
-            with open("mom_settings.json", "r") as file:
-                mom_settings = json.load(file)
-                email_groups = mom_settings.get("email_groups", {})  # Get the email addresses
-
-                # Populate the email group dropdown
-                self.email_group_dropdown.addItem("Select Group")  # Default option
-                for group_name in email_groups:
-                    self.email_group_dropdown.addItem(group_name)  # Add group name to the dropdown
-
-        except FileNotFoundError:
-            print("MOM settings file not found.")
+            email_groups = self.mom_settings.email_groups  # Get the email addresses
+
+            # Populate the email group dropdown
+            self.email_group_dropdown.addItem("Select Group")  # Default option
+            for group_name in email_groups:
+                self.email_group_dropdown.addItem(group_name)  # Add group name to the dropdown
+
         except Exception as e:
             print(f"Error loading email groups: {str(e)}")
 
     def load_previous_mom_data(self):
         """Load previous MOM data from the database into the dropdown."""
         try:
-            # Connect to SQLite database
-            conn = sqlite3.connect("mom_management.db")
-            cursor = conn.cursor()
+            cursor = self.mom_conn.cursor()
 
             # Query the database for all MOM records
             cursor.execute("SELECT id, timestamp FROM mom_data ORDER BY timestamp DESC")
@@ -269,8 +411,6 @@ class TaskApp(QWidget):
             for record in mom_records:
                 mom_id, timestamp = record
                 self.previous_mom_dropdown.addItem(f"MOM ID: {mom_id} - {timestamp}")
-
-            conn.close()
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Failed to load previous MOM data: {e}")
 
@@ -282,9 +422,7 @@ class TaskApp(QWidget):
             return
 
         try:
-            # Connect to SQLite database
-            conn = sqlite3.connect("mom_management.db")
-            cursor = conn.cursor()
+            cursor = self.mom_conn.cursor()
 
             # Get the MOM ID from the selected item
             selected_mom_id = self.previous_mom_dropdown.currentText().split(" - ")[0].split(": ")[1]
@@ -309,28 +447,21 @@ class TaskApp(QWidget):
 
             else:
                 QMessageBox.warning(self, "Error", "No data found for the selected MOM.")
-
-            conn.close()
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Failed to populate MOM data: {e}")
 
     def load_cc_emails(self):
         """Load CC emails into the dropdown from settings."""
         try:
-            # Load settings from the mom_settings.json file
-            with open("mom_settings.json", "r") as file:
-                mom_settings = json.load(file)
-                email_groups = mom_settings.get("email_groups", {})  # Get the email groups
-
-                # Populate CC dropdown with grouped emails
-                self.cc_dropdown.clear()  # Clear previous CC emails
-                for group_name, emails in email_groups.items():
-                    self.cc_dropdown.addItem(group_name)  # Add group as a category
-                    for email in emails:
-                        self.cc_dropdown.addItem(f"  {email}")  # Indented emails under the group
-
-        except FileNotFoundError:
-            print("MOM settings file not found.")
+            email_groups = self.mom_settings.email_groups  # Get the email groups
+
+            # Populate CC dropdown with grouped emails
+            self.cc_dropdown.clear()  # Clear previous CC emails
+            for group_name, emails in email_groups.items():
+                self.cc_dropdown.addItem(group_name)  # Add group as a category
+                for email in emails:
+                    self.cc_dropdown.addItem(f"  {email}")  # Indented emails under the group
+
         except Exception as e:
             print(f"Error loading CC emails: {str(e)}")
 
@@ -344,13 +475,11 @@ class TaskApp(QWidget):
             return  # No group selected
 
         try:
-            with open("mom_settings.json", "r") as file:
-                mom_settings = json.load(file)
-                email_groups = mom_settings.get("cc_groups", {})
+            email_groups = self.mom_settings.cc_groups
 
-                # Populate "To" field with emails from the selected group
-                emails = email_groups.get(selected_group, [])
-                self.cc_input.setPlainText("; ".join(emails))  # Display emails in the To input field
+            # Populate "To" field with emails from the selected group
+            emails = email_groups.get(selected_group, [])
+            self.cc_input.setPlainText("; ".join(emails))  # Display emails in the To input field
 
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Failed to populate emails: {e}")
@@ -363,13 +492,11 @@ class TaskApp(QWidget):
             return  # No group selected
 
         try:
-            with open("mom_settings.json", "r") as file:
-                mom_settings = json.load(file)
-                email_groups = mom_settings.get("email_groups", {})
+            email_groups = self.mom_settings.email_groups
 
-                # Populate "To" field with emails from the selected group
-                emails = email_groups.get(selected_group, [])
-                self.to_input.setPlainText("; ".join(emails))  # Display emails in the To input field
+            # Populate "To" field with emails from the selected group
+            emails = email_groups.get(selected_group, [])
+            self.to_input.setPlainText("; ".join(emails))  # Display emails in the To input field
 
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Failed to populate emails: {e}")
@@ -377,23 +504,19 @@ class TaskApp(QWidget):
     def refresh_mom_dropdowns(self):
         """Refresh the Email Group and CC dropdowns based on the updated settings."""
         try:
-            with open("mom_settings.json", "r") as file:
-                mom_settings = json.load(file)
-                email_groups = mom_settings.get("email_groups", {})
-                cc_groups = mom_settings.get("cc_groups", {})
-
-                # Update Email Group Dropdown
-                self.email_group_dropdown.clear()
-                self.email_group_dropdown.addItem("Select Group")
-                self.email_group_dropdown.addItems(email_groups.keys())
-
-                # Update CC Dropdown
-                self.cc_dropdown.clear()
-                self.cc_dropdown.addItem("Select CC Group")
-                self.cc_dropdown.addItems(cc_groups.keys())
-
-        except FileNotFoundError:
-            QMessageBox.warning(self, "Error", "Settings file not found. Unable to refresh dropdowns.")
+            email_groups = self.mom_settings.email_groups
+            cc_groups = self.mom_settings.cc_groups
+
+            # Update Email Group Dropdown
+            self.email_group_dropdown.clear()
+            self.email_group_dropdown.addItem("Select Group")
+            self.email_group_dropdown.addItems(email_groups.keys())
+
+            # Update CC Dropdown
+            self.cc_dropdown.clear()
+            self.cc_dropdown.addItem("Select CC Group")
+            self.cc_dropdown.addItems(cc_groups.keys())
+
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Failed to refresh dropdowns: {e}")
 
@@ -423,23 +546,7 @@ class TaskApp(QWidget):
         }
 
         try:
-            # Connect to SQLite database (or create it if it doesn't exist)
-            conn = sqlite3.connect("mom_management.db")
-            cursor = conn.cursor()
-
-            # Create the MOM table if it doesn't already exist
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS mom_data (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    to_emails TEXT,
-                    cc_emails TEXT,
-                    mom_leader TEXT,
-                    mom_creator TEXT,
-                    present_members TEXT,
-                    absent_members TEXT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
+            cursor = self.mom_conn.cursor()
 
             # Insert the collected MOM data into the table
             cursor.execute("""
@@ -447,9 +554,8 @@ class TaskApp(QWidget):
                 VALUES (:to, :cc, :mom_leader, :mom_creator,:present, :absent)
             """, mom_data)
 
-            # Commit the transaction and close the connection
-            conn.commit()
-            conn.close()
+            # Commit the transaction
+            self.mom_conn.commit()
 
             # Refresh the previous MOM dropdown with the newly saved data
             self.refresh_previous_mom_dropdown()
@@ -461,8 +567,7 @@ class TaskApp(QWidget):
     def open_mom_settings(self):
         """Open the MOM Settings window and refresh dropdowns after saving."""
         self.settings_window = MomSettingsWindow(self)
-        self.settings_window.exec_()  # Show settings as a modal dialog
-        self.refresh_mom_dropdowns()  # Refresh dropdowns after closing settings
+        self.settings_window.exec_()  # Show settings as a modal dialog; saving refreshes the dropdowns
 
     def automate_mom(self):
         """
@@ -491,38 +596,24 @@ class TaskApp(QWidget):
         }
 
         # Convert the dictionary to a JSON string
-        json_data = json.dumps(mom_data)
+        json_data = dumps_compact(mom_data)
 
         try:
-            # Load settings from the mom_settings.json file to retrieve the webhook URL
-            with open("mom_settings.json", "r") as file:
-                mom_settings = json.load(file)
-                webhook_url = mom_settings.get("webhook_url", "").strip()
+            webhook_url = self.mom_settings.webhook_url.strip()
 
             if not webhook_url:
                 QMessageBox.warning(self, "Error", "Webhook URL is not set in the settings.")
                 return
 
-            # Send the JSON data to the webhook
-            response = requests.post(webhook_url, json=mom_data)
-
-            # Check if the request was successful
-            if response.status_code == 202:
-                QMessageBox.information(self, "Success", "MOM data sent to webhook successfully.")
-            else:
-                QMessageBox.warning(self, "Error",
-                                    f"Failed to send data to webhook. Status code: {response.status_code}")
-        except requests.exceptions.RequestException as e:
-            QMessageBox.warning(self, "Error", f"An error occurred while sending data to the webhook: {e}")
+            # Queue the JSON data; the outbox worker sends it and reports back
+            self.enqueue_webhook("mom", webhook_url, json_data)
         except Exception as e:
-            QMessageBox.warning(self, "Error", f"Failed to retrieve webhook URL or send data: {e}")
+            QMessageBox.warning(self, "Error", f"Failed to retrieve webhook URL or queue data: {e}")
 
     def refresh_previous_mom_dropdown(self):
         """Refresh the Previous MOM dropdown with the latest data from the database."""
         try:
-            # Connect to SQLite database
-            conn = sqlite3.connect("mom_management.db")
-            cursor = conn.cursor()
+            cursor = self.mom_conn.cursor()
 
             # Query the database for all MOM records
             cursor.execute("SELECT id, timestamp FROM mom_data ORDER BY timestamp DESC")
@@ -534,59 +625,49 @@ class TaskApp(QWidget):
             for record in mom_records:
                 mom_id, timestamp = record
                 self.previous_mom_dropdown.addItem(f"MOM ID: {mom_id} - {timestamp}")
-
-            conn.close()
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Failed to refresh Previous MOM dropdown: {e}")
 
     def setup_email_scheduler(self):
-        schedule_time = QTime.fromString(self.settings["schedule_time"], "HH:mm")
-        now = QTime.currentTime()
-        seconds_until_trigger = now.secsTo(schedule_time)
-        if seconds_until_trigger < 0:  # If time has passed for today
-            seconds_until_trigger += 24 * 3600  # Schedule for tomorrow
-
+        # Shares scheduler_runs with scheduler.py, so a day is sent once even if both are running
         self.email_timer = QTimer(self)
         self.email_timer.setSingleShot(True)
-        self.email_timer.timeout.connect(self.automate)  # Replace with your email logic
-        self.email_timer.start(seconds_until_trigger * 1000)
-
-
-    def load_settings(self):
-        # Get the directory of the current script
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        config_path = os.path.join(script_dir, "../settings.json")
+        self.email_timer.timeout.connect(self.run_scheduled_reports)
+        QTimer.singleShot(0, self.run_scheduled_reports)  # Catch up runs missed while the app was closed
 
+    def arm_email_timer(self):
+        """Wake at the next fire time, or within an hour to notice clock changes and suspends."""
+        now = datetime.now()
+        fire_time = next_fire_time(now, self.settings)
+        seconds = 3600 if fire_time is None else min(3600, (fire_time - now).total_seconds())
+        self.email_timer.start(int(max(0, seconds) * 1000))
 
+    def run_scheduled_reports(self):
         try:
-            # Use the resolved path
-            with open(config_path, "r") as config_file:
-                self.settings= json.load(config_file)
-        except FileNotFoundError:
-            self.settings = {
-                "functional_areas": ["Development", "Testing", "Design"],
-                "assignments": ["Research", "Task", "Training", "Development"],
-                "task_types": ["Bug Fix", "Feature", "Research"],
-                "schedule_time": "09:00",
-                "webhook_url": "",
-                "to_user": [],
-                "cc_user": [],
-                "role":"",
-                "email":"",
-                "name":"",
-                "mobileNo":"",
-                "timesheet_link":""
-            }
+            outbox_ids = run_due(self.conn, self.settings, "gui", mom_completed=self.mom_completed.text(),
+                                 todays_target=self.todays_target.text(), store=self.store)
+        except Exception as e:
+            print(f"Scheduled report failed: {e}")
+            outbox_ids = []
+        if outbox_ids:
+            self.webhook_status_label.setText(f"Scheduled report queued for delivery ({len(outbox_ids)}).")
+            self.outbox_worker.wake()
+        self.arm_email_timer()
+
+    def load_settings(self):
+        # Snapshots are immutable, so they are simply replaced when the store reloads
+        self.settings = self.settings_store.settings
+        self.mom_settings = self.settings_store.mom_settings
 
     def update_dropdowns(self):
         self.functional_area_input.clear()
-        self.functional_area_input.addItems(self.settings.get("functional_areas", []))
+        self.functional_area_input.addItems(self.settings.functional_areas)
 
         self.assignment_input.clear()
-        self.assignment_input.addItems(self.settings.get("assignments", []))
+        self.assignment_input.addItems(self.settings.assignments)
 
         self.task_type_input.clear()
-        self.task_type_input.addItems(self.settings.get("task_types", []))
+        self.task_type_input.addItems(self.settings.task_types)
 
     def create_date_widget(self):
         """
@@ -617,138 +698,95 @@ class TaskApp(QWidget):
         layout.addWidget(calendar)
         return container
 
-    def add_task(self):
-        # Collect data from the UI
-        task_name = self.task_name_input.text()
-        description = self.description_input.toPlainText()
-        start_date = self.start_date_input.findChild(QLineEdit).text()
-        due_date = self.due_date_input.findChild(QLineEdit).text()
-
-        # Validate input
-        if not task_name or not start_date or not due_date:
-            QMessageBox.warning(self, "Validation Error", "Task Name, Start Date, and Due Date are required.")
-            return
-
-        # Insert new task into the main tasks table (SQL)
-        cursor = self.conn.cursor()
-        cursor.execute(""" 
-            INSERT INTO tasks (task_name, description, start_date, due_date, time_spent, functional_area, assignment, task_type, status) 
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) 
-        """, (
-            task_name,
-            description,
-            start_date,
-            due_date,
-            self.time_spent_input.text(),
-            self.functional_area_input.currentText(),
-            self.assignment_input.currentText(),
-            self.task_type_input.currentText(),
-            "Completed" if self.status_checkbox.isChecked() else "Pending"
-        ))
-
-        task_id = cursor.lastrowid  # Get the ID of the inserted task
-
-        # Add a version entry for the task (Task versioning)
-        version_data = {
-            "task_name": task_name,
-            "description": description,
-            "start_date": start_date,
-            "due_date": due_date,
+    def read_task_form(self):
+        """Return the task form as a version dict of TASK_FIELDS."""
+        return {
+            "task_name": self.task_name_input.text(),
+            "description": self.description_input.toPlainText(),
+            "start_date": self.start_date_input.findChild(QLineEdit).text(),
+            "due_date": self.due_date_input.findChild(QLineEdit).text(),
             "time_spent": self.time_spent_input.text(),
             "functional_area": self.functional_area_input.currentText(),
             "assignment": self.assignment_input.currentText(),
             "task_type": self.task_type_input.currentText(),
             "status": "Completed" if self.status_checkbox.isChecked() else "Pending"
         }
-        cursor.execute(""" 
-            INSERT INTO task_versions (task_id, task_name, version_date, version_data) 
-            VALUES (?, ?, ?, ?) 
-        """, (
-            task_id,
-            task_name,
-            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            json.dumps(version_data)
-        ))
-
-        self.conn.commit()
-
-        # Generate task embedding using SentenceTransformer
-        task_text = f"{task_name} {description} {start_date} {due_date}"
-        task_embedding = self.model.encode([task_text])[0]  # Embedding for the task (single vector)
-
-        # Validate embedding size matches FAISS index dimension
-        if len(task_embedding) != self.index.d:
-            raise ValueError(f"Embedding dimension mismatch: Expected {self.index.d}, got {len(task_embedding)}")
-
-        # Add the task embedding to FAISS
-        self.index.add(np.array([task_embedding]))
-
-        # Store metadata for the task
-        self.metadata.append({
-            "id": task_id,
-            "task_data": version_data
-        })
 
-        # Add task to the UI table
-        row_position = self.tableWidget.rowCount()
-        self.tableWidget.insertRow(row_position)
+    def add_task(self):
+        # Collect data from the UI
+        task_data = self.read_task_form()
 
-        # Assuming column 0 is for task_id (hidden), and subsequent columns are for task data
-        self.tableWidget.setItem(row_position, 0, QTableWidgetItem(str(task_id)))  # Task ID (hidden column)
-        for i, key in enumerate(version_data.keys(), start=0):  # Start from column 1
-            self.tableWidget.setItem(row_position, i, QTableWidgetItem(str(version_data[key])))
+        # Validate input
+        if not task_data["task_name"] or not task_data["start_date"] or not task_data["due_date"]:
+            QMessageBox.warning(self, "Validation Error", "Task Name, Start Date, and Due Date are required.")
+            return
 
+        try:
+            # A task loaded for editing is updated in place, unless it was deleted meanwhile
+            if self.editing_task_id is not None and self.update_task(self.editing_task_id, task_data):
+                return
 
+            # Insert the task and its first version (Task versioning)
+            task_id = self.store.add_task(task_data)
+        except TaskStoreError as e:
+            QMessageBox.warning(self, "Task Server Error", f"The task was not saved: {e}")
+            return
 
+        # Queue the task embedding; it is added to the vector store in on_embedding_ready
+        self.embed_task(task_id, task_data)
 
-        # Add Delete button
-        delete_button = QPushButton("Delete")
-        delete_button.clicked.connect(lambda: self.delete_task(task_id,row_position))
-        self.tableWidget.setCellWidget(row_position, len(version_data), delete_button)
+        # Add task to the UI table
+        self.task_model.add_task(task_id)
 
         # Clear inputs after adding the task
         self.clear_task_inputs()
 
         QMessageBox.information(self, "Success", "Task has been added successfully.")
 
+    def update_task(self, task_id, task_data):
+        """
+        Save `task_data` over an existing task: update its `tasks` row, append a
+        version, and re-embed it if its text changed. Returns False if the task
+        no longer exists.
+        """
+        previous = self.store.update_task(task_id, task_data)
+        if previous is None:
+            return False
+        if previous == task_data:
+            QMessageBox.information(self, "No Changes", "The task has not changed.")
+            return True
+
+        # The vector store replaces the task's previous vector when the new one arrives
+        if build_version_text(previous) != build_version_text(task_data):
+            self.embed_task(task_id, task_data)
+
+        self.task_model.update_task(task_id)
+
+        self.clear_task_inputs()
+
+        QMessageBox.information(self, "Success", "Task has been updated successfully.")
+        return True
+
+    def embed_task(self, task_id, task_data):
+        """Queue a task embedding; it is added to the vector store in on_embedding_ready."""
+        self.embedder.submit(("tasks", [task_id]), [build_version_text(task_data)])
+
     def automate(self):
-        # Collect all tasks from the table
-        tasks_data = []
-        for row in range(self.tableWidget.rowCount()):
-            task_data = {}
-            for col in range(self.tableWidget.columnCount() - 1):  # Excluding 'Delete' column
-                header = self.tableWidget.horizontalHeaderItem(col).text()
-                task_data[header] = self.tableWidget.item(row, col).text()
-            tasks_data.append(task_data)
-
-        # Generate HTML content for the collected tasks
-        tasks_list = [{"Task Name": task["Task Name"], "Task Keyword": task["Description"],
-                       "Time Spent (hrs)": task["Time Spent (hrs)"]} for task in tasks_data]
-
-        class TaskCollection:
-            date = datetime.now()
-
-            def to_dict(self):
-                return {"Tasks": tasks_list}
-
-        # Generate the HTML for all tasks
-        task_collection = TaskCollection()
-        print(task_collection)
-        html_content = HtmlGenerator.generate_task_table(task_collection)
-
-        # Create the final JSON object containing the HTML content and task data
-        json_object = {
-            "htmlContent": html_content,
-            "tasks": tasks_data,
-            "to_user": self.settings.get("to_user", []),
-            "cc_user": self.settings.get("cc_user", []),
-            "mom_completed": self.mom_completed.text(),
-            "todays_target": self.todays_target.text()
-        }
+        # Today's tasks are read from the task store, so tasks saved before a restart are included
+        today = datetime.now().date()
+        try:
+            tasks = self.store.report_tasks(today)
+        except TaskStoreError as e:
+            QMessageBox.warning(self, "Task Server Error", f"Could not read today's tasks: {e}")
+            return
+        html_content, json_object = render_daily_report(
+            tasks, today, settings=self.settings,
+            mom_completed=self.mom_completed.text(), todays_target=self.todays_target.text()
+        )
 
-        formatted_json_object = json.dumps(json_object, indent=4)
+        # Compact JSON: the HTML dominates the payload, indentation only adds bytes
+        formatted_json_object = dumps_compact(json_object)
         self.webhookcaller(formatted_json_object)
-        print(formatted_json_object)
 
         # Display the HTML content (can be used to save, print, or display)
         QMessageBox.information(self, "Generated HTML", html_content)
@@ -756,14 +794,14 @@ class TaskApp(QWidget):
 
 
     def view_version_history(self, task_id):
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT version_date, version_data FROM task_versions WHERE task_id = ?
-        """, (task_id,))
-        versions = cursor.fetchall()
-
+        try:
+            history = self.store.history(task_id)
+        except TaskStoreError as e:
+            QMessageBox.warning(self, "Task Server Error", str(e))
+            return
         history_text = "\n".join([
-            f"Version Date: {version[0]}\nDetails: {version[1]}\n" for version in versions
+            f"Version Date: {version_date}\nDetails: {json.dumps(data)}\n"
+            for _, version_date, data in history
         ])
 
         QMessageBox.information(self, "Version History", history_text)
@@ -771,41 +809,47 @@ class TaskApp(QWidget):
 
 
     def open_version_history(self):
-        self.version_history_window = VersionHistoryWindow(parent=self, conn=self.conn)
+        self.version_history_window = VersionHistoryWindow(parent=self, store=self.store)
         self.version_history_window.show()
 
-    def delete_task(self, task_id,row_position):
+    def export_timesheet(self):
+        """Export this month's timesheet so far; other ranges can be exported with `python main.py export`."""
+        today = datetime.now().date()
+        first_day = today.replace(day=1)
+        path, _ = QFileDialog.getSaveFileName(self, "Export Timesheet",
+                                              f"Monthly_Timesheet_{today.strftime('%Y-%m')}.xlsx",
+                                              "Excel Workbook (*.xlsx);;CSV (*.csv)")
+        if not path:
+            return
+        try:
+            count = write_timesheet(path, TIMESHEET_HEADERS, self.store.timesheet_rows(first_day, today))
+        except (OSError, TaskStoreError) as e:
+            QMessageBox.warning(self, "Export Failed", f"Could not export the timesheet: {e}")
+            return
+        QMessageBox.information(self, "Timesheet Exported",
+                                f"Exported {count} rows from {first_day} to {today} to {path}.")
+
+    def delete_task(self, task_id):
         """
-        Deletes a task from the FAISS index, metadata, SQLite database, and the UI by task_id.
+        Deletes a task from the vector store, task store, and the UI by task_id.
         :param task_id: The unique task ID to delete
         """
-        # Locate the task in the metadata list
-        task_idx = next((idx for idx, task in enumerate(self.metadata) if task["id"] == task_id), None)
-
-        if task_idx is None:
-            QMessageBox.warning(self, "Error", f"Task with ID {task_id} not found.")
-            return
-
         try:
-            # Begin SQLite deletion
-            cursor = self.conn.cursor()
-
-            # Delete task from the `tasks` table
-            cursor.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
-            self.conn.commit()
-            print(f"Task with ID {task_id} deleted from SQLite.")
-
-            # Remove metadata entry
-            self.metadata.pop(task_idx)
-
-            # Remove task from the UI table by row_position
-            self.tableWidget.removeRow(row_position)
+            # Delete task from the `tasks` table; its task_versions rows stay in the history
+            self.store.delete_task(task_id)
+            print(f"Task with ID {task_id} deleted from the task store.")
+
+            # Remove task from the UI table by id
+            self.task_model.remove_task(task_id)
+            if task_id == self.editing_task_id:
+                self.set_editing_task(None)
             print(f"Task with ID {task_id} removed from the UI table.")
 
-            # Rebuild the FAISS index
-            self.rebuild_faiss_index()
+            # Remove the task vector (reconciled at startup if the model is still loading)
+            if self.vector_store is not None:
+                self.vector_store.remove([task_id])
+                print(f"Task with ID {task_id} deleted from FAISS.")
 
-            print(f"Task with ID {task_id} deleted from FAISS.")
             QMessageBox.information(self, "Success", f"Task with ID {task_id} has been deleted successfully.")
 
         except Exception as e:
@@ -817,94 +861,82 @@ class TaskApp(QWidget):
         Search for similar tasks based on query embedding.
         query_embedding: A numpy array representing the query vector
         k: Number of similar results to return
+        Returns [(distance, task_id)], nearest first; the tasks are read separately.
         """
-        # Perform the search
-        distances, indices = self.index.search(np.array([query_embedding]), k)
+        import numpy as np
+
+        if self.vector_store is None:  # Model still loading
+            return []
 
-        results = []
-        for idx in indices[0]:
-            task = self.metadata[idx]
-            results.append(task)
+        # Perform the search
+        distances, ids = self.vector_store.search(np.array([query_embedding]), k)
 
-        return results
+        # Fewer than k tasks in the index are padded with -1
+        return [(float(distance), int(task_id)) for distance, task_id in zip(distances[0], ids[0]) if task_id != -1]
 
     def open_settings(self):
+        # Saving notifies the settings store, which calls on_settings_changed
         self.settings_window = SettingsWindow(self)
-        self.settings_window.settings_updated.connect(self.refresh_settings)  # Connect the signal
         self.settings_window.show()
 
-    def rebuild_faiss_index(self):
-        """
-        Rebuilds the FAISS index using the current metadata.
-        """
-        try:
-            # Reinitialize the FAISS index
-            self.index = faiss.IndexFlatL2(self.dimension)
-            new_embeddings = []
-
-            # Extract embeddings from metadata
-            for task in self.metadata:
-                task_data = task["task_data"]  # Assuming embeddings are stored in task_data
-                embedding = task_data.get("embedding")  # Adjust based on actual metadata structure
-                if embedding:
-                    new_embeddings.append(np.array(embedding))
-
-            # Add the embeddings back to the index
-            if new_embeddings:
-                self.index.add(np.vstack(new_embeddings))  # Stack and add embeddings
-
-            print("FAISS index rebuilt successfully.")
-
-        except Exception as e:
-            print(f"Error rebuilding FAISS index: {e}")
+    def on_settings_changed(self, path):
+        if path == self.settings_store.mom_settings_file:
+            self.load_settings()
+            self.refresh_mom_dropdowns()
+        else:
+            self.refresh_settings()
 
     def refresh_settings(self):
-        self.load_settings()  # Reload the settings from the configuration file
+        self.load_settings()  # Pick up the latest settings snapshot
+        configure_http_client(gzip_bodies=self.settings.webhook_gzip)
         self.update_dropdowns()  # Update dropdowns based on new settings
+        self.arm_email_timer()  # The schedule may have changed
+
+    def sync_tasks(self):
+        """Exchange task changes with the task server on the store worker; see on_sync_finished."""
+        self.sync_button.setEnabled(False)  # One sync at a time
+        self.store_worker.submit_sync(("sync",))
+
+    def on_sync_finished(self, pushed, pulled):
+        self.sync_button.setEnabled(True)
+        print(f"Synced with the task server: {pushed} changes sent, {pulled} received.")
+        if pulled:
+            self.task_model.reload()
+            if self.vector_store is not None:
+                self.embed_missing_tasks()
+        self.load_recent_tasks()
 
     def sync_with_db(self):
-        cursor = self.conn.cursor()
+        if self.offline_sync:
+            self.sync_tasks()  # The tasks are loaded once the sync has finished
+        else:
+            self.load_recent_tasks()
 
+    def load_recent_tasks(self):
+        """Fill the task dropdown with today's tasks, or those of the most recent earlier day."""
         # Get today's date
         current_date = datetime.now().strftime("%Y-%m-%d")
 
-        # Query the task_versions table for tasks created today
-        cursor.execute("""
-            SELECT DISTINCT task_id, task_name, version_date 
-            FROM task_versions
-            WHERE DATE(version_date) = ?
-            ORDER BY version_date ASC
-        """, (current_date,))
-        tasks = cursor.fetchall()
-
-        # If no tasks for today, look for the most recent earlier date
-        if not tasks:
-            cursor.execute("""
-                SELECT DISTINCT DATE(version_date) AS previous_date
-                FROM task_versions
-                WHERE version_date < ?
-                ORDER BY version_date DESC
-                LIMIT 1
-            """, (current_date,))
-            previous_date_row = cursor.fetchone()
-
-            if previous_date_row:
-                previous_date = previous_date_row[0]
-                QMessageBox.information(self, "No Tasks for Today",
-                                        f"No tasks found for today. Displaying tasks from {previous_date}.")
+        try:
+            # Query the task_versions table for tasks created today
+            tasks = self.store.tasks_for_day(current_date)
 
+            # If no tasks for today, look for the most recent earlier date
+            previous_date = None if tasks else self.store.previous_task_day(current_date)
+            if previous_date:
                 # Fetch tasks for the most recent earlier date
-                cursor.execute("""
-                    SELECT DISTINCT task_id, task_name, version_date 
-                    FROM task_versions
-                    WHERE DATE(version_date) = ?
-                    ORDER BY version_date ASC
-                """, (previous_date,))
-                tasks = cursor.fetchall()
-            else:
-                # No earlier data available
-                QMessageBox.information(self, "No Tasks", "No tasks found in the database!")
-                return
+                tasks = self.store.tasks_for_day(previous_date)
+        except TaskStoreError as e:
+            QMessageBox.warning(self, "Task Server Error", f"Could not read tasks: {e}")
+            return
+
+        if not tasks:
+            # No earlier data available
+            QMessageBox.information(self, "No Tasks", "No tasks found in the database!")
+            return
+        if previous_date:
+            QMessageBox.information(self, "No Tasks for Today",
+                                    f"No tasks found for today. Displaying tasks from {previous_date}.")
 
         # Clear existing items and populate dropdown
         self.task_dropdown.clear()
@@ -913,44 +945,103 @@ class TaskApp(QWidget):
             display_name = f"{task_name} ({version_date})"
             self.task_dropdown.addItem(display_name, task_id)
 
+    def schedule_similar_search(self):
+        self.similar_search_timer.start()  # Restarts the debounce interval
+
+    def run_similar_search(self):
+        query = self.similar_search_input.text().strip()
+        self.similar_results.clear()
+        if not query:
+            self.similar_query_id = None
+            return
+        if self.vector_store is None:
+            self.similar_results.addItem("Embedding model is still loading...")
+        # Encoded on the embedding worker; older pending queries are dropped there
+        self.similar_query_id = self.embedder.submit_query(query)
+
+    def show_similar_tasks(self, query_id, query_vector):
+        if query_id != self.similar_query_id:
+            return  # Stale result for an older query
+
+        task_ids = [task_id for _, task_id in self.search_task_with_faiss(query_vector, k=10)]
+        if not task_ids:
+            self.similar_results.clear()
+            self.similar_results.addItem("No similar tasks found.")
+            return
+        # The latest versions of all hits are read in one request, on the store worker
+        self.store_worker.submit(("similar", query_id, task_ids), "latest_versions", task_ids)
+
+    def show_similar_results(self, query_id, task_ids, latest_versions):
+        if query_id != self.similar_query_id:
+            return  # Stale result for an older query
+
+        latest = {task_id: (version_date, task_details) for task_id, version_date, task_details in latest_versions}
+        self.similar_results.clear()
+        for task_id in task_ids:
+            if task_id not in latest:  # Deleted since it was indexed
+                continue
+            version_date, task_details = latest[task_id]
+            description = (task_details.get("description") or "")[:60]
+            item = QListWidgetItem(f"{task_details.get('task_name') or ''} - {description} (last saved {version_date})")
+            item.setData(Qt.UserRole, task_id)
+            item.setData(Qt.UserRole + 1, task_details)
+            self.similar_results.addItem(item)
+
+        if not self.similar_results.count():
+            self.similar_results.addItem("No similar tasks found.")
+
+    def clone_similar_task(self, item):
+        if item is None or item.data(Qt.UserRole) is None:
+            return
+        # The task as listed, so cloning does not wait on the task store
+        self.fill_task_form(item.data(Qt.UserRole + 1))
+        self.set_editing_task(None)  # A clone is saved as a new task
+
+    def get_latest_task_version(self, task_id):
+        """Return (version_date, task_details) of the latest version of a task, or None."""
+        try:
+            return self.store.latest(task_id)
+        except TaskStoreError as e:
+            print(f"Could not read task {task_id}: {e}")
+            return None
+
     def populate_task_details(self):
         # Get the selected task ID
         selected_task_id = self.task_dropdown.currentData()
 
         if selected_task_id is None:
+            self.set_editing_task(None)
             return  # No valid task selected
 
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT task_name, version_data, version_date 
-            FROM task_versions 
-            WHERE task_id = ? 
-            ORDER BY version_date DESC 
-            LIMIT 1
-        """, (selected_task_id,))
-        task_version = cursor.fetchone()
+        task_version = self.get_latest_task_version(selected_task_id)
 
         if task_version:
-            task_name, version_data, version_date = task_version
-            task_details = json.loads(version_data)  # Deserialize version_data JSON
-
-            # Populate UI fields with task details
-            self.task_name_input.setText(task_details.get("task_name", ""))
-            self.description_input.setPlainText(task_details.get("description", ""))
-            self.start_date_input.findChild(QLineEdit).setText(task_details.get("start_date", ""))
-            self.due_date_input.findChild(QLineEdit).setText(task_details.get("due_date", ""))
-
-            time_string = task_details.get("time_spent", "00:00")
-            time_obj = QTime.fromString(time_string, 'HH:mm')
-            self.time_spent_input.setTime(time_obj)
-
-            self.functional_area_input.setCurrentText(task_details.get("functional_area", ""))
-            self.assignment_input.setCurrentText(task_details.get("assignment", ""))
-            self.task_type_input.setCurrentText(task_details.get("task_type", ""))
-            self.status_checkbox.setChecked(task_details.get("status") == "Completed")
+            self.fill_task_form(task_version[1])
+            self.set_editing_task(selected_task_id)
         else:
             QMessageBox.warning(self, "Error", "Task details not found!")
 
+    def fill_task_form(self, task_details):
+        # Populate UI fields with task details
+        self.task_name_input.setText(task_details.get("task_name", ""))
+        self.description_input.setPlainText(task_details.get("description", ""))
+        self.start_date_input.findChild(QLineEdit).setText(task_details.get("start_date", ""))
+        self.due_date_input.findChild(QLineEdit).setText(task_details.get("due_date", ""))
+
+        time_string = task_details.get("time_spent", "00:00")
+        time_obj = QTime.fromString(time_string, 'HH:mm')
+        self.time_spent_input.setTime(time_obj)
+
+        self.functional_area_input.setCurrentText(task_details.get("functional_area", ""))
+        self.assignment_input.setCurrentText(task_details.get("assignment", ""))
+        self.task_type_input.setCurrentText(task_details.get("task_type", ""))
+        self.status_checkbox.setChecked(task_details.get("status") == "Completed")
+
+    def set_editing_task(self, task_id):
+        """Make the next save update `task_id` in place, or add a new task if it is None."""
+        self.editing_task_id = task_id
+        self.add_button.setText("Add Task" if task_id is None else "Update Task")
+
     def clear_task_inputs(self):
         """
         Clears all input fields to reset the task form.
@@ -964,23 +1055,30 @@ class TaskApp(QWidget):
         self.assignment_input.setCurrentIndex(0)  # Reset assignment dropdown to the first item
         self.task_type_input.setCurrentIndex(0)  # Reset task type dropdown to the first item
         self.status_checkbox.setChecked(False)  # Uncheck the status checkbox
+        self.set_editing_task(None)  # The next save adds a new task
 
 
 
 
     def webhookcaller(self, task_json):
-        url = self.settings.get("webhook_url", "")
+        url = self.settings.webhook_url
         if not url:
             QMessageBox.warning(self, "Error", "Webhook URL is not configured.")
             return
 
-        headers = {"Content-Type": "application/json"}
-        response = requests.post(url, data=task_json, headers=headers)
+        self.enqueue_webhook("daily_report", url, task_json)
+
+    def enqueue_webhook(self, kind, url, payload):
+        outbox_id = self.outbox.enqueue(kind, url, payload)
+        self.webhook_status_label.setText(f"Webhook {outbox_id} ({kind}): queued for delivery.")
+        self.outbox_worker.wake()
 
-        if response.status_code == 202:
+    def on_webhook_status(self, outbox_id, kind, status, message):
+        self.webhook_status_label.setText(f"Webhook {outbox_id} ({kind}): {message}")
+        if status == "delivered":
             QMessageBox.information(self, "Success", "Webhook called successfully.")
-        else:
-            QMessageBox.warning(self, "Error", f"Webhook call failed: {response.status_code}")
+        elif status == "failed":
+            QMessageBox.warning(self, "Error", message)
 
 
 if __name__ == '__main__':
@@ -1,17 +1,17 @@
-import json
-
 from PyQt5.QtWidgets import (
-    QApplication, QWidget, QTableWidget, QTableWidgetItem, QVBoxLayout,
-    QPushButton, QComboBox, QCheckBox, QCalendarWidget, QTimeEdit,
-    QFormLayout, QLineEdit, QLabel, QTextEdit, QHBoxLayout, QMessageBox
+    QDateEdit, QHBoxLayout, QHeaderView, QLabel, QMessageBox, QTableView, QVBoxLayout, QWidget
 )
-from PyQt5.QtCore import QDate, QTime, Qt, QTimer
+from PyQt5.QtCore import QDate, Qt
+
+from Email_and_Timesheet_Automation.buttonDelegate import ButtonDelegate
+from Email_and_Timesheet_Automation.taskStore import TaskStoreError
+from Email_and_Timesheet_Automation.versionHistoryModel import DETAILS_COLUMN, VersionHistoryModel
 
 
 class VersionHistoryWindow(QWidget):
-    def __init__(self, parent=None, conn=None):
+    def __init__(self, parent=None, store=None):
         super().__init__(parent)
-        self.conn = conn
+        self.store = store
         self.setWindowTitle("Task Version History")
         self.setGeometry(200, 200, 600, 400)
 
@@ -24,47 +24,56 @@ class VersionHistoryWindow(QWidget):
         # Layout setup
         self.layout = QVBoxLayout()
 
-        # Date Selector
-        self.date_selector = QCalendarWidget()
-        self.date_selector.setGridVisible(True)
-        self.date_selector.clicked.connect(self.load_tasks_for_date)
-        self.layout.addWidget(QLabel("Select Date:"))
-        self.layout.addWidget(self.date_selector)
+        # Date range selector
+        range_layout = QHBoxLayout()
+        self.from_date = self.create_date_edit()
+        self.to_date = self.create_date_edit()
+        range_layout.addWidget(QLabel("From:"))
+        range_layout.addWidget(self.from_date)
+        range_layout.addWidget(QLabel("To:"))
+        range_layout.addWidget(self.to_date)
+        self.layout.addLayout(range_layout)
 
-        # Task Table
-        self.task_table = QTableWidget()
-        self.task_table.setColumnCount(3)
-        self.task_table.setHorizontalHeaderLabels(["Task Name", "Version Date", "Details"])
+        # Version table; rows are paged in from the task store as it scrolls
+        self.version_model = VersionHistoryModel(self.store, parent=self)
+        self.task_table = QTableView()
+        self.task_table.setModel(self.version_model)
+        self.task_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.task_table.verticalHeader().setDefaultSectionSize(28)
+        self.view_delegate = ButtonDelegate("View", self.task_table)
+        self.view_delegate.clicked.connect(lambda index: self.show_task_details(index.row()))
+        self.task_table.setItemDelegateForColumn(DETAILS_COLUMN, self.view_delegate)
         self.layout.addWidget(self.task_table)
 
         self.setLayout(self.layout)
 
-    def load_tasks_for_date(self, selected_date):
-        # Query tasks for the selected date
-        selected_date_str = selected_date.toString("yyyy-MM-dd")
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT task_name, version_date, version_data
-            FROM task_versions
-            WHERE DATE(version_date) = ?
-            ORDER BY version_date ASC
-        """, (selected_date_str,))
-        tasks = cursor.fetchall()
+        self.from_date.dateChanged.connect(self.load_tasks_for_range)
+        self.to_date.dateChanged.connect(self.load_tasks_for_range)
+        self.load_tasks_for_range()
 
-        # Populate the table with tasks
-        self.task_table.setRowCount(0)  # Clear existing rows
-        for row_index, (task_name, version_date, version_data) in enumerate(tasks):
-            self.task_table.insertRow(row_index)
-            self.task_table.setItem(row_index, 0, QTableWidgetItem(task_name))
-            self.task_table.setItem(row_index, 1, QTableWidgetItem(version_date))
+    def create_date_edit(self):
+        date_edit = QDateEdit(QDate.currentDate())
+        date_edit.setCalendarPopup(True)
+        date_edit.setDisplayFormat("yyyy-MM-dd")
+        return date_edit
 
-            # Add a "View" button to display task details
-            view_button = QPushButton("View")
-            view_button.clicked.connect(lambda _, data=version_data: self.show_task_details(data))
-            self.task_table.setCellWidget(row_index, 2, view_button)
+    def load_tasks_for_range(self):
+        # Keep the range valid when one end is moved past the other
+        if self.from_date.date() > self.to_date.date():
+            if self.sender() is self.to_date:
+                self.from_date.setDate(self.to_date.date())
+            else:
+                self.to_date.setDate(self.from_date.date())
+            return  # The adjusted date edit triggers the reload
+        self.version_model.set_range(self.from_date.date().toString("yyyy-MM-dd"),
+                                     self.to_date.date().toString("yyyy-MM-dd"))
 
-    def show_task_details(self, version_data):
-        # Display task details in a message box
-        task_details = json.loads(version_data)
+    def show_task_details(self, row):
+        # Display task details in a message box; version_data is read and decoded on demand
+        try:
+            task_details = self.version_model.version_details(row)
+        except TaskStoreError as e:
+            QMessageBox.warning(self, "Task Server Error", str(e))
+            return
         details_text = "\n".join([f"{key}: {value}" for key, value in task_details.items()])
-        QMessageBox.information(self, "Task Details", details_text)
\ No newline at end of file
+        QMessageBox.information(self, "Task Details", details_text)
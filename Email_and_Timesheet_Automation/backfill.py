@@ -0,0 +1,181 @@
+"""
+Embed historical tasks and task versions in large batches.
+
+Rows are streamed from SQLite in id order on a reader thread while the model
+encodes the previous chunk. Progress is checkpointed in `backfill_progress`
+after every chunk, so an interrupted run resumes where it stopped.
+
+Run it while the app is closed, since both write the same vector index files:
+
+    python -m Email_and_Timesheet_Automation.backfill --source all --batch-size 256 --threads 4
+"""
+import argparse
+import queue
+import threading
+from datetime import datetime
+
+from Email_and_Timesheet_Automation.dbConfig import (
+    DB_FILE, EMBEDDING_CACHE_FILE, VECTOR_INDEX_FILE, VERSION_VECTOR_INDEX_FILE,
+    connect, get_data_path, get_vector_index_path, init_sqlite_db
+)
+from Email_and_Timesheet_Automation.embeddingCache import EmbeddingCache
+from Email_and_Timesheet_Automation.embeddings import (
+    MODEL_NAME, build_task_text, build_version_text, encode, load_model
+)
+from Email_and_Timesheet_Automation.settingsStore import get_settings_store
+from Email_and_Timesheet_Automation.taskVersions import VersionStore
+
+
+def _task_text(row):
+    return build_task_text(*row)
+
+
+def _version_text(row):
+    return build_version_text(row[0])
+
+
+def _version_decoder(conn):
+    """Return rows -> rows replacing each version_id row with (version_id, full version data)."""
+    versions = VersionStore(conn)
+    return lambda rows: [(row[0], versions.get(row[0]) or {}) for row in rows]
+
+
+# source -> (keyset query, row -> text, vector index file, conn -> row decoder run on the reader thread)
+SOURCES = {
+    "tasks": (
+        """
+        SELECT id, task_name, description, start_date, due_date
+        FROM tasks WHERE id > ? ORDER BY id LIMIT ?
+        """,
+        _task_text,
+        VECTOR_INDEX_FILE,
+        None,
+    ),
+    "versions": (
+        """
+        SELECT version_id
+        FROM task_versions WHERE version_id > ? ORDER BY version_id LIMIT ?
+        """,
+        _version_text,
+        VERSION_VECTOR_INDEX_FILE,
+        _version_decoder,  # Deltas are rebuilt into full versions
+    ),
+}
+
+
+def load_index_config():
+    """Read the "vector_index" section of settings.json so the backfill builds the same backend as the app."""
+    return get_settings_store().settings.vector_index
+
+
+def get_progress(conn, source):
+    row = conn.execute("SELECT last_id FROM backfill_progress WHERE source = ?", (source,)).fetchone()
+    return row[0] if row else 0
+
+
+def save_progress(conn, source, last_id):
+    conn.execute("""
+        INSERT INTO backfill_progress (source, last_id, updated_at) VALUES (?, ?, ?)
+        ON CONFLICT(source) DO UPDATE SET last_id = excluded.last_id, updated_at = excluded.updated_at
+    """, (source, last_id, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+    conn.commit()
+
+
+def _read_chunks(db_file, query, start_id, chunk_size, chunks, stop, decoder=None):
+    """Reader thread: push chunks of rows onto `chunks`, then a None sentinel."""
+    conn = connect(db_file)
+    try:
+        decode = decoder(conn) if decoder is not None else None
+        last_id = start_id
+        while not stop.is_set():
+            rows = conn.execute(query, (last_id, chunk_size)).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            chunks.put(decode(rows) if decode is not None else rows)
+    finally:
+        conn.close()
+        chunks.put(None)
+
+
+def backfill(conn, source, model, batch_size=256, chunk_size=2048, reset=False, db_file=DB_FILE, cache=None,
+             index_config=None):
+    """
+    Embed every row of `source` ("tasks" or "versions") newer than the saved
+    checkpoint and write the vectors into that source's index. Texts already in
+    `cache` (an EmbeddingCache) are not re-encoded.
+    Returns the number of rows embedded.
+    """
+    from Email_and_Timesheet_Automation.vectorStore import VectorStore
+
+    query, to_text, index_file, decoder = SOURCES[source]
+    if reset:
+        save_progress(conn, source, 0)
+    start_id = get_progress(conn, source)
+
+    store = VectorStore(get_vector_index_path(index_file), model.get_sentence_embedding_dimension(),
+                        index_config=index_config)
+    chunks = queue.Queue(maxsize=2)  # Read at most two chunks ahead of the encoder
+    stop = threading.Event()
+    reader = threading.Thread(target=_read_chunks, args=(db_file, query, start_id, chunk_size, chunks, stop, decoder),
+                              daemon=True)
+    reader.start()
+
+    total = 0
+    try:
+        while True:
+            rows = chunks.get()
+            if rows is None:
+                break
+            ids = [row[0] for row in rows]
+            vectors = encode(model, [to_text(row[1:]) for row in rows], batch_size=batch_size, cache=cache)
+            store.add(ids, vectors)
+            save_progress(conn, source, ids[-1])
+            total += len(rows)
+            print(f"[{source}] embedded {total} rows (up to id {ids[-1]}).")
+    finally:
+        # Unblock the reader if we stopped early, then wait for it
+        stop.set()
+        while reader.is_alive():
+            try:
+                chunks.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        store.close()
+
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Embed historical tasks and task versions.")
+    parser.add_argument("--source", choices=["tasks", "versions", "all"], default="all")
+    parser.add_argument("--batch-size", type=int, default=256, help="Sentences per model forward pass.")
+    parser.add_argument("--chunk-size", type=int, default=2048, help="Rows read from SQLite per chunk.")
+    parser.add_argument("--threads", type=int, default=None, help="CPU threads used by the model.")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--reset", action="store_true", help="Ignore saved progress and start from the beginning.")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the embedding cache.")
+    args = parser.parse_args(argv)
+
+    conn = init_sqlite_db()
+    model = load_model(args.model, threads=args.threads)
+    cache = None if args.no_cache else EmbeddingCache(get_data_path(EMBEDDING_CACHE_FILE), args.model)
+    sources = ["tasks", "versions"] if args.source == "all" else [args.source]
+    try:
+        for source in sources:
+            total = backfill(conn, source, model, batch_size=args.batch_size,
+                             chunk_size=args.chunk_size, reset=args.reset, cache=cache,
+                             index_config=load_index_config())
+            print(f"[{source}] done, {total} rows embedded.")
+        if cache is not None:
+            print(f"Embedding cache: {cache.hits} hits, {cache.misses} misses.")
+    except KeyboardInterrupt:
+        print("Interrupted; run again to resume from the last checkpoint.")
+    finally:
+        if cache is not None:
+            cache.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
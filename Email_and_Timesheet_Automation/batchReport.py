@@ -0,0 +1,196 @@
+"""
+Build and send the daily report for a whole team from one machine.
+
+    python main.py batch profiles.json --date 2024-01-15 --workers 4 --senders 4
+
+profiles.json lists one entry per user, each with its own settings file and
+task database (relative paths are resolved against profiles.json):
+
+    [{"name": "jane", "settings": "jane/settings.json", "database": "jane/tasks.db"}, ...]
+
+Reports are built in a process pool. Each finished report is handed to a
+fixed number of sender threads, so sending overlaps with building and never
+opens more than --senders connections at once. Nothing here imports PyQt5.
+"""
+import argparse
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import date, datetime
+
+import requests
+
+from Email_and_Timesheet_Automation.dbConfig import connect_readonly
+from Email_and_Timesheet_Automation.httpClient import HttpClient, dumps_compact
+from Email_and_Timesheet_Automation.reportService import build_daily_report
+from Email_and_Timesheet_Automation.settingsStore import load_app_settings
+from Email_and_Timesheet_Automation.webhookOutbox import backoff_delay
+
+SEND_ATTEMPTS = 3
+
+
+@dataclass(frozen=True)
+class UserProfile:
+    name: str
+    settings_file: str
+    database: str
+
+
+@dataclass(frozen=True)
+class UserResult:
+    name: str
+    status: str  # "sent", "built" (--dry-run), "skipped" (no webhook URL), "failed" or "error"
+    tasks: int = 0
+    message: str = ""
+
+
+def load_profiles(path):
+    """Read the profiles file into a list of UserProfile."""
+    with open(path, "r") as file:
+        entries = json.load(file)
+    if not isinstance(entries, list):
+        raise ValueError(f"{path}: expected a JSON list of user profiles")
+
+    base = os.path.dirname(os.path.abspath(path))
+    profiles = []
+    for i, entry in enumerate(entries):
+        missing = [key for key in ("name", "settings", "database") if not entry.get(key)]
+        if missing:
+            raise ValueError(f"{path}: profile {i} is missing {', '.join(missing)}")
+        profiles.append(UserProfile(entry["name"], os.path.join(base, entry["settings"]),
+                                    os.path.join(base, entry["database"])))
+    names = [profile.name for profile in profiles]
+    if len(set(names)) != len(names):
+        raise ValueError(f"{path}: profile names must be unique")
+    return profiles
+
+
+def build_user_report(profile, day):
+    """
+    Process pool worker: build one user's report. Returns a dict with the
+    webhook settings, the compact JSON payload, the HTML and the task count.
+    """
+    for path in (profile.settings_file, profile.database):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} not found")
+    settings = load_app_settings(profile.settings_file)
+    conn = connect_readonly(profile.database)  # Users running an older app version are reported as errors
+    try:
+        html_content, payload = build_daily_report(conn, day, settings)
+    finally:
+        conn.close()
+    return {
+        "webhook_url": settings.webhook_url,
+        "webhook_gzip": settings.webhook_gzip,
+        "payload": dumps_compact(payload),
+        "html": html_content,
+        "tasks": len(payload["tasks"]),
+    }
+
+
+def send_report(client, url, payload, attempts=SEND_ATTEMPTS):
+    """POST one payload, retrying connection errors, 429 and 5xx. Returns (sent, message)."""
+    message = ""
+    for attempt in range(1, attempts + 1):
+        try:
+            status_code = client.post_json(url, payload)
+        except requests.exceptions.RequestException as e:
+            status_code, message = None, str(e)
+        else:
+            if 200 <= status_code < 300:
+                return True, f"HTTP {status_code}"
+            message = f"HTTP {status_code}"
+            if 400 <= status_code < 500 and status_code != 429:
+                break  # Will not succeed on retry
+        if attempt < attempts:
+            time.sleep(backoff_delay(attempt))
+    return False, message
+
+
+def _output_path(output_dir, name):
+    return os.path.join(output_dir, re.sub(r"[^\w.-]+", "_", name) + ".html")
+
+
+def run_batch(profiles, day, workers=None, senders=4, dry_run=False, output_dir=None):
+    """Build (and unless `dry_run`, send) every user's report. Returns UserResult per profile, in order."""
+    results = {}
+    clients = {}  # webhook_gzip -> HttpClient sized for the sender threads
+
+    def client_for(gzip_bodies):
+        if gzip_bodies not in clients:
+            clients[gzip_bodies] = HttpClient(gzip_bodies=gzip_bodies, pool_size=senders)
+        return clients[gzip_bodies]
+
+    def send(name, report):
+        sent, message = send_report(client_for(report["webhook_gzip"]), report["webhook_url"], report["payload"])
+        return UserResult(name, "sent" if sent else "failed", report["tasks"], message)
+
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers) as builders, ThreadPoolExecutor(max_workers=senders) as sending:
+        builds = {builders.submit(build_user_report, profile, day): profile.name for profile in profiles}
+        sends = {}
+        for future in as_completed(builds):
+            name = builds[future]
+            try:
+                report = future.result()
+            except Exception as e:
+                results[name] = UserResult(name, "error", message=f"{type(e).__name__}: {e}")
+                continue
+            if output_dir:
+                with open(_output_path(output_dir, name), "w", encoding="utf-8") as file:
+                    file.write(report["html"])
+            if dry_run:
+                results[name] = UserResult(name, "built", report["tasks"])
+            elif not report["webhook_url"]:
+                results[name] = UserResult(name, "skipped", report["tasks"], "webhook_url is not configured")
+            else:
+                sends[sending.submit(send, name, report)] = name
+        for future in as_completed(sends):
+            results[sends[future]] = future.result()
+
+    for client in clients.values():
+        client.close()
+    return [results[profile.name] for profile in profiles]
+
+
+def print_summary(results):
+    width = max([len(result.name) for result in results] + [4])
+    print(f"{'user':<{width}}  {'status':<8} {'tasks':>5}  detail")
+    for result in results:
+        print(f"{result.name:<{width}}  {result.status:<8} {result.tasks:>5}  {result.message}")
+    counts = {}
+    for result in results:
+        counts[result.status] = counts.get(result.status, 0) + 1
+    print(", ".join(f"{count} {status}" for status, count in sorted(counts.items())))
+
+
+def main(argv=None):
+    """Run the batch and return the process exit code: 0 if every report was sent (or built)."""
+    parser = argparse.ArgumentParser(prog="main.py batch",
+                                     description="Build and send the daily report for many users.")
+    parser.add_argument("profiles", help="JSON list of {name, settings, database} user profiles.")
+    parser.add_argument("--date", default=None, help="Report day as yyyy-MM-dd (default: today).")
+    parser.add_argument("--workers", type=int, default=None, help="Report build processes (default: CPU count).")
+    parser.add_argument("--senders", type=int, default=4, help="Reports posted at the same time.")
+    parser.add_argument("--dry-run", action="store_true", help="Build the reports without sending them.")
+    parser.add_argument("--output-dir", default=None, help="Also write each user's report HTML here.")
+    args = parser.parse_args(argv)
+
+    try:
+        profiles = load_profiles(args.profiles)
+        day = datetime.strptime(args.date, "%Y-%m-%d").date() if args.date else date.today()
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 2
+    if not profiles:
+        print("No user profiles to process.")
+        return 0
+
+    results = run_batch(profiles, day, workers=args.workers, senders=max(1, args.senders),
+                        dry_run=args.dry_run, output_dir=args.output_dir)
+    print_summary(results)
+    return 0 if all(result.status in ("sent", "built") for result in results) else 1
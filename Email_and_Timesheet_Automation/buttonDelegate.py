@@ -0,0 +1,42 @@
+from PyQt5.QtCore import QEvent, QModelIndex, Qt, pyqtSignal
+from PyQt5.QtWidgets import QApplication, QStyle, QStyledItemDelegate, QStyleOptionButton
+
+
+class ButtonDelegate(QStyledItemDelegate):
+    """
+    Paints a push button in every cell of a column and emits `clicked(index)`
+    when it is pressed, instead of creating one QPushButton widget per row.
+    """
+    clicked = pyqtSignal(QModelIndex)
+
+    def __init__(self, text, parent=None):
+        super().__init__(parent)
+        self.text = text
+        self.pressed = None  # (row, column) of the button held down
+
+    def _button_option(self, option, index):
+        button = QStyleOptionButton()
+        button.rect = option.rect.adjusted(2, 2, -2, -2)
+        button.text = self.text
+        button.state = QStyle.State_Enabled
+        if self.pressed == (index.row(), index.column()):
+            button.state |= QStyle.State_Sunken
+        else:
+            button.state |= QStyle.State_Raised
+        return button
+
+    def paint(self, painter, option, index):
+        style = option.widget.style() if option.widget is not None else QApplication.style()
+        style.drawControl(QStyle.CE_PushButton, self._button_option(option, index), painter, option.widget)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonPress and event.button() == Qt.LeftButton:
+            self.pressed = (index.row(), index.column())
+            return True
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            was_pressed = self.pressed == (index.row(), index.column())
+            self.pressed = None
+            if was_pressed and option.rect.contains(event.pos()):
+                self.clicked.emit(index)
+            return True
+        return False
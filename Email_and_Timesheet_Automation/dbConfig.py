@@ -1,13 +1,140 @@
+import json
+import os
 import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from urllib.request import pathname2url
 
+from Email_and_Timesheet_Automation.taskVersions import (
+    LATEST_STATE_QUERY, LATEST_VERSIONS_QUERY, TASK_HISTORY_QUERY, VERSION_CHAIN_QUERY, encode_versions
+)
 
+DB_FILE = "tasks.db"  # Database file name
+MOM_DB_FILE = "mom_management.db"  # Minutes of meeting records
+VECTOR_INDEX_FILE = "tasks.faiss"  # Persistent FAISS index, stored next to the database
+VERSION_VECTOR_INDEX_FILE = "task_versions.faiss"  # Index of task_versions, keyed by version_id
+EMBEDDING_CACHE_FILE = "embedding_cache.db"  # Embeddings keyed by text hash, safe to delete
+
+
+# Data files live in the project root (next to settings.json) unless TIMESHEET_DATA_DIR is set,
+# so the app finds the same databases whatever directory it is started from
+DATA_DIR = os.path.abspath(os.environ.get(
+    "TIMESHEET_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+))
+
+
+def get_data_path(file_name):
+    """Return the absolute path of a data file in the data directory (absolute paths are returned as is)."""
+    return os.path.join(DATA_DIR, file_name)
+
+
+def get_vector_index_path(file_name=VECTOR_INDEX_FILE):
+    """Return the path of a FAISS index file that sits next to tasks.db."""
+    return get_data_path(file_name)
+
+
+# Hot task_versions queries. Date filters are half-open ranges on the raw
+# version_date column (see day_bounds) so that they can use the indexes below.
+# Versions of deleted tasks stay in the history, so the queries offering tasks
+# for reuse join the tasks that still exist.
+TASKS_FOR_DAY_QUERY = """
+    SELECT DISTINCT v.task_id, v.task_name, v.version_date
+    FROM task_versions v JOIN tasks t ON t.id = v.task_id
+    WHERE v.version_date >= ? AND v.version_date < ?
+    ORDER BY v.version_date ASC
+"""
+PREVIOUS_TASK_DAY_QUERY = """
+    SELECT DATE(v.version_date) AS previous_date
+    FROM task_versions v JOIN tasks t ON t.id = v.task_id
+    WHERE v.version_date < ?
+    ORDER BY v.version_date DESC
+    LIMIT 1
+"""
+# One page of versions in a date range, after the (version_date, version_id) cursor.
+# version_data is left out and rebuilt by taskVersions.VersionStore only when a row is opened.
+VERSIONS_PAGE_QUERY = """
+    SELECT version_id, task_name, version_date
+    FROM task_versions
+    WHERE version_date >= ? AND version_date < ? AND (version_date, version_id) > (?, ?)
+    ORDER BY version_date, version_id
+    LIMIT ?
+"""
+# One page of the change log after a sequence number (see taskSync). Versions
+# removed by an earlier schema read as NULL and are skipped.
+CHANGES_PAGE_QUERY = """
+    SELECT c.seq, c.task_uid, c.version_id, v.version_date, c.deleted_at, c.origin
+    FROM change_log c LEFT JOIN task_versions v ON v.version_id = c.version_id
+    WHERE c.seq > ?
+    ORDER BY c.seq
+    LIMIT ?
+"""
+
+def day_bounds(day):
+    """
+    Return the half-open [start, end) version_date range of a day given as a
+    date or "yyyy-MM-dd" string: `version_date >= start AND version_date < end`.
+    """
+    if isinstance(day, str):
+        day = datetime.strptime(day, "%Y-%m-%d").date()
+    elif isinstance(day, datetime):
+        day = day.date()
+    return day.isoformat(), (day + timedelta(days=1)).isoformat()
+
+
+def explain_full_scans(conn):
+    """
+    Run EXPLAIN QUERY PLAN on the hot task_versions queries and return
+    {query name: plan detail} for every query that scans the whole table.
+    An empty result means all of them are served by an index.
+    """
+    start, end = day_bounds(date.today())
+    queries = {
+        "TASKS_FOR_DAY_QUERY": (TASKS_FOR_DAY_QUERY, (start, end)),
+        "PREVIOUS_TASK_DAY_QUERY": (PREVIOUS_TASK_DAY_QUERY, (start,)),
+        "VERSIONS_PAGE_QUERY": (VERSIONS_PAGE_QUERY, (start, end, "", 0, 200)),
+        "LATEST_STATE_QUERY": (LATEST_STATE_QUERY, (1,)),
+        "LATEST_VERSIONS_QUERY": (LATEST_VERSIONS_QUERY, (1, 9)),
+        "VERSION_CHAIN_QUERY": (VERSION_CHAIN_QUERY, (1, start, 1, 10)),
+        "TASK_HISTORY_QUERY": (TASK_HISTORY_QUERY, (1,)),
+    }
+    full_scans = {}
+    for name, (query, params) in queries.items():
+        for row in conn.execute("EXPLAIN QUERY PLAN " + query, params):
+            detail = row[-1]
+            # "SCAN task_versions" without "USING ... INDEX" reads every row
+            if detail.startswith("SCAN") and "task_versions" in detail and "INDEX" not in detail:
+                full_scans[name] = detail
+    return full_scans
 
-def init_sqlite_db():
-    db_file = "tasks.db"  # Database file name
-    conn = sqlite3.connect(db_file)
-    cursor = conn.cursor()
 
-    # Create tasks table if not exists
+# Connection tuning applied to every tasks.db connection
+PRAGMAS = (
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA synchronous = NORMAL",  # Safe with WAL; fsync only at checkpoints
+    "PRAGMA cache_size = -16000",  # 16 MB page cache
+    "PRAGMA mmap_size = 67108864",  # 64 MB memory-mapped reads
+    "PRAGMA temp_store = MEMORY",
+)
+BUSY_TIMEOUT = 10  # Seconds to wait for another connection's write lock
+
+
+CACHED_STATEMENTS = 256  # Prepared statements kept per connection, keyed by SQL text
+
+
+def connect(db_file=DB_FILE, check_same_thread=True):
+    """
+    Open a connection to a database in the data directory with the standard
+    pragmas applied. Pooled connections, handed from thread to thread but used
+    by one at a time, pass check_same_thread=False.
+    """
+    conn = sqlite3.connect(get_data_path(db_file), timeout=BUSY_TIMEOUT, cached_statements=CACHED_STATEMENTS,
+                           check_same_thread=check_same_thread)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def _create_initial_schema(cursor):
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS tasks (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -22,8 +149,6 @@ def init_sqlite_db():
             status INTEGER
         )
     """)
-
-    # Create task_versions table if not exists
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS task_versions (
             version_id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -34,7 +159,314 @@ def init_sqlite_db():
         )
     """)
 
-    conn.commit()
-    print("SQLite database initialized and tables created.")
+    # Indexes for per-task history lookups and date-range queries
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_task_versions_task_date ON task_versions (task_id, version_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_task_versions_date ON task_versions (version_date)")
+
+    # Resume point of the embedding backfill, per source table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS backfill_progress (
+            source TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+    """)
+
+    # Webhook payloads waiting for (or done with) delivery
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS webhook_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            url TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            status_code INTEGER,
+            last_error TEXT,
+            created_at TEXT NOT NULL,
+            delivered_at TEXT
+        )
+    """)
+
+
+def _rebuild_task_versions(cursor, delta_encoded=False):
+    """
+    Rebuild task_versions with a plain task_id column, keeping every row. The
+    baseline schema declared `REFERENCES tasks`, which with foreign keys
+    enforced would stop tasks with a history from being deleted.
+    """
+    columns = "version_id, task_id, task_name, version_date, version_data"
+    kind_column = ""
+    if delta_encoded:
+        columns += ", version_kind"
+        kind_column = ",\n            version_kind TEXT NOT NULL DEFAULT 'full'"
+    cursor.execute(f"""
+        CREATE TABLE task_versions_new (
+            version_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            task_id INTEGER NOT NULL,  -- Versions are history and outlive their task
+            task_name TEXT NOT NULL,
+            version_date TEXT NOT NULL,
+            version_data TEXT NOT NULL{kind_column}
+        )
+    """)
+    cursor.execute(f"INSERT INTO task_versions_new ({columns}) SELECT {columns} FROM task_versions")
+    cursor.execute("DROP TABLE task_versions")
+    cursor.execute("ALTER TABLE task_versions_new RENAME TO task_versions")
+    cursor.execute("CREATE INDEX idx_task_versions_task_date ON task_versions (task_id, version_date)")
+    cursor.execute("CREATE INDEX idx_task_versions_date ON task_versions (version_date)")
+
+
+def _keep_task_history(cursor):
+    """
+    Drop the unenforced foreign key of task_versions, so that a task can be
+    deleted while its versions stay in the history (as they always have).
+    """
+    _rebuild_task_versions(cursor)
+
+
+def _delta_encode_task_versions(cursor):
+    """Store task versions as periodic full snapshots plus merge-patch deltas (see taskVersions)."""
+    cursor.execute("ALTER TABLE task_versions ADD COLUMN version_kind TEXT NOT NULL DEFAULT 'full'")
+    conn = cursor.connection
+    task_ids = [row[0] for row in conn.execute("SELECT DISTINCT task_id FROM task_versions")]
+    saved = 0
+    for task_id in task_ids:
+        rows = conn.execute("""
+            SELECT version_id, version_data FROM task_versions WHERE task_id = ? ORDER BY version_date, version_id
+        """, (task_id,)).fetchall()
+        parsed = []
+        for version_id, version_data in rows:
+            try:
+                data = json.loads(version_data)
+            except ValueError:
+                data = None
+            parsed.append((version_id, data if isinstance(data, dict) else None))
+        updates = []
+        for (version_id, kind, version_data), (_, old_data) in zip(encode_versions(parsed), rows):
+            if version_data is not None:
+                updates.append((version_data, kind, version_id))
+                saved += len(old_data) - len(version_data)
+        cursor.executemany("UPDATE task_versions SET version_data = ?, version_kind = ? WHERE version_id = ?", updates)
+    if saved:
+        print(f"Delta-encoded task versions, {saved} characters smaller.")
+
+
+def _create_scheduler_runs(cursor):
+    """One row per report day claimed by a scheduler (the GUI timer or the headless daemon)."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS scheduler_runs (
+            run_date TEXT PRIMARY KEY,
+            fire_time TEXT NOT NULL,
+            claimed_by TEXT NOT NULL,
+            claimed_at TEXT NOT NULL,
+            status TEXT NOT NULL,
+            outbox_id INTEGER
+        )
+    """)
+
+
+def _create_change_log(cursor):
+    """
+    Sync identity of every task, the change log exchanged with a sync peer
+    (one row per version added or task deleted), and the sync watermarks.
+    Existing versions are logged so that the first sync uploads them.
+    """
+    cursor.execute("ALTER TABLE tasks ADD COLUMN sync_uid TEXT")
+    cursor.execute("UPDATE tasks SET sync_uid = lower(hex(randomblob(16))) WHERE sync_uid IS NULL")
+    cursor.execute("CREATE UNIQUE INDEX idx_tasks_sync_uid ON tasks (sync_uid)")
+    cursor.execute("""
+        CREATE TABLE change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,  -- Never reused, so watermarks survive deletes
+            task_uid TEXT NOT NULL,
+            version_id INTEGER,  -- Set when a version was added
+            deleted_at TEXT,  -- Set when the task was deleted
+            origin TEXT  -- Peer the change was received from; NULL if it was made here
+        )
+    """)
+    cursor.execute("CREATE INDEX idx_change_log_task ON change_log (task_uid)")
+    cursor.execute("""
+        INSERT INTO change_log (task_uid, version_id)
+        SELECT t.sync_uid, v.version_id
+        FROM task_versions v JOIN tasks t ON t.id = v.task_id
+        ORDER BY v.version_id
+    """)
+    cursor.execute("""
+        CREATE TABLE sync_state (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+    """)
+
+
+def _drop_task_versions_cascade(cursor):
+    """
+    Databases migrated by an earlier version 2 have a cascading foreign key
+    that deletes a task's history along with it; rebuild them without it.
+    """
+    sql = cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'task_versions'").fetchone()[0]
+    if "CASCADE" in sql.upper():
+        _rebuild_task_versions(cursor, delta_encoded=True)
+
+
+def _add_outbox_leases(cursor):
+    """Expiry of the claim a sender holds on a webhook_outbox row while posting it (status 'sending')."""
+    cursor.execute("ALTER TABLE webhook_outbox ADD COLUMN lease_until REAL")
+
+
+def _create_mom_schema(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS mom_data (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            to_emails TEXT,
+            cc_emails TEXT,
+            mom_leader TEXT,
+            mom_creator TEXT,
+            present_members TEXT,
+            absent_members TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_mom_data_timestamp ON mom_data (timestamp)")
+
+
+# Ordered schema migrations: (version, description, step). Steps receive a
+# cursor inside the migration transaction; append new steps, never edit applied ones
+# (version 2 was rewritten because it deleted history; 6 repairs databases that ran it).
+# A step must never delete user data.
+MIGRATIONS = [
+    (1, "initial schema", _create_initial_schema),
+    (2, "keep task history when tasks are deleted", _keep_task_history),
+    (3, "delta-encode task_versions", _delta_encode_task_versions),
+    (4, "scheduler runs", _create_scheduler_runs),
+    (5, "change log for sync", _create_change_log),
+    (6, "drop cascading deletes of task history", _drop_task_versions_cascade),
+    (7, "webhook delivery leases", _add_outbox_leases),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+MOM_MIGRATIONS = [
+    (1, "initial schema", _create_mom_schema),
+]
+
+# Database file -> its migrations
+DATABASES = {
+    DB_FILE: MIGRATIONS,
+    MOM_DB_FILE: MOM_MIGRATIONS,
+}
+
+
+def get_schema_version(conn):
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def migrate(conn, migrations=MIGRATIONS):
+    """Apply every pending migration in order and return the resulting schema version."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    """)
+    current = get_schema_version(conn)
+    pending = [migration for migration in migrations if migration[0] > current]
+    if not pending:
+        return current
+
+    # Table rebuilds must not trigger foreign key actions, so keys are checked
+    # once all pending steps have run; the whole batch commits or rolls back together
+    conn.execute("PRAGMA foreign_keys = OFF")
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN")
+        for version, description, step in pending:
+            step(cursor)
+            cursor.execute("INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                           (version, description, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+            print(f"Applied schema migration {version}: {description}")
+        violations = cursor.execute("PRAGMA foreign_key_check").fetchall()
+        if violations:
+            raise sqlite3.IntegrityError(f"Schema migration left {len(violations)} foreign key violation(s)")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.execute("PRAGMA foreign_keys = ON")
+    return pending[-1][0]
+
+
+class SchemaVersionError(Exception):
+    """A database opened read-only has not been migrated to the current schema."""
+
+
+def connect_readonly(path):
+    """
+    Open another user's tasks database read-only. Only the app that owns a
+    database migrates it, so a database at an older schema version raises
+    SchemaVersionError instead of being upgraded underneath its owner.
+    """
+    uri = "file:" + pathname2url(os.path.abspath(path)) + "?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, timeout=BUSY_TIMEOUT, cached_statements=CACHED_STATEMENTS)
+    try:
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        has_versions = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'").fetchone()
+        version = get_schema_version(conn) if has_versions else 0
+        if version < SCHEMA_VERSION:
+            raise SchemaVersionError(f"{path} is at schema version {version}, expected {SCHEMA_VERSION}; "
+                                     f"open it with the current version of the app to upgrade it")
+    except Exception:
+        conn.close()
+        raise
     return conn
 
+
+def init_sqlite_db(db_file=DB_FILE):
+    conn = connect(db_file)
+    # WAL lets the version window read while the scheduler writes; the mode is stored in the file
+    conn.execute("PRAGMA journal_mode = WAL")
+    version = migrate(conn, DATABASES[db_file])
+    print(f"SQLite database {db_file} initialized (schema version {version}).")
+    return conn
+
+
+class ConnectionManager:
+    """
+    Opens each database once, migrating its schema on first use, and hands
+    the same connection to every caller on the GUI thread. Background threads
+    open their own connections with connect().
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.connections = {}
+
+    def connection(self, db_file=DB_FILE):
+        with self.lock:
+            conn = self.connections.get(db_file)
+            if conn is None:
+                conn = self.connections[db_file] = init_sqlite_db(db_file)
+            return conn
+
+    def open_all(self):
+        """Open and migrate every known database, e.g. at startup."""
+        for db_file in DATABASES:
+            self.connection(db_file)
+
+    def close(self):
+        with self.lock:
+            for conn in self.connections.values():
+                conn.close()
+            self.connections.clear()
+
+
+_manager = ConnectionManager()
+
+
+def get_connection_manager():
+    """Return the process-wide ConnectionManager."""
+    return _manager
@@ -0,0 +1,81 @@
+import hashlib
+import re
+import sqlite3
+import time
+
+import numpy as np
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    """Collapse whitespace so cosmetic edits do not miss the cache."""
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache keyed by a hash of the normalized text and the
+    model name, stored as float32 BLOBs in SQLite. The least recently used
+    entries are evicted once the cache holds more than `max_entries` vectors.
+
+    A cache instance must be used from the thread that created it.
+    """
+
+    def __init__(self, path, model_name, max_entries=50000):
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS embedding_cache (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_embedding_cache_last_used ON embedding_cache (last_used)")
+        self.conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, text):
+        return hashlib.sha256(f"{self.model_name}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys):
+        """Return {key: vector} for the keys that are cached, marking them as used."""
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        for start in range(0, len(unique_keys), 500):
+            chunk = unique_keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT key, vector FROM embedding_cache WHERE key IN ({placeholders})", chunk
+            ).fetchall()
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype="float32")
+
+        if found:
+            now = time.time()
+            self.conn.executemany("UPDATE embedding_cache SET last_used = ? WHERE key = ?",
+                                  [(now, key) for key in found])
+            self.conn.commit()
+        return found
+
+    def put_many(self, items):
+        """Store (key, vector) pairs and evict the least recently used overflow."""
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO embedding_cache (key, vector, last_used) VALUES (?, ?, ?)",
+            [(key, np.ascontiguousarray(vector, dtype="float32").tobytes(), now) for key, vector in items]
+        )
+        count = self.conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+        if count > self.max_entries:
+            self.conn.execute("""
+                DELETE FROM embedding_cache WHERE key IN (
+                    SELECT key FROM embedding_cache ORDER BY last_used LIMIT ?
+                )
+            """, (count - self.max_entries,))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
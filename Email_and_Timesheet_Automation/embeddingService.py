@@ -0,0 +1,139 @@
+import queue
+
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+
+from Email_and_Timesheet_Automation.dbConfig import EMBEDDING_CACHE_FILE, get_data_path
+from Email_and_Timesheet_Automation.embeddings import MODEL_NAME, encode, load_model
+
+# Workers stopped while still loading the model; referenced until they finish
+# so the QThread is not destroyed while it is running
+_detached_workers = set()
+
+
+class EmbeddingWorker(QThread):
+    """
+    Loads the SentenceTransformer model (and the heavy faiss / numpy imports)
+    off the GUI thread, then encodes queued jobs in FIFO order.
+    """
+    model_ready = pyqtSignal(int)  # Embedding dimension
+    model_failed = pyqtSignal(str)
+    encoded = pyqtSignal(object, object)  # (job key, float32 vectors)
+
+    def __init__(self, model_name, jobs, is_stale, parent=None):
+        super().__init__(parent)
+        self.model_name = model_name
+        self.jobs = jobs
+        self.is_stale = is_stale
+        self.model = None
+        self.cache = None
+
+    def run(self):
+        try:
+            import faiss  # noqa: F401  (warm the import for the GUI thread)
+            from Email_and_Timesheet_Automation.embeddingCache import EmbeddingCache
+
+            # The cache connection belongs to this thread
+            self.cache = EmbeddingCache(get_data_path(EMBEDDING_CACHE_FILE), self.model_name)
+            self.model = load_model(self.model_name)
+            # Read the dimension from the model config instead of encoding a dummy sentence
+            dimension = self.model.get_sentence_embedding_dimension()
+        except Exception as e:
+            print(f"Error loading embedding model: {e}")
+            self.model_failed.emit(str(e))
+            return
+
+        if self.isInterruptionRequested():  # The app closed while the model was loading
+            self.cache.close()
+            return
+        self.model_ready.emit(dimension)
+
+        while True:
+            job = self.jobs.get()
+            if job is None:  # Shutdown sentinel
+                break
+            key, texts = job
+            if self.is_stale(key):  # A newer search query superseded this one
+                continue
+            # Search queries are one-off; keep them out of the persistent cache
+            cache = None if key[0] == "query" else self.cache
+            try:
+                self.encoded.emit(key, encode(self.model, texts, cache=cache))
+            except Exception as e:
+                print(f"Error encoding {key}: {e}")
+
+        self.cache.close()
+
+
+class EmbeddingService(QObject):
+    """
+    Embedding layer used by TaskApp. Jobs submitted before the model has
+    finished loading are queued and encoded as soon as it is ready.
+    """
+    model_ready = pyqtSignal(int)
+    model_failed = pyqtSignal(str)
+    encoded = pyqtSignal(object, object)
+
+    def __init__(self, model_name=MODEL_NAME, parent=None):
+        super().__init__(parent)
+        self.model_name = model_name
+        self.dimension = None
+        self.jobs = queue.Queue()
+        self.worker = None
+        self.query_id = 0  # Id of the most recent search query
+
+    @property
+    def is_ready(self):
+        return self.dimension is not None
+
+    def start(self):
+        """Start loading the model on a worker thread."""
+        if self.worker is not None:
+            return
+        self.worker = EmbeddingWorker(self.model_name, self.jobs, self.is_stale)
+        self.worker.model_ready.connect(self._on_model_ready)
+        self.worker.model_failed.connect(self.model_failed)
+        self.worker.encoded.connect(self.encoded)
+        self.worker.start()
+
+    def submit(self, key, texts):
+        """Queue texts for encoding; `encoded(key, vectors)` is emitted when done."""
+        self.jobs.put((key, list(texts)))
+
+    def submit_query(self, text):
+        """
+        Queue a search query and return its id. Queries superseded by a newer
+        one before the worker reaches them are dropped without being encoded.
+        """
+        self.query_id += 1
+        self.submit(("query", self.query_id), [text])
+        return self.query_id
+
+    def is_stale(self, key):
+        return key[0] == "query" and key[1] != self.query_id
+
+    def stop(self):
+        """
+        Stop the worker thread, discarding jobs it has not started. If the
+        model is still loading the thread is left to exit on its own once the
+        load returns, instead of holding up shutdown.
+        """
+        if self.worker is None:
+            return
+        while True:
+            try:
+                self.jobs.get_nowait()
+            except queue.Empty:
+                break
+        self.jobs.put(None)
+        self.worker.requestInterruption()
+        if self.is_ready or self.worker.isFinished():
+            self.worker.wait()
+        else:
+            _detached_workers.add(self.worker)
+            self.worker.finished.connect(lambda worker=self.worker: _detached_workers.discard(worker))
+        self.worker = None
+
+    def _on_model_ready(self, dimension):
+        self.dimension = dimension
+        print(f"Embedding model '{self.model_name}' loaded (dimension {dimension}).")
+        self.model_ready.emit(dimension)
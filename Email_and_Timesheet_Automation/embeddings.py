@@ -0,0 +1,59 @@
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+
+def build_task_text(task_name, description, start_date, due_date):
+    """Text that is embedded for a task."""
+    return f"{task_name} {description} {start_date} {due_date}"
+
+
+def build_version_text(data):
+    """Text that is embedded for a task version dict."""
+    return build_task_text(data.get("task_name", ""), data.get("description", ""),
+                           data.get("start_date", ""), data.get("due_date", ""))
+
+
+def load_model(model_name=MODEL_NAME, threads=None):
+    """
+    Import sentence_transformers and load the model. The import is kept inside the
+    function because it pulls in torch, which takes seconds.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+
+    return SentenceTransformer(model_name)
+
+
+def encode(model, texts, batch_size=32, cache=None):
+    """
+    Encode texts into a float32 matrix with one row per text. When an
+    EmbeddingCache is given, only texts missing from it reach the model.
+    """
+    import numpy as np
+
+    texts = list(texts)
+    if cache is None:
+        vectors = model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+        return np.asarray(vectors, dtype="float32")
+
+    keys = [cache.key(text) for text in texts]
+    cached = cache.get_many(keys)
+
+    # Encode each distinct missing text once
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in cached and key not in missing:
+            missing[key] = text
+    cache.hits += len(texts) - len(missing)
+    cache.misses += len(missing)
+
+    if missing:
+        encoded = model.encode(list(missing.values()), batch_size=batch_size, convert_to_numpy=True)
+        encoded = np.asarray(encoded, dtype="float32")
+        new_items = list(zip(missing.keys(), encoded))
+        cache.put_many(new_items)
+        cached.update(new_items)
+
+    return np.vstack([cached[key] for key in keys])
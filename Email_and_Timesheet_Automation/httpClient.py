@@ -0,0 +1,99 @@
+import gzip
+import json
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+REQUEST_TIMEOUT = (5, 30)  # (connect, read) seconds
+
+
+def dumps_compact(data):
+    """Serialize to JSON without indentation or spaces after separators."""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+class HttpStats:
+    """Running totals of request latency and bytes, for comparing payload options."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.total_seconds = 0.0
+        self.payload_bytes = 0  # Body size before compression
+        self.sent_bytes = 0  # Body size on the wire
+
+    def record(self, seconds, payload_bytes, sent_bytes):
+        with self.lock:
+            self.requests += 1
+            self.total_seconds += seconds
+            self.payload_bytes += payload_bytes
+            self.sent_bytes += sent_bytes
+
+    def summary(self):
+        with self.lock:
+            if not self.requests:
+                return "No webhook requests sent."
+            return (f"{self.requests} request(s), avg {self.total_seconds / self.requests * 1000:.0f} ms, "
+                    f"{self.payload_bytes} payload bytes sent as {self.sent_bytes} bytes")
+
+
+class HttpClient:
+    """
+    Shared HTTP client for webhook calls: one pooled keep-alive session,
+    compact JSON bodies and optional gzip compression.
+    """
+
+    def __init__(self, gzip_bodies=False, gzip_min_bytes=1024, pool_size=4):
+        self.gzip_bodies = gzip_bodies
+        self.gzip_min_bytes = gzip_min_bytes
+        self.stats = HttpStats()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def post_json(self, url, payload, timeout=REQUEST_TIMEOUT):
+        """
+        POST a JSON payload (a str, or any object which is serialized compactly)
+        and return the HTTP status code.
+        """
+        if not isinstance(payload, str):
+            payload = dumps_compact(payload)
+        body = payload.encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        sent = body
+        if self.gzip_bodies and len(body) >= self.gzip_min_bytes:
+            sent = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+
+        start = time.perf_counter()
+        response = self.session.post(url, data=sent, headers=headers, timeout=timeout)
+        elapsed = time.perf_counter() - start
+
+        self.stats.record(elapsed, len(body), len(sent))
+        print(f"POST {response.status_code} in {elapsed * 1000:.0f} ms, {len(body)} bytes"
+              f"{f' (gzip {len(sent)} bytes)' if sent is not body else ''}; totals: {self.stats.summary()}")
+        return response.status_code
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client():
+    """Return the process-wide HttpClient."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
+
+
+def configure_http_client(gzip_bodies=False):
+    """Apply settings to the shared client without dropping its pooled connections."""
+    get_http_client().gzip_bodies = gzip_bodies
@@ -1,30 +1,12 @@
-import os
-import json
+import hashlib
+import html
+import threading
 
+from Email_and_Timesheet_Automation.settingsStore import get_settings_store
 
-def generate_signature():
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    config_path = os.path.join(script_dir, "../settings.json")
-
-    try:
-        # Open and read the JSON file
-        with open(config_path, "r") as config_file:
-            config = json.load(config_file)
-
-        role = config.get("role", "")
-        first_line_role = role.splitlines()[0]
-        last_line_role = role.splitlines()[len(role.splitlines()) - 1]
-        name = config.get("name", "")
-        mobile_no = config.get("mobile_no", "")
-        email = config.get("email", "")
-
-    except FileNotFoundError:
-        print("Error: settings.json file not found.")
-
-
-
-    html_content = f"""
-    <table id="logo" style="text-align: left; background-color: white; width: 506.7pt; color: rgb(66, 66, 66); box-sizing: border-box; border-collapse: collapse; border-spacing: 0px;">
+# Signature table shared by the daily report and MOM emails
+SIGNATURE_TEMPLATE = """\
+<table id="logo" style="text-align: left; background-color: white; width: 506.7pt; color: rgb(66, 66, 66); box-sizing: border-box; border-collapse: collapse; border-spacing: 0px;">
 <tbody>
 <tr>
 <td style="text-align: left; padding-right: 10.5pt; padding-left: 0.75pt; vertical-align: top; width: 129.75pt; height: 91.75pt;">
@@ -69,8 +51,54 @@ style="text-align: left; margin-top: 0px; margin-bottom: 0px;"><span style="font
 </tr>
 </tbody>
 </table>
-
 """
 
-    return html_content
+_cache = {}  # Profile hash -> rendered signature
+_cache_lock = threading.Lock()
+_subscribed = False
+
+
+def profile_hash(name, role, mobile_no, email):
+    return hashlib.sha256("\0".join((name, role, mobile_no, email)).encode("utf-8")).hexdigest()
+
+
+def clear_signature_cache(path=None):
+    """Drop rendered signatures; subscribed to settings changes."""
+    with _cache_lock:
+        _cache.clear()
+
+
+def _render(name, role, mobile_no, email):
+    # The first and last lines of the role go on separate lines; an empty role renders as blank lines
+    role_lines = role.splitlines() or [""]
+    return SIGNATURE_TEMPLATE.format(
+        name=html.escape(name),
+        first_line_role=html.escape(role_lines[0]),
+        last_line_role=html.escape(role_lines[-1]),
+        mobile_no=html.escape(mobile_no),
+        email=html.escape(email),
+    )
+
 
+def generate_signature(settings=None):
+    """
+    Return the signature HTML for the profile in `settings` (the current
+    settings snapshot by default), rendering it only once per profile.
+    """
+    global _subscribed
+    config = settings
+    if config is None:
+        store = get_settings_store()
+        if not _subscribed:
+            store.subscribe(clear_signature_cache)
+            _subscribed = True
+        config = store.settings
+    fields = (config.name or "", config.role or "", config.mobile_no or "", config.email or "")
+    key = profile_hash(*fields)
+    with _cache_lock:
+        signature = _cache.get(key)
+    if signature is None:
+        signature = _render(*fields)
+        with _cache_lock:
+            _cache[key] = signature
+    return signature
@@ -1,8 +1,9 @@
-import json
 import os
 
 from PyQt5.QtWidgets import QDialog, QVBoxLayout, QTextEdit, QLineEdit, QPushButton, QMessageBox, QLabel
 
+from Email_and_Timesheet_Automation.settingsStore import get_settings_store
+
 
 class MomSettingsWindow(QDialog):
     """A simple settings window for managing email groups and webhook URL."""
@@ -82,9 +83,8 @@ class MomSettingsWindow(QDialog):
                 # "internal_webhook_url":internal_webhook_url
             }
 
-            # Save to the JSON file
-            with open("mom_settings.json", "w") as file:
-                json.dump(mom_settings, file, indent=4)
+            # Save through the settings store, which notifies the main window
+            get_settings_store().save_mom_settings(mom_settings)
 
             QMessageBox.information(self, "Success", "Settings saved successfully!")
 
@@ -97,14 +97,14 @@ class MomSettingsWindow(QDialog):
         """Load existing settings from the JSON file."""
         try:
             # Check if the settings file exists
-            if os.path.exists("mom_settings.json"):
-                with open("mom_settings.json", "r") as file:
-                    mom_settings = json.load(file)
+            store = get_settings_store()
+            if os.path.exists(store.mom_settings_file):
+                mom_settings = store.mom_settings
 
                 # Retrieve email groups, CC groups, and webhook URL
-                email_groups = mom_settings.get("email_groups", {})
-                cc_groups = mom_settings.get("cc_groups", {})
-                webhook_url = mom_settings.get("webhook_url", "")
+                email_groups = mom_settings.email_groups
+                cc_groups = mom_settings.cc_groups
+                webhook_url = mom_settings.webhook_url
                 # internal_webhook_url = mom_settings.get("internal_webhook_url","")
 
                 # Populate email groups editor
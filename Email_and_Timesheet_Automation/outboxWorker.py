@@ -0,0 +1,54 @@
+import threading
+import time
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from Email_and_Timesheet_Automation.dbConfig import DB_FILE, connect
+from Email_and_Timesheet_Automation.webhookOutbox import WebhookOutbox, deliver_due
+
+
+class OutboxWorker(QThread):
+    """
+    Delivers queued webhook payloads in the background and reports each
+    attempt through `status_changed(outbox_id, kind, status, message)`.
+    """
+    status_changed = pyqtSignal(int, str, str, str)
+
+    def __init__(self, db_file=DB_FILE, parent=None):
+        super().__init__(parent)
+        self.db_file = db_file
+        self.wake_event = threading.Event()
+        self.stopping = False
+
+    def run(self):
+        # SQLite connections cannot be shared across threads, so the worker owns its own
+        conn = connect(self.db_file)
+        outbox = WebhookOutbox(conn)
+        failures = 0
+        try:
+            while not self.stopping:
+                try:
+                    deliver_due(outbox, on_status=self.status_changed.emit)
+                    next_due = outbox.next_due_at()
+                    timeout = 60 if next_due is None else min(60, max(0.0, next_due - time.time()))
+                    failures = 0
+                except Exception as e:
+                    # E.g. "database is locked": keep the worker alive and retry the pass later
+                    if conn.in_transaction:
+                        conn.rollback()
+                    failures += 1
+                    timeout = min(60, 2 ** failures)
+                    print(f"Outbox delivery pass failed, retrying in {timeout} s: {e}")
+                self.wake_event.wait(timeout)
+                self.wake_event.clear()
+        finally:
+            conn.close()
+
+    def wake(self):
+        """Deliver newly queued payloads now instead of at the next poll."""
+        self.wake_event.set()
+
+    def stop(self):
+        self.stopping = True
+        self.wake_event.set()
+        self.wait()
@@ -0,0 +1,153 @@
+"""
+When to send the daily report, and sending it exactly once per day.
+
+The report fires at `schedule_time` on the `schedule_days` weekdays, except
+on `holidays`. Each report day is claimed in the `scheduler_runs` table before
+it is queued, so the GUI timer and the headless daemon (scheduler.py) can both
+run without sending a day twice. Runs missed while neither was running, or
+while the machine slept, are sent late for up to `catch_up_days` days.
+"""
+import os
+import time
+from datetime import date, datetime, timedelta
+
+from Email_and_Timesheet_Automation.reportService import queue_daily_report
+from Email_and_Timesheet_Automation.webhookOutbox import WebhookOutbox, deliver_due
+
+MAX_SLEEP = 60  # Seconds; the loop also re-checks the wall clock after a suspend
+
+
+def schedule_time(settings):
+    """Return the configured send time, falling back to 09:00 if it cannot be parsed."""
+    try:
+        return datetime.strptime(settings.schedule_time, "%H:%M").time()
+    except (TypeError, ValueError):
+        print(f"Invalid schedule_time {settings.schedule_time!r}, using 09:00.")
+        return datetime.strptime("09:00", "%H:%M").time()
+
+
+def is_report_day(day, settings):
+    return day.weekday() in settings.schedule_days and day.isoformat() not in settings.holidays
+
+
+def fire_times(first_day, last_day, settings):
+    """Yield the fire datetimes of the report days from `first_day` through `last_day`."""
+    at = schedule_time(settings)
+    day = first_day
+    while day <= last_day:
+        if is_report_day(day, settings):
+            yield datetime.combine(day, at)
+        day += timedelta(days=1)
+
+
+def next_fire_time(after, settings):
+    """Return the first fire datetime strictly after `after`, or None if no weekday is scheduled."""
+    if not settings.schedule_days:
+        return None
+    # Holidays can only push the next run back by as many days as there are holidays
+    horizon = after.date() + timedelta(days=7 + len(settings.holidays))
+    for fire_time in fire_times(after.date(), horizon, settings):
+        if fire_time > after:
+            return fire_time
+    return None
+
+
+def last_run_date(conn):
+    row = conn.execute("SELECT MAX(run_date) FROM scheduler_runs").fetchone()
+    return date.fromisoformat(row[0]) if row[0] else None
+
+
+def due_fire_times(conn, now, settings):
+    """
+    Return the fire datetimes up to `now` that have not been claimed yet: every
+    report day after the last claimed one, at most `catch_up_days` back. On a
+    database that has never sent a report, only today's run can be due.
+    """
+    last = last_run_date(conn)
+    first_day = now.date() - timedelta(days=max(0, settings.catch_up_days))
+    if last is None:
+        first_day = now.date()
+    else:
+        first_day = max(first_day, last + timedelta(days=1))
+    return [fire_time for fire_time in fire_times(first_day, now.date(), settings) if fire_time <= now]
+
+
+def claim_and_queue(conn, fire_time, settings, claimed_by, mom_completed="", todays_target="", store=None):
+    """
+    Claim the report day of `fire_time` in `conn` and queue its report, read
+    from `store` if given (see queue_daily_report). Returns the outbox id, or
+    None if another scheduler claimed the day first or no webhook URL is
+    configured. The claim and the outbox row commit together, so a crash in
+    between leaves the day unclaimed.
+    """
+    run_date = fire_time.date().isoformat()
+    cursor = conn.execute("""
+        INSERT OR IGNORE INTO scheduler_runs (run_date, fire_time, claimed_by, claimed_at, status)
+        VALUES (?, ?, ?, ?, 'claimed')
+    """, (run_date, fire_time.strftime("%Y-%m-%d %H:%M:%S"), claimed_by,
+          datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+    if cursor.rowcount == 0:
+        conn.rollback()
+        return None
+    try:
+        outbox_id = queue_daily_report(conn, fire_time.date(), settings, mom_completed, todays_target, store)
+    except Exception:
+        conn.rollback()
+        raise
+    conn.execute("UPDATE scheduler_runs SET status = ?, outbox_id = ? WHERE run_date = ?",
+                 ("queued" if outbox_id is not None else "skipped", outbox_id, run_date))
+    conn.commit()
+    print(f"Daily report for {run_date} {'queued as outbox ' + str(outbox_id) if outbox_id else 'skipped'}"
+          f" by {claimed_by}.")
+    return outbox_id
+
+
+def run_due(conn, settings, claimed_by, now=None, mom_completed="", todays_target="", store=None):
+    """Queue the report of every due, unclaimed report day and return their outbox ids."""
+    now = now or datetime.now()
+    outbox_ids = []
+    for fire_time in due_fire_times(conn, now, settings):
+        outbox_id = claim_and_queue(conn, fire_time, settings, claimed_by, mom_completed, todays_target, store)
+        if outbox_id is not None:
+            outbox_ids.append(outbox_id)
+    return outbox_ids
+
+
+class ReportScheduler:
+    """
+    Headless loop: queues due reports and delivers the webhook outbox. It sleeps
+    until the next fire time or outbox retry, at most MAX_SLEEP seconds at a
+    time, so runs missed during a suspend are noticed shortly after resume.
+    """
+
+    def __init__(self, conn, settings_store, claimed_by=None, store=None):
+        self.conn = conn
+        self.settings_store = settings_store
+        self.store = store  # Where report tasks are read (see taskStore); claims and the outbox stay in conn
+        self.claimed_by = claimed_by or f"daemon:{os.getpid()}"
+        self.outbox = WebhookOutbox(conn)
+
+    def run_once(self, now=None):
+        # No file watcher without Qt: pick up edits to settings.json on every pass
+        self.settings_store.reload(self.settings_store.settings_file)
+        run_due(self.conn, self.settings_store.settings, self.claimed_by, now, store=self.store)
+        deliver_due(self.outbox)
+
+    def seconds_until_next(self, now=None):
+        now = now or datetime.now()
+        wake_times = [MAX_SLEEP]
+        fire_time = next_fire_time(now, self.settings_store.settings)
+        if fire_time is not None:
+            wake_times.append((fire_time - now).total_seconds())
+        next_due = self.outbox.next_due_at()
+        if next_due is not None:
+            wake_times.append(next_due - time.time())
+        return max(0.0, min(wake_times))
+
+    def run_forever(self, stop_event):
+        while not stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Scheduler pass failed: {e}")
+            stop_event.wait(self.seconds_until_next())
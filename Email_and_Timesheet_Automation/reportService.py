@@ -0,0 +1,119 @@
+"""
+Build the daily report straight from tasks.db, without the GUI.
+
+The tasks of a day are the tasks with at least one version saved that day,
+each as of its last version of that day, in the order they were first saved.
+Both the "Automate" button and the scheduled send use this, so a report
+covers the whole day even if the app was restarted in between.
+"""
+from datetime import date, datetime
+
+from Email_and_Timesheet_Automation.dbConfig import day_bounds
+from Email_and_Timesheet_Automation.htmlGenerator import HtmlGenerator
+from Email_and_Timesheet_Automation.httpClient import dumps_compact
+from Email_and_Timesheet_Automation.settingsStore import get_settings_store
+from Email_and_Timesheet_Automation.taskVersions import TASK_COLUMNS, TASK_FIELDS, VersionStore
+from Email_and_Timesheet_Automation.webhookOutbox import WebhookOutbox
+
+# One row per task saved in [start, end): its last version of the range
+# (ranked by date, then version_id, as saves within one second share a date),
+# whether that is also its newest version (nothing saved from `end` on, so the
+# tasks row already holds its fields), and when it was first saved in the
+# range. The range is read through idx_task_versions_date and the per-task
+# subquery through idx_task_versions_task_date.
+DAILY_REPORT_QUERY = f"""
+    WITH ranked AS (
+        SELECT task_id, version_id, version_date,
+               ROW_NUMBER() OVER (PARTITION BY task_id ORDER BY version_date DESC, version_id DESC) AS rank,
+               MIN(version_date) OVER (PARTITION BY task_id) AS first_saved
+        FROM task_versions
+        WHERE version_date >= ? AND version_date < ?
+    )
+    SELECT r.version_id, r.version_date,
+           NOT EXISTS (
+               SELECT 1 FROM task_versions n WHERE n.task_id = r.task_id AND n.version_date >= ?
+           ) AS is_newest,
+           r.first_saved,
+           {", ".join("t." + field for field in TASK_FIELDS)}
+    FROM ranked r JOIN tasks t ON t.id = r.task_id
+    WHERE r.rank = 1
+    ORDER BY r.first_saved, r.task_id
+"""
+
+
+class TaskCollection:
+    """The tasks of one report day, in the shape HtmlGenerator expects."""
+
+    def __init__(self, day, tasks):
+        self.date = datetime.combine(day, datetime.min.time())
+        self.tasks = tasks
+
+    def to_dict(self):
+        return {"Tasks": self.tasks}
+
+
+def _as_date(day):
+    if day is None:
+        return date.today()
+    if isinstance(day, str):
+        return datetime.strptime(day, "%Y-%m-%d").date()
+    if isinstance(day, datetime):
+        return day.date()
+    return day
+
+
+def report_tasks(conn, day=None, versions=None):
+    """
+    Return the tasks of `day` (default today) as dicts of TASK_FIELDS.
+    Tasks edited again after that day are rebuilt from their version history.
+    """
+    start, end = day_bounds(_as_date(day))
+    versions = versions or VersionStore(conn)
+    tasks = []
+    for version_id, _, is_newest, _, *fields in conn.execute(DAILY_REPORT_QUERY, (start, end, end)):
+        tasks.append(dict(zip(TASK_FIELDS, fields)) if is_newest else versions.get(version_id))
+    return tasks
+
+
+def render_daily_report(tasks, day=None, settings=None, mom_completed="", todays_target=""):
+    """Return (html, payload) of the daily report for `tasks` (dicts of TASK_FIELDS) of `day`."""
+    day = _as_date(day)
+    settings = settings or get_settings_store().settings
+
+    # Header-keyed string values, as the report webhook has always received them
+    tasks_data = [{header: "" if task.get(field) is None else str(task.get(field)) for field, header in TASK_COLUMNS}
+                  for task in tasks]
+    tasks_list = [{"Task Name": task["Task Name"], "Task Keyword": task["Description"],
+                   "Time Spent (hrs)": task["Time Spent (hrs)"]} for task in tasks_data]
+    html_content = HtmlGenerator.generate_task_table(TaskCollection(day, tasks_list), settings)
+
+    payload = {
+        "htmlContent": html_content,
+        "tasks": tasks_data,
+        "to_user": settings.to_user,
+        "cc_user": settings.cc_user,
+        "mom_completed": mom_completed,
+        "todays_target": todays_target
+    }
+    return html_content, payload
+
+
+def build_daily_report(conn, day=None, settings=None, mom_completed="", todays_target=""):
+    """Return (html, payload) of the daily report for `day` (default today)."""
+    return render_daily_report(report_tasks(conn, day), day, settings, mom_completed, todays_target)
+
+
+def queue_daily_report(conn, day=None, settings=None, mom_completed="", todays_target="", store=None):
+    """
+    Build the daily report and queue it in the webhook outbox of `conn`. The
+    tasks are read from `store` (a taskStore store) if given, else from `conn`.
+    Returns the outbox id, or None if no webhook URL is configured.
+    """
+    settings = settings or get_settings_store().settings
+    if not settings.webhook_url:
+        print("Webhook URL is not configured; daily report not queued.")
+        return None
+    tasks = store.report_tasks(_as_date(day)) if store is not None else report_tasks(conn, day)
+    _, payload = render_daily_report(tasks, day, settings, mom_completed, todays_target)
+    # Compact JSON: the HTML dominates the payload, indentation only adds bytes
+    return WebhookOutbox(conn).enqueue("daily_report", settings.webhook_url, dumps_compact(payload))
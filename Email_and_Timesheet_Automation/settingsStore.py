@@ -0,0 +1,174 @@
+import json
+import os
+import threading
+from dataclasses import dataclass, field, fields
+from types import MappingProxyType
+
+# Both settings files sit in the project root, next to main.py
+SETTINGS_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+SETTINGS_FILE = os.path.join(SETTINGS_DIR, "settings.json")
+MOM_SETTINGS_FILE = os.path.join(SETTINGS_DIR, "mom_settings.json")
+
+
+def _freeze(value):
+    """Return a read-only copy of parsed JSON (dicts become mappings, lists become tuples)."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value):
+    """Inverse of _freeze, for writing a snapshot back to JSON."""
+    if isinstance(value, MappingProxyType):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+class _Snapshot:
+    """Shared from_dict / to_dict for the frozen settings dataclasses."""
+
+    @classmethod
+    def from_dict(cls, data):
+        known = {f.name for f in fields(cls)} - {"extra"}
+        values = {key: _freeze(value) for key, value in data.items() if key in known}
+        extra = {key: value for key, value in data.items() if key not in known}
+        return cls(**values, extra=_freeze(extra))
+
+    def to_dict(self):
+        """Return a plain, mutable dict of every key, including ones this class does not model."""
+        data = _thaw(self.extra)
+        for f in fields(self):
+            if f.name != "extra":
+                data[f.name] = _thaw(getattr(self, f.name))
+        return data
+
+
+@dataclass(frozen=True)
+class AppSettings(_Snapshot):
+    """Snapshot of settings.json."""
+    functional_areas: tuple = ("Development", "Testing", "Design")
+    assignments: tuple = ("Research", "Task", "Training", "Development")
+    task_types: tuple = ("Bug Fix", "Feature", "Research")
+    schedule_time: str = "09:00"
+    schedule_days: tuple = (0, 1, 2, 3, 4)  # Weekdays the report is sent on, Monday = 0
+    holidays: tuple = ()  # "yyyy-MM-dd" dates on which no report is sent
+    catch_up_days: int = 7  # How many calendar days back missed reports are still sent
+    webhook_url: str = ""
+    webhook_gzip: bool = False
+    to_user: tuple = ()
+    cc_user: tuple = ()
+    role: str = ""
+    name: str = ""
+    mobile_no: str = ""
+    email: str = ""
+    timesheet_link: str = ""
+    server_url: str = ""  # Task server (python main.py serve) to use instead of the local tasks.db
+    server_user: str = ""  # User name on the task server; defaults to the login name
+    server_token: str = ""
+    offline_sync: bool = False  # Keep tasks in tasks.db and exchange changes with the server on Sync
+    vector_index: object = None  # Mapping of VectorStore index options, see vectorStore.DEFAULT_INDEX_CONFIG
+    extra: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))  # Keys not modelled above
+
+
+@dataclass(frozen=True)
+class MomSettings(_Snapshot):
+    """Snapshot of mom_settings.json."""
+    email_groups: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))  # Group -> emails
+    cc_groups: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    webhook_url: str = ""
+    extra: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+
+
+class SettingsStore:
+    """
+    Loads settings.json and mom_settings.json once and serves immutable
+    snapshots. Files are re-read only by reload() (called by the file watcher)
+    or rewritten by save_*(); subscribers are called with the path that changed.
+    """
+
+    def __init__(self, settings_file=SETTINGS_FILE, mom_settings_file=MOM_SETTINGS_FILE):
+        self.lock = threading.Lock()
+        self.files = {settings_file: AppSettings, mom_settings_file: MomSettings}
+        self.settings_file = settings_file
+        self.mom_settings_file = mom_settings_file
+        self.snapshots = {path: self._read(path, snapshot_type) for path, snapshot_type in self.files.items()}
+        self.subscribers = []
+
+    @staticmethod
+    def _read(path, snapshot_type):
+        try:
+            with open(path, "r") as file:
+                return snapshot_type.from_dict(json.load(file))
+        except FileNotFoundError:
+            print(f"{os.path.basename(path)} not found, using defaults.")
+        except (ValueError, TypeError) as e:
+            print(f"Error reading {os.path.basename(path)}, using defaults: {e}")
+        return snapshot_type()
+
+    @property
+    def settings(self):
+        return self.snapshots[self.settings_file]
+
+    @property
+    def mom_settings(self):
+        return self.snapshots[self.mom_settings_file]
+
+    def subscribe(self, callback):
+        """Call `callback(path)` whenever a settings file is reloaded or saved."""
+        self.subscribers.append(callback)
+
+    def reload(self, path):
+        """Re-read one settings file and notify subscribers if its contents changed."""
+        path = os.path.abspath(path)
+        if path not in self.files:
+            return False
+        snapshot = self._read(path, self.files[path])
+        with self.lock:
+            if snapshot == self.snapshots[path]:
+                return False  # e.g. a save we already applied, or a touch
+            self.snapshots[path] = snapshot
+        self._notify(path)
+        return True
+
+    def save_settings(self, data):
+        self._write(self.settings_file, data)
+
+    def save_mom_settings(self, data):
+        self._write(self.mom_settings_file, data)
+
+    def _write(self, path, data):
+        snapshot = self.files[path].from_dict(data)
+        # Write to a temporary file and swap it in, so a watcher never sees half a file
+        temp_path = path + ".tmp"
+        with open(temp_path, "w") as file:
+            json.dump(snapshot.to_dict(), file, indent=4)
+        os.replace(temp_path, path)
+        with self.lock:
+            self.snapshots[path] = snapshot
+        self._notify(path)
+
+    def _notify(self, path):
+        for callback in list(self.subscribers):
+            callback(path)
+
+
+def load_app_settings(path):
+    """Read a settings.json-style file (e.g. another user's) into an AppSettings snapshot."""
+    return SettingsStore._read(path, AppSettings)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_settings_store():
+    """Return the process-wide SettingsStore."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SettingsStore()
+        return _store
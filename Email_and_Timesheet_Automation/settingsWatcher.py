@@ -0,0 +1,56 @@
+import os
+
+from PyQt5.QtCore import QFileSystemWatcher, QObject, pyqtSignal
+
+from Email_and_Timesheet_Automation.settingsStore import get_settings_store
+
+
+class SettingsWatcher(QObject):
+    """
+    Reloads the shared SettingsStore when a settings file changes on disk and
+    emits `settings_changed(path)` after every reload or save.
+    """
+    settings_changed = pyqtSignal(str)
+
+    def __init__(self, store=None, parent=None):
+        super().__init__(parent)
+        self.store = store or get_settings_store()
+        self.paths = list(self.store.files)
+        self.mtimes = {path: self._mtime(path) for path in self.paths}
+        self.watcher = QFileSystemWatcher(self)
+        # Watch the directories too: saving by replace (as editors and the store do)
+        # drops the file watch, and a missing file only shows up as a directory change
+        self.watcher.addPaths(sorted({os.path.dirname(path) for path in self.paths}))
+        self._watch_files()
+        self.watcher.fileChanged.connect(self._on_changed)
+        self.watcher.directoryChanged.connect(self._on_directory_changed)
+        self.store.subscribe(self.settings_changed.emit)
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _watch_files(self):
+        unwatched = [path for path in self.paths if os.path.exists(path) and path not in self.watcher.files()]
+        if unwatched:
+            self.watcher.addPaths(unwatched)
+
+    def _reload_if_modified(self, path):
+        mtime = self._mtime(path)
+        if mtime != self.mtimes[path]:
+            self.mtimes[path] = mtime
+            self.store.reload(path)
+
+    def _on_changed(self, path):
+        self._watch_files()
+        self._reload_if_modified(path)
+
+    def _on_directory_changed(self, directory):
+        # The project root also holds the databases, so most of these events are not ours
+        self._watch_files()
+        for path in self.paths:
+            if os.path.dirname(path) == directory:
+                self._reload_if_modified(path)
@@ -0,0 +1,582 @@
+"""
+Shared task server: a small JSON HTTP API over the same schema as tasks.db,
+for teams that want one place to keep (and query) everyone's tasks.
+
+    python main.py serve --data-dir /srv/timesheets --port 8750 --tokens tokens.json --admin-token SECRET
+
+Each user has their own database, <data-dir>/users/<user>/tasks.db, so users
+never wait on each other's writes. Each database is served from a small pool
+of connections in WAL mode: reads run concurrently, and writes to the same
+database take the write lock up front and queue on the busy timeout. List
+endpoints are keyset-paginated. Point TaskApp at the server with the
+server_url and server_user settings; with offline_sync, TaskApp syncs its
+local tasks.db through the /changes endpoints instead (see taskSync).
+
+tokens.json maps each user name to that user's token, which only opens the
+/api/users/<user>/ endpoints of that user. The admin token opens every
+endpoint, and is the only one accepted by /api/users and /api/timesheets.
+
+Endpoints (all JSON, gzip accepted both ways; `limit` is capped at MAX_PAGE):
+
+    GET    /api/users?after=&limit=                         user names
+    GET    /api/timesheets?date=&after=&limit=              each user's report tasks for a day
+    GET    /api/users/<user>/tasks?before=&limit=           task rows, newest first
+    GET    /api/users/<user>/tasks?ids=1,2,3                task rows by id
+    GET    /api/users/<user>/tasks/ids
+    POST   /api/users/<user>/tasks                          {"task": {...}, "version_date": null}
+    PUT    /api/users/<user>/tasks/<id>                     {"task": {...}, "version_date": null}
+    DELETE /api/users/<user>/tasks/<id>
+    GET    /api/users/<user>/tasks/latest?ids=1,2,3          latest version date and data of several tasks
+    GET    /api/users/<user>/tasks/<id>/latest
+    GET    /api/users/<user>/tasks/<id>/versions
+    GET    /api/users/<user>/days/<yyyy-MM-dd>/tasks
+    GET    /api/users/<user>/days/<yyyy-MM-dd>/previous
+    GET    /api/users/<user>/days/<yyyy-MM-dd>/report
+    GET    /api/users/<user>/versions?start=&end=&after_date=&after_id=&limit=
+    GET    /api/users/<user>/versions/<version_id>
+    GET    /api/users/<user>/timesheet?start=&end=              hours per day, task, area and assignment
+    GET    /api/users/<user>/changes?after=&exclude=&limit=   change log batch after a sequence number
+    POST   /api/users/<user>/changes?origin=                 {"changes": [...]} from a sync client
+"""
+import argparse
+import gzip
+import hmac
+import json
+import os
+import queue
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from Email_and_Timesheet_Automation.dbConfig import DB_FILE, connect, migrate
+from Email_and_Timesheet_Automation.httpClient import dumps_compact
+from Email_and_Timesheet_Automation.taskStore import LocalTaskStore
+from Email_and_Timesheet_Automation.taskVersions import TASK_FIELDS
+
+DEFAULT_PORT = 8750
+POOL_SIZE = 4  # Connections per user database
+POOL_TIMEOUT = 30  # Seconds to wait for a free connection
+MAX_OPEN_DATABASES = 64  # User databases with an open pool; the least recently used one is closed beyond this
+MAX_PAGE = 1000
+MAX_BODY = 1024 * 1024
+MAX_TIMESHEET_DAYS = 366  # A timesheet response holds the whole range, so it is bounded
+MAX_JSON = 16 * MAX_BODY  # Limit of a gzip request body once decompressed
+GZIP_MIN_BYTES = 1024  # Responses from this size on are compressed for clients that accept gzip
+USER_NAME = re.compile(r"^[A-Za-z0-9_][A-Za-z0-9_.@-]{0,63}$")
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ConnectionPool:
+    """
+    Up to `size` LocalTaskStores over one database file, shared by the request
+    threads. Connections are opened on demand and reused most-recently-idle
+    first, so their page caches and version caches stay warm.
+    """
+
+    def __init__(self, path, size=POOL_SIZE):
+        self.path = path
+        self.size = size
+        self.idle = queue.LifoQueue()
+        self.opened = 0
+        self.closed = False
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def store(self):
+        store = self._acquire()
+        try:
+            yield store
+        finally:
+            if store.conn.in_transaction:
+                store.conn.rollback()
+            self._release(store)
+
+    def _release(self, store):
+        with self.lock:
+            if not self.closed:
+                self.idle.put(store)
+                return
+        store.conn.close()  # The pool was closed while this connection was in use
+
+    def _acquire(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self.lock:
+            if self.opened < self.size:
+                self.opened += 1
+                return LocalTaskStore(connect(self.path, check_same_thread=False))
+        try:
+            return self.idle.get(timeout=POOL_TIMEOUT)
+        except queue.Empty:
+            raise HttpError(503, "All database connections are busy")
+
+    def close(self):
+        """Close the idle connections; connections in use are closed when they are released."""
+        with self.lock:
+            self.closed = True
+        while True:
+            try:
+                self.idle.get_nowait().conn.close()
+            except queue.Empty:
+                break
+
+
+class UserDatabases:
+    """
+    One ConnectionPool per user database under <data_dir>/users; databases are
+    created on first write. At most `max_open` pools are kept, closing the least
+    recently used one, so the open files do not grow with the number of users.
+    """
+
+    def __init__(self, data_dir, pool_size=POOL_SIZE, max_open=MAX_OPEN_DATABASES):
+        self.users_dir = os.path.join(os.path.abspath(data_dir), "users")
+        self.pool_size = pool_size
+        self.max_open = max_open
+        self.pools = OrderedDict()  # user -> ConnectionPool, least recently used first
+        self.lock = threading.Lock()
+        os.makedirs(self.users_dir, exist_ok=True)
+
+    def _path(self, user):
+        if not USER_NAME.match(user):
+            raise HttpError(400, f"Invalid user name: {user!r}")
+        return os.path.join(self.users_dir, user, DB_FILE)
+
+    def pool(self, user, create=False):
+        """Return the pool of `user`, or None if the user has no database and `create` is not set."""
+        path = self._path(user)
+        with self.lock:
+            pool = self.pools.get(user)
+            if pool is not None:
+                self.pools.move_to_end(user)
+                return pool
+            if not os.path.exists(path):
+                if not create:
+                    return None
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            conn = connect(path)
+            try:
+                conn.execute("PRAGMA journal_mode = WAL")
+                migrate(conn)
+            finally:
+                conn.close()
+            pool = self.pools[user] = ConnectionPool(path, self.pool_size)
+            while len(self.pools) > self.max_open:
+                self.pools.popitem(last=False)[1].close()
+            return pool
+
+    def users(self, after="", limit=100):
+        names = sorted(name for name in os.listdir(self.users_dir)
+                       if name > after and USER_NAME.match(name)
+                       and os.path.exists(os.path.join(self.users_dir, name, DB_FILE)))
+        return names[:limit]
+
+    def close(self):
+        with self.lock:
+            for pool in self.pools.values():
+                pool.close()
+            self.pools.clear()
+
+
+def load_user_tokens(path):
+    """Read a JSON object mapping each user name to that user's token."""
+    with open(path, "r") as file:
+        tokens = json.load(file)
+    if not isinstance(tokens, dict):
+        raise ValueError(f"{path}: expected a JSON object of user name -> token")
+    for user, token in tokens.items():
+        if not USER_NAME.match(user):
+            raise ValueError(f"{path}: invalid user name {user!r}")
+        if not isinstance(token, str) or not token:
+            raise ValueError(f"{path}: the token of {user!r} must be a non-empty string")
+    return tokens
+
+
+class TokenAuth:
+    """
+    Bearer token check. A user token only opens that user's /api/users/<user>/
+    paths; the admin token opens every path. With no tokens configured every
+    request is allowed.
+    """
+    USER_PATH = re.compile(r"^/api/users/([^/]+)/")
+
+    def __init__(self, user_tokens=None, admin_token=""):
+        self.user_tokens = dict(user_tokens or {})
+        self.admin_token = admin_token
+
+    @property
+    def enabled(self):
+        return bool(self.user_tokens or self.admin_token)
+
+    def check(self, authorization, path):
+        """Raise HttpError unless the Authorization header grants access to `path`."""
+        if not self.enabled:
+            return
+        presented = authorization[len("Bearer "):] if authorization.startswith("Bearer ") else ""
+        if not presented:
+            raise HttpError(401, "Missing token")
+        if _same_token(presented, self.admin_token):
+            return
+        match = self.USER_PATH.match(path + "/")
+        if match and _same_token(presented, self.user_tokens.get(unquote(match.group(1)), "")):
+            return
+        raise HttpError(403, "This token does not grant access to " + ("this user" if match else "this endpoint"))
+
+
+def _same_token(presented, expected):
+    return bool(expected) and hmac.compare_digest(presented.encode("utf-8"), expected.encode("utf-8"))
+
+
+def _int(params, name, default=None):
+    value = params.get(name, [None])[0]
+    if value in (None, ""):
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise HttpError(400, f"{name} must be an integer")
+    if number < 0:
+        raise HttpError(400, f"{name} must not be negative")
+    return number
+
+
+def _limit(params, default):
+    """Page size from the `limit` parameter, between 1 and MAX_PAGE."""
+    return max(1, min(_int(params, "limit", default), MAX_PAGE))
+
+
+def _str(params, name, default=""):
+    return params.get(name, [default])[0]
+
+
+def _ids(params):
+    try:
+        task_ids = [int(task_id) for task_id in _str(params, "ids").split(",") if task_id]
+    except ValueError:
+        raise HttpError(400, "ids must be comma-separated integers")
+    if len(task_ids) > MAX_PAGE:
+        raise HttpError(400, f"At most {MAX_PAGE} ids per request")
+    return task_ids
+
+
+def _day(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise HttpError(400, f"Invalid date {value!r}, expected yyyy-MM-dd")
+
+
+def _task_body(body):
+    task = body.get("task") if isinstance(body, dict) else None
+    if not isinstance(task, dict) or not task.get("task_name"):
+        raise HttpError(400, "Expected {\"task\": {...}} with a task_name")
+    version_date = body.get("version_date")
+    if version_date is not None and not isinstance(version_date, str):
+        raise HttpError(400, "version_date must be a string")
+    return {field: task.get(field) for field in TASK_FIELDS}, version_date
+
+
+class TaskApi:
+    """Route table of the API; each handler returns (status, JSON-serializable body)."""
+
+    def __init__(self, databases):
+        self.databases = databases
+        self.routes = [
+            ("GET", r"/api/users", self.list_users),
+            ("GET", r"/api/timesheets", self.timesheets),
+            ("GET", r"/api/users/([^/]+)/tasks", self.list_tasks),
+            ("POST", r"/api/users/([^/]+)/tasks", self.add_task),
+            ("GET", r"/api/users/([^/]+)/tasks/ids", self.task_ids),
+            ("GET", r"/api/users/([^/]+)/tasks/latest", self.latest_versions),
+            ("PUT", r"/api/users/([^/]+)/tasks/(\d+)", self.update_task),
+            ("DELETE", r"/api/users/([^/]+)/tasks/(\d+)", self.delete_task),
+            ("GET", r"/api/users/([^/]+)/tasks/(\d+)/latest", self.latest),
+            ("GET", r"/api/users/([^/]+)/tasks/(\d+)/versions", self.history),
+            ("GET", r"/api/users/([^/]+)/days/([\d-]+)/tasks", self.tasks_for_day),
+            ("GET", r"/api/users/([^/]+)/days/([\d-]+)/previous", self.previous_day),
+            ("GET", r"/api/users/([^/]+)/days/([\d-]+)/report", self.report),
+            ("GET", r"/api/users/([^/]+)/versions", self.versions_page),
+            ("GET", r"/api/users/([^/]+)/versions/(\d+)", self.version),
+            ("GET", r"/api/users/([^/]+)/timesheet", self.timesheet),
+            ("GET", r"/api/users/([^/]+)/changes", self.changes_since),
+            ("POST", r"/api/users/([^/]+)/changes", self.apply_changes),
+        ]
+        self.routes = [(method, re.compile(pattern + "$"), handler) for method, pattern, handler in self.routes]
+
+    def dispatch(self, method, path, params, body):
+        allowed = False
+        for route_method, pattern, handler in self.routes:
+            match = pattern.match(path)
+            if match:
+                if route_method == method:
+                    return handler(params, body, *map(unquote, match.groups()))
+                allowed = True
+        if allowed:
+            raise HttpError(405, "Method not allowed")
+        raise HttpError(404, "Not found")
+
+    @contextmanager
+    def _store(self, user, create=False):
+        pool = self.databases.pool(user, create)
+        if pool is None:
+            raise HttpError(404, f"Unknown user {user!r}")
+        with pool.store() as store:
+            yield store
+
+    def _read(self, user, empty, read):
+        """Run `read(store)` on the user's database; users without one read as `empty`."""
+        pool = self.databases.pool(user)
+        if pool is None:
+            return 200, empty
+        with pool.store() as store:
+            return 200, read(store)
+
+    def list_users(self, params, body):
+        return 200, {"users": self.databases.users(_str(params, "after"), _limit(params, 100))}
+
+    def timesheets(self, params, body):
+        """A page of users with their report tasks for `date`; `next` is the cursor of the following page."""
+        day = _day(_str(params, "date", datetime.now().strftime("%Y-%m-%d")))
+        limit = _limit(params, 50)
+        users = self.databases.users(_str(params, "after"), limit)
+        timesheets = []
+        for user in users:
+            with self._store(user) as store:
+                timesheets.append({"user": user, "tasks": store.report_tasks(day)})
+        return 200, {"date": day.isoformat(), "timesheets": timesheets,
+                     "next": users[-1] if len(users) == limit else None}
+
+    def list_tasks(self, params, body, user):
+        if "ids" in params:
+            task_ids = _ids(params)
+            return self._read(user, {"tasks": []}, lambda store: {"tasks": store.task_rows(task_ids)})
+        limit = _limit(params, 500)
+        before = _int(params, "before")
+
+        def page(store):
+            rows = store.tasks_page(before, limit)
+            return {"tasks": rows, "next": rows[-1][0] if len(rows) == limit else None}
+        return self._read(user, {"tasks": [], "next": None}, page)
+
+    def task_ids(self, params, body, user):
+        return self._read(user, {"ids": []}, lambda store: {"ids": store.task_ids()})
+
+    def latest_versions(self, params, body, user):
+        task_ids = _ids(params)
+        return self._read(user, {"tasks": []}, lambda store: {"tasks": store.latest_versions(task_ids)})
+
+    def add_task(self, params, body, user):
+        task, version_date = _task_body(body)
+        with self._store(user, create=True) as store:
+            return 201, {"id": store.add_task(task, version_date)}
+
+    def update_task(self, params, body, user, task_id):
+        task, version_date = _task_body(body)
+        with self._store(user) as store:
+            previous = store.update_task(int(task_id), task, version_date)
+        if previous is None:
+            raise HttpError(404, f"Unknown task {task_id}")
+        return 200, {"previous": previous, "updated": previous != task}
+
+    def delete_task(self, params, body, user, task_id):
+        with self._store(user) as store:
+            return 200, {"deleted": store.delete_task(int(task_id))}
+
+    def latest(self, params, body, user, task_id):
+        with self._store(user) as store:
+            latest = store.latest(int(task_id))
+        if latest is None:
+            raise HttpError(404, f"Unknown task {task_id}")
+        return 200, {"version_date": latest[0], "task": latest[1]}
+
+    def history(self, params, body, user, task_id):
+        return self._read(user, {"versions": []}, lambda store: {"versions": store.history(int(task_id))})
+
+    def tasks_for_day(self, params, body, user, day):
+        day = _day(day)
+        return self._read(user, {"tasks": []}, lambda store: {"tasks": store.tasks_for_day(day)})
+
+    def previous_day(self, params, body, user, day):
+        day = _day(day)
+        return self._read(user, {"day": None}, lambda store: {"day": store.previous_task_day(day)})
+
+    def report(self, params, body, user, day):
+        day = _day(day)
+        return self._read(user, {"tasks": []}, lambda store: {"tasks": store.report_tasks(day)})
+
+    def versions_page(self, params, body, user):
+        start, end = _str(params, "start"), _str(params, "end")
+        if not start or not end:
+            raise HttpError(400, "start and end are required")
+        after = (_str(params, "after_date"), _int(params, "after_id", 0))
+        limit = _limit(params, 200)
+        return self._read(user, {"versions": []},
+                          lambda store: {"versions": store.versions_page(start, end, after, limit)})
+
+    def version(self, params, body, user, version_id):
+        with self._store(user) as store:
+            task = store.version(int(version_id))
+        if task is None:
+            raise HttpError(404, f"Unknown version {version_id}")
+        return 200, {"task": task}
+
+    def timesheet(self, params, body, user):
+        first_day, last_day = _day(_str(params, "start")), _day(_str(params, "end"))
+        if (last_day - first_day).days > MAX_TIMESHEET_DAYS:
+            raise HttpError(400, f"At most {MAX_TIMESHEET_DAYS} days per request")
+        return self._read(user, {"rows": []},
+                          lambda store: {"rows": list(store.timesheet_rows(first_day, last_day))})
+
+    def changes_since(self, params, body, user):
+        after = _int(params, "after", 0)
+        exclude = _str(params, "exclude") or None
+        limit = _limit(params, 500)
+        return self._read(user, {"changes": [], "last_seq": after, "more": False},
+                          lambda store: store.changes_since(after, exclude, limit))
+
+    def apply_changes(self, params, body, user):
+        origin = _str(params, "origin")
+        if not origin:
+            raise HttpError(400, "origin is required")
+        changes = body.get("changes") if isinstance(body, dict) else None
+        with self._store(user, create=True) as store:
+            try:
+                return 200, {"applied": store.apply_changes(changes, origin)}
+            except ValueError as e:
+                raise HttpError(400, str(e))
+
+
+def _gunzip(raw):
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        data = decompressor.decompress(raw, MAX_JSON)
+    except zlib.error:
+        raise HttpError(400, "Request body is not valid gzip")
+    if decompressor.unconsumed_tail:
+        raise HttpError(413, "Request body too large")
+    return data
+
+
+class TaskRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive: clients reuse one connection for many requests
+    server_version = "TaskServer/1.0"
+
+    def _handle(self, method):
+        try:
+            # The body is read before anything can fail, so the kept-alive connection stays in sync
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_BODY:
+                self.close_connection = True
+                raise HttpError(413, "Request body too large")
+            raw = self.rfile.read(length) if length else b""
+            url = urlsplit(self.path)
+            path = url.path.rstrip("/")
+            self.server.auth.check(self.headers.get("Authorization", ""), path)
+            if raw and self.headers.get("Content-Encoding", "").lower() == "gzip":
+                raw = _gunzip(raw)
+            body = None
+            if raw:
+                try:
+                    body = json.loads(raw)
+                except ValueError:
+                    raise HttpError(400, "Request body is not valid JSON")
+            status, result = self.server.api.dispatch(method, path, parse_qs(url.query), body)
+        except HttpError as e:
+            status, result = e.status, {"error": str(e)}
+        except Exception as e:
+            print(f"Error handling {method} {self.path}: {e}")
+            status, result = 500, {"error": "Internal server error"}
+        self._send(status, result)
+
+    def _send(self, status, result):
+        payload = dumps_compact(result).encode("utf-8")
+        gzipped = len(payload) >= GZIP_MIN_BYTES and "gzip" in self.headers.get("Accept-Encoding", "")
+        if gzipped:
+            payload = gzip.compress(payload)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class TaskServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # listen() backlog; the default of 5 resets connections when many clients connect at once
+
+    def __init__(self, address, data_dir, user_tokens=None, admin_token="", pool_size=POOL_SIZE,
+                 max_open=MAX_OPEN_DATABASES, quiet=False):
+        super().__init__(address, TaskRequestHandler)
+        self.databases = UserDatabases(data_dir, pool_size, max_open)
+        self.api = TaskApi(self.databases)
+        self.auth = TokenAuth(user_tokens, admin_token)
+        self.quiet = quiet
+
+    def server_close(self):
+        super().server_close()
+        self.databases.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="main.py serve", description="Serve a shared task store over HTTP.")
+    parser.add_argument("--data-dir", required=True, help="Directory holding users/<user>/tasks.db.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on (default: local only).")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--tokens", default=None,
+                        help="JSON file mapping each user name to the token that opens that user's endpoints.")
+    parser.add_argument("--admin-token", default=os.environ.get("TASK_SERVER_ADMIN_TOKEN", ""),
+                        help="Token for every endpoint, including /api/users and /api/timesheets "
+                             "(default: $TASK_SERVER_ADMIN_TOKEN).")
+    parser.add_argument("--pool-size", type=int, default=POOL_SIZE, help="Connections per user database.")
+    parser.add_argument("--max-open", type=int, default=MAX_OPEN_DATABASES,
+                        help="User databases kept open at once; the least recently used is closed beyond this.")
+    parser.add_argument("--quiet", action="store_true", help="Do not log every request.")
+    args = parser.parse_args(argv)
+
+    try:
+        user_tokens = load_user_tokens(args.tokens) if args.tokens else {}
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 2
+    if not user_tokens and not args.admin_token and args.host not in ("127.0.0.1", "localhost", "::1"):
+        print("Warning: serving on a network interface without --tokens or --admin-token; "
+              "anyone who can connect can edit tasks.")
+    server = TaskServer((args.host, args.port), args.data_dir, user_tokens, args.admin_token,
+                        max(1, args.pool_size), max(1, args.max_open), args.quiet)
+    print(f"Task server listening on http://{args.host}:{server.server_address[1]} (data in {args.data_dir}).")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
@@ -0,0 +1,407 @@
+"""
+Where TaskApp reads and writes tasks: the local tasks.db (LocalTaskStore) or
+a shared task server (RemoteTaskStore, see taskServer). Both expose the same
+methods, and the server answers each endpoint with a LocalTaskStore, so the
+two behave alike. Webhook delivery and scheduler claims always stay local.
+With offline_sync, TaskApp keeps using the LocalTaskStore and exchanges its
+change log with the server instead (see taskSync).
+
+Task rows are tuples of (id, *TASK_FIELDS); task data is a dict of TASK_FIELDS.
+"""
+import getpass
+import gzip
+import uuid
+from datetime import datetime
+from urllib.parse import quote
+
+import requests
+
+from Email_and_Timesheet_Automation.dbConfig import (
+    CHANGES_PAGE_QUERY, PREVIOUS_TASK_DAY_QUERY, TASKS_FOR_DAY_QUERY, VERSIONS_PAGE_QUERY, day_bounds
+)
+from Email_and_Timesheet_Automation.httpClient import REQUEST_TIMEOUT, dumps_compact
+from Email_and_Timesheet_Automation.reportService import report_tasks
+from Email_and_Timesheet_Automation.taskSync import TaskSync, pack_changes, unpack_changes
+from Email_and_Timesheet_Automation.timesheetExport import timesheet_rows
+from Email_and_Timesheet_Automation.taskVersions import TASK_FIELDS, VersionStore
+
+_SELECT_TASKS = f"SELECT id, {', '.join(TASK_FIELDS)} FROM tasks"
+TASK_PAGE_QUERY = _SELECT_TASKS + " WHERE id < ? ORDER BY id DESC LIMIT ?"
+# The tasks row holds the latest version's fields; its date is the newest in idx_task_versions_task_date
+_SELECT_LATEST = f"""
+    SELECT t.id, (SELECT MAX(v.version_date) FROM task_versions v WHERE v.task_id = t.id),
+           {", ".join("t." + field for field in TASK_FIELDS)}
+    FROM tasks t
+"""
+MAX_TASK_ID = 2 ** 63 - 1
+IN_CHUNK = 500  # Ids per IN (...) list, well below SQLite's variable limit
+GZIP_MIN_BYTES = 1024  # Request bodies from this size on are sent gzip-compressed
+
+
+class TaskStoreError(Exception):
+    """A task store request failed, e.g. the task server could not be reached."""
+
+
+class LocalTaskStore:
+    """Tasks in a SQLite database (a connection to tasks.db or a server-side user database)."""
+
+    def __init__(self, conn, versions=None):
+        self.conn = conn
+        self.versions = versions or VersionStore(conn)
+
+    def _begin_write(self):
+        # Take the write lock up front, so concurrent writers wait on the busy timeout instead of
+        # failing when a read transaction is upgraded, and the version chain is read under the lock
+        if not self.conn.in_transaction:
+            self.conn.execute("BEGIN IMMEDIATE")
+
+    def _rollback(self):
+        # Rolled-back version ids can be reused by the next insert (here or on another pooled
+        # connection to the same file), so the versions cached when they were added must go
+        self.conn.rollback()
+        self.versions.clear_cache()
+
+    def tasks_page(self, before_id=None, limit=500):
+        """Return up to `limit` task rows with id < `before_id`, newest first."""
+        return self.conn.execute(TASK_PAGE_QUERY, (before_id or MAX_TASK_ID, limit)).fetchall()
+
+    def task_rows(self, task_ids):
+        """Return the rows of the given task ids that exist, in no particular order."""
+        task_ids = [int(task_id) for task_id in task_ids]
+        rows = []
+        for start in range(0, len(task_ids), IN_CHUNK):
+            chunk = task_ids[start:start + IN_CHUNK]
+            rows.extend(self.conn.execute(f"{_SELECT_TASKS} WHERE id IN ({','.join('?' * len(chunk))})", chunk))
+        return rows
+
+    def task_ids(self):
+        return [row[0] for row in self.conn.execute("SELECT id FROM tasks")]
+
+    def _insert_task(self, data, sync_uid):
+        return self.conn.execute(f"""
+            INSERT INTO tasks ({", ".join(TASK_FIELDS)}, sync_uid)
+            VALUES ({", ".join("?" * len(TASK_FIELDS))}, ?)
+        """, [data.get(field) for field in TASK_FIELDS] + [sync_uid]).lastrowid
+
+    def _save_task_row(self, task_id, data):
+        self.conn.execute(f"""
+            UPDATE tasks SET {", ".join(field + " = ?" for field in TASK_FIELDS)}
+            WHERE id = ?
+        """, [data.get(field) for field in TASK_FIELDS] + [task_id])
+
+    def _log(self, task_uid, version_id=None, deleted_at=None, origin=None):
+        self.conn.execute("INSERT INTO change_log (task_uid, version_id, deleted_at, origin) VALUES (?, ?, ?, ?)",
+                          (task_uid, version_id, deleted_at, origin))
+
+    def _task_uid(self, task_id):
+        row = self.conn.execute("SELECT sync_uid FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return row[0] if row else None
+
+    def add_task(self, data, version_date=None):
+        """Insert a task and its first version; returns the new task id."""
+        self._begin_write()
+        try:
+            sync_uid = uuid.uuid4().hex
+            task_id = self._insert_task(data, sync_uid)
+            self._log(sync_uid, version_id=self.versions.add(task_id, data, version_date))
+            self.conn.commit()
+        except Exception:
+            self._rollback()
+            raise
+        return task_id
+
+    def update_task(self, task_id, data, version_date=None):
+        """
+        Save `data` over an existing task and append a version. Returns the
+        task's previous data (nothing is written if it equals `data`), or None
+        if the task does not exist.
+        """
+        self._begin_write()
+        try:
+            latest = self.versions.latest(task_id)
+            if latest is None or latest[1] == data:
+                self.conn.rollback()
+                return None if latest is None else latest[1]
+            self._save_task_row(task_id, data)
+            self._log(self._task_uid(task_id), version_id=self.versions.add(task_id, data, version_date))
+            self.conn.commit()
+        except Exception:
+            self._rollback()
+            raise
+        return latest[1]
+
+    def delete_task(self, task_id):
+        """Delete a task (its versions stay in the history); returns False if it did not exist."""
+        self._begin_write()
+        try:
+            sync_uid = self._task_uid(task_id)
+            if sync_uid is None:
+                self.conn.rollback()
+                return False
+            self.conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+            self._log(sync_uid, deleted_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            self.conn.commit()
+        except Exception:
+            self._rollback()
+            raise
+        return True
+
+    def latest(self, task_id):
+        """Return (version_date, data) of a task's latest version, or None."""
+        return self.versions.latest(task_id)
+
+    def latest_versions(self, task_ids):
+        """Return [(task_id, version_date, data)] of the latest versions of the given tasks that exist."""
+        task_ids = [int(task_id) for task_id in task_ids]
+        latest = []
+        for start in range(0, len(task_ids), IN_CHUNK):
+            chunk = task_ids[start:start + IN_CHUNK]
+            for task_id, version_date, *fields in self.conn.execute(
+                    f"{_SELECT_LATEST} WHERE t.id IN ({','.join('?' * len(chunk))})", chunk):
+                latest.append((task_id, version_date, dict(zip(TASK_FIELDS, fields))))
+        return latest
+
+    def history(self, task_id):
+        """Return [(version_id, version_date, data)] of a task, oldest first."""
+        return self.versions.history(task_id)
+
+    def tasks_for_day(self, day):
+        """Return [(task_id, task_name, version_date)] of the versions saved on `day`."""
+        return self.conn.execute(TASKS_FOR_DAY_QUERY, day_bounds(day)).fetchall()
+
+    def previous_task_day(self, day):
+        """Return the last "yyyy-MM-dd" before `day` on which a version was saved, or None."""
+        row = self.conn.execute(PREVIOUS_TASK_DAY_QUERY, (day_bounds(day)[0],)).fetchone()
+        return row[0] if row else None
+
+    def versions_page(self, start, end, after=("", 0), limit=200):
+        """Return [(version_id, task_name, version_date)] in [start, end) after the (date, id) cursor."""
+        return self.conn.execute(VERSIONS_PAGE_QUERY, (start, end, after[0], after[1], limit)).fetchall()
+
+    def version(self, version_id):
+        """Return the full data of a version, or None."""
+        return self.versions.get(version_id)
+
+    def report_tasks(self, day):
+        """Return the tasks of `day` as dicts of TASK_FIELDS (see reportService.report_tasks)."""
+        return report_tasks(self.conn, day, self.versions)
+
+    def timesheet_rows(self, first_day, last_day):
+        """Yield the timesheet rows of a date range (see timesheetExport.timesheet_rows)."""
+        return timesheet_rows(self.conn, first_day, last_day, self.versions)
+
+    def changes_since(self, after=0, exclude_origin=None, limit=500):
+        """
+        Return the change log after sequence number `after` as a packed batch
+        (see taskSync.pack_changes): {"changes", "last_seq", "more"}. Changes
+        received from `exclude_origin` are skipped but still move `last_seq`.
+        """
+        rows = self.conn.execute(CHANGES_PAGE_QUERY, (after, limit)).fetchall()
+        changes = []
+        for seq, task_uid, version_id, version_date, deleted_at, origin in rows:
+            if origin is not None and origin == exclude_origin:
+                continue
+            if deleted_at is not None:
+                changes.append((task_uid, deleted_at, None))
+            elif version_date is not None:  # Versions removed by an earlier schema are skipped
+                data = self.versions.get(version_id)
+                if data is not None:
+                    changes.append((task_uid, version_date, data))
+        return {"changes": pack_changes(changes), "last_seq": rows[-1][0] if rows else after,
+                "more": len(rows) == limit}
+
+    def apply_changes(self, changes, origin):
+        """
+        Apply a packed batch from a sync peer and log it with `origin`, so it is
+        not sent back there. Every version is kept in the history and the task
+        shows the one with the latest version_date; a delete removes the task
+        unless it has a later version, and stops earlier versions from bringing
+        it back. Changes already present are skipped, so a batch can be applied
+        twice. Returns the number of changes applied; raises ValueError if the
+        batch is malformed.
+        """
+        self._begin_write()
+        applied = 0
+        try:
+            for task_uid, change_date, data in unpack_changes(changes):
+                applied += self._apply_change(task_uid, change_date, data, origin)
+            self.conn.commit()
+        except Exception:
+            self._rollback()
+            raise
+        return applied
+
+    def _apply_change(self, task_uid, change_date, data, origin):
+        row = self.conn.execute("SELECT id FROM tasks WHERE sync_uid = ?", (task_uid,)).fetchone()
+        task_id = row[0] if row else None
+        latest = self.versions.latest(task_id) if task_id is not None else None
+        deleted_at = self.conn.execute("SELECT MAX(deleted_at) FROM change_log WHERE task_uid = ?",
+                                       (task_uid,)).fetchone()[0]
+        if data is None:
+            if latest is not None and latest[0] > change_date:
+                return False  # Edited after it was deleted elsewhere: the edit wins
+            if task_id is None and deleted_at is not None and deleted_at >= change_date:
+                return False
+            if task_id is not None:
+                self.conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+            self._log(task_uid, deleted_at=change_date, origin=origin)
+            return True
+
+        if task_id is None:
+            if deleted_at is not None and deleted_at >= change_date:
+                return False  # Saved before the task was deleted here
+            task_id = self._insert_task(data, task_uid)
+        else:
+            same_date = self.conn.execute("SELECT version_id FROM task_versions WHERE task_id = ? AND version_date = ?",
+                                          (task_id, change_date)).fetchall()
+            if any(self.versions.get(version_id) == data for version_id, in same_date):
+                return False
+            # Ties on the date go to the larger JSON, so both sides pick the same version
+            if latest is None or (change_date, dumps_compact(data)) > (latest[0], dumps_compact(latest[1])):
+                self._save_task_row(task_id, data)
+        self._log(task_uid, version_id=self.versions.add(task_id, data, change_date), origin=origin)
+        return True
+
+
+class RemoteTaskStore:
+    """
+    Tasks of one user on a task server. Every call is one HTTP request over a
+    keep-alive session; failures raise TaskStoreError.
+    """
+
+    def __init__(self, server_url, user, token=""):
+        self.base_url = f"{server_url.rstrip('/')}/api/users/{quote(user, safe='')}"
+        self.session = requests.Session()
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+
+    def _request(self, method, path, params=None, body=None, missing=None):
+        """Return the decoded JSON response, or `missing` for a 404."""
+        headers = {}
+        data = None
+        if body is not None:
+            data = dumps_compact(body).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+            if len(data) >= GZIP_MIN_BYTES:
+                data = gzip.compress(data)
+                headers["Content-Encoding"] = "gzip"
+        try:
+            response = self.session.request(method, self.base_url + path, params=params, data=data,
+                                            headers=headers, timeout=REQUEST_TIMEOUT)
+        except requests.exceptions.RequestException as e:
+            raise TaskStoreError(f"Task server unreachable: {e}") from e
+        if response.status_code == 404:
+            return missing
+        if not 200 <= response.status_code < 300:
+            try:
+                message = response.json().get("error", response.text)
+            except ValueError:
+                message = response.text
+            raise TaskStoreError(f"Task server error {response.status_code}: {message}")
+        return response.json()
+
+    def tasks_page(self, before_id=None, limit=500):
+        params = {"limit": limit}
+        if before_id:
+            params["before"] = before_id
+        return [tuple(row) for row in self._request("GET", "/tasks", params, missing={"tasks": []})["tasks"]]
+
+    def task_rows(self, task_ids):
+        task_ids = [int(task_id) for task_id in task_ids]
+        rows = []
+        for start in range(0, len(task_ids), IN_CHUNK):
+            params = {"ids": ",".join(map(str, task_ids[start:start + IN_CHUNK]))}
+            rows.extend(tuple(row) for row in self._request("GET", "/tasks", params, missing={"tasks": []})["tasks"])
+        return rows
+
+    def task_ids(self):
+        return self._request("GET", "/tasks/ids", missing={"ids": []})["ids"]
+
+    def add_task(self, data, version_date=None):
+        return self._request("POST", "/tasks", body={"task": data, "version_date": version_date})["id"]
+
+    def update_task(self, task_id, data, version_date=None):
+        result = self._request("PUT", f"/tasks/{int(task_id)}", body={"task": data, "version_date": version_date})
+        return None if result is None else result["previous"]
+
+    def delete_task(self, task_id):
+        return self._request("DELETE", f"/tasks/{int(task_id)}", missing={"deleted": False})["deleted"]
+
+    def latest(self, task_id):
+        result = self._request("GET", f"/tasks/{int(task_id)}/latest")
+        return None if result is None else (result["version_date"], result["task"])
+
+    def latest_versions(self, task_ids):
+        task_ids = [int(task_id) for task_id in task_ids]
+        latest = []
+        for start in range(0, len(task_ids), IN_CHUNK):
+            params = {"ids": ",".join(map(str, task_ids[start:start + IN_CHUNK]))}
+            result = self._request("GET", "/tasks/latest", params, missing={"tasks": []})
+            latest.extend(tuple(task) for task in result["tasks"])
+        return latest
+
+    def history(self, task_id):
+        result = self._request("GET", f"/tasks/{int(task_id)}/versions", missing={"versions": []})
+        return [tuple(version) for version in result["versions"]]
+
+    def tasks_for_day(self, day):
+        result = self._request("GET", f"/days/{_day(day)}/tasks", missing={"tasks": []})
+        return [tuple(row) for row in result["tasks"]]
+
+    def previous_task_day(self, day):
+        return self._request("GET", f"/days/{_day(day)}/previous", missing={"day": None})["day"]
+
+    def versions_page(self, start, end, after=("", 0), limit=200):
+        params = {"start": start, "end": end, "after_date": after[0], "after_id": after[1], "limit": limit}
+        return [tuple(row) for row in self._request("GET", "/versions", params, missing={"versions": []})["versions"]]
+
+    def version(self, version_id):
+        result = self._request("GET", f"/versions/{int(version_id)}")
+        return None if result is None else result["task"]
+
+    def report_tasks(self, day):
+        return self._request("GET", f"/days/{_day(day)}/report", missing={"tasks": []})["tasks"]
+
+    def timesheet_rows(self, first_day, last_day):
+        params = {"start": _day(first_day), "end": _day(last_day)}
+        return [tuple(row) for row in self._request("GET", "/timesheet", params, missing={"rows": []})["rows"]]
+
+    def changes_since(self, after=0, exclude_origin=None, limit=500):
+        params = {"after": after, "limit": limit}
+        if exclude_origin:
+            params["exclude"] = exclude_origin
+        return self._request("GET", "/changes", params, missing={"changes": [], "last_seq": after, "more": False})
+
+    def apply_changes(self, changes, origin):
+        return self._request("POST", "/changes", {"origin": origin}, body={"changes": changes})["applied"]
+
+
+def _day(day):
+    return day if isinstance(day, str) else day.isoformat()
+
+
+def _remote_store(settings):
+    return RemoteTaskStore(settings.server_url, settings.server_user or getpass.getuser(), settings.server_token)
+
+
+def open_task_store(settings, conn):
+    """
+    Return the store selected by `settings`: the task server if server_url is
+    set (unless offline_sync keeps tasks in `conn`), else `conn`.
+    """
+    if settings.server_url and not settings.offline_sync:
+        return _remote_store(settings)
+    return LocalTaskStore(conn)
+
+
+def uses_offline_sync(settings, store):
+    """Whether `store` is a local store kept in sync with the task server (offline_sync)."""
+    return bool(settings.server_url and settings.offline_sync and isinstance(store, LocalTaskStore))
+
+
+def open_task_sync(settings, store):
+    """Return a TaskSync between `store` and the task server if offline_sync is on, else None."""
+    if not uses_offline_sync(settings, store):
+        return None
+    remote = _remote_store(settings)
+    return TaskSync(store, remote, peer_name=remote.base_url)
@@ -0,0 +1,58 @@
+import queue
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from Email_and_Timesheet_Automation.dbConfig import DB_FILE, connect
+from Email_and_Timesheet_Automation.taskStore import TaskStoreError, open_task_store, open_task_sync
+
+
+class TaskStoreWorker(QThread):
+    """
+    Runs task store reads off the GUI thread, in FIFO order, so a slow or
+    unreachable task server does not freeze the window. The worker opens its
+    own store from `settings` (see taskStore.open_task_store) on its own
+    connection, and with offline_sync the TaskSync of that store. Each submitted
+    call is answered with `result_ready(key, result)` or `failed(key, message)`.
+    """
+    result_ready = pyqtSignal(object, object)
+    failed = pyqtSignal(object, str)
+
+    def __init__(self, settings, db_file=DB_FILE, parent=None):
+        super().__init__(parent)
+        self.settings = settings
+        self.db_file = db_file
+        self.jobs = queue.Queue()
+
+    def submit(self, key, method, *args):
+        """Queue `store.<method>(*args)`; jobs submitted before start() run once the worker starts."""
+        self.jobs.put((key, "store", method, args))
+
+    def submit_sync(self, key):
+        """Queue a TaskSync.sync() with the task server; the result is its (pushed, pulled) counts."""
+        self.jobs.put((key, "sync", "sync", ()))
+
+    def run(self):
+        # SQLite connections cannot be shared across threads, so the worker owns its own
+        conn = connect(self.db_file)
+        store = open_task_store(self.settings, conn)
+        targets = {"store": store, "sync": open_task_sync(self.settings, store)}
+        try:
+            while True:
+                job = self.jobs.get()
+                if job is None:  # Shutdown sentinel
+                    break
+                key, target, method, args = job
+                try:
+                    if targets[target] is None:
+                        raise TaskStoreError("offline_sync is not enabled")
+                    result = getattr(targets[target], method)(*args)
+                except Exception as e:  # TaskStoreError, or e.g. a locked database; the worker keeps going
+                    self.failed.emit(key, str(e))
+                else:
+                    self.result_ready.emit(key, result)
+        finally:
+            conn.close()
+
+    def stop(self):
+        self.jobs.put(None)
+        self.wait()
@@ -0,0 +1,129 @@
+"""
+Offline-first sync of the local tasks.db with a central task store.
+
+Every version added and every task deleted is recorded in the `change_log`
+table under a monotonic sequence number (see taskStore.LocalTaskStore). A
+sync pushes the local changes after the last pushed sequence number and
+pulls the peer's changes after the last pulled one, in batches, keeping both
+watermarks in `sync_state`. Tasks are matched across databases by their
+`sync_uid`; conflicting edits resolve by version date (see apply_changes).
+
+The peer is any store with changes_since / apply_changes: normally the task
+server (taskStore.RemoteTaskStore), or a LocalTaskStore over another file to
+stand in for it.
+"""
+import uuid
+
+from Email_and_Timesheet_Automation.taskVersions import TASK_FIELDS, apply_delta, make_delta
+
+BATCH_SIZE = 500  # Changes per request; a batch of full versions compresses to a few KB
+
+
+def pack_changes(changes):
+    """
+    Encode (task_uid, date, data) changes for a batch: a delete (data None) as
+    [uid, date], the first version of a task in the batch as [uid, date, data],
+    and later versions of it as [uid, date, merge patch, 1] against the one before.
+    """
+    previous = {}
+    packed = []
+    for task_uid, change_date, data in changes:
+        if data is None:
+            previous.pop(task_uid, None)
+            packed.append([task_uid, change_date])
+            continue
+        delta = make_delta(previous[task_uid], data) if task_uid in previous else None
+        packed.append([task_uid, change_date, data] if delta is None else [task_uid, change_date, delta, 1])
+        previous[task_uid] = data
+    return packed
+
+
+def unpack_changes(packed):
+    """Yield the (task_uid, date, data) changes of a packed batch; raises ValueError if it is malformed."""
+    if not isinstance(packed, list):
+        raise ValueError("changes must be a list")
+    previous = {}
+    for change in packed:
+        if not isinstance(change, list) or len(change) not in (2, 3, 4) \
+                or not isinstance(change[0], str) or not isinstance(change[1], str):
+            raise ValueError(f"Malformed change: {change!r}")
+        task_uid, change_date = change[0], change[1]
+        if len(change) == 2:
+            previous.pop(task_uid, None)
+            yield task_uid, change_date, None
+            continue
+        if not isinstance(change[2], dict):
+            raise ValueError(f"Malformed change: {change!r}")
+        if len(change) == 4:
+            if task_uid not in previous:
+                raise ValueError(f"Delta without a preceding version for task {task_uid}")
+            data = apply_delta(previous[task_uid], change[2])
+        else:
+            data = change[2]
+        previous[task_uid] = data
+        yield task_uid, change_date, {field: data.get(field) for field in TASK_FIELDS}
+
+
+class TaskSync:
+    """
+    Exchanges changes between a LocalTaskStore and a peer store. `peer_name`
+    identifies the peer in the watermarks and in the origin of pulled changes
+    (so they are not pushed back); use one name per server and user.
+    """
+
+    def __init__(self, local, peer, peer_name, batch_size=BATCH_SIZE):
+        self.local = local
+        self.peer = peer
+        self.peer_name = peer_name
+        self.batch_size = batch_size
+
+    def _state(self, key, default=None):
+        row = self.local.conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_state(self, key, value):
+        self.local.conn.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (key, str(value)))
+        self.local.conn.commit()
+
+    def client_id(self):
+        """This database's origin name on the peer, created on first use."""
+        client_id = self._state("client_id")
+        if client_id is None:
+            client_id = uuid.uuid4().hex
+            self._set_state("client_id", client_id)
+        return client_id
+
+    def push(self):
+        """Send the local changes the peer has not seen; returns how many were sent."""
+        key = f"pushed_seq:{self.peer_name}"
+        after = int(self._state(key, 0))
+        sent = 0
+        while True:
+            batch = self.local.changes_since(after, exclude_origin=self.peer_name, limit=self.batch_size)
+            if batch["changes"]:
+                self.peer.apply_changes(batch["changes"], self.client_id())
+                sent += len(batch["changes"])
+            # Saved per batch, so an interrupted sync resumes where it stopped
+            after = batch["last_seq"]
+            self._set_state(key, after)
+            if not batch["more"]:
+                return sent
+
+    def pull(self):
+        """Apply the peer's changes made since the last pull; returns how many were applied."""
+        key = f"pulled_seq:{self.peer_name}"
+        after = int(self._state(key, 0))
+        applied = 0
+        while True:
+            batch = self.peer.changes_since(after, exclude_origin=self.client_id(), limit=self.batch_size)
+            if batch["changes"]:
+                applied += self.local.apply_changes(batch["changes"], self.peer_name)
+            after = batch["last_seq"]
+            self._set_state(key, after)
+            if not batch["more"]:
+                return applied
+
+    def sync(self):
+        """Push, then pull; returns (pushed, pulled) change counts."""
+        pushed = self.push()
+        return pushed, self.pull()
@@ -0,0 +1,125 @@
+from bisect import bisect_left
+
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from Email_and_Timesheet_Automation.taskStore import TaskStoreError
+from Email_and_Timesheet_Automation.taskVersions import TASK_COLUMNS
+
+# Display order of the table; the Delete button column follows the task fields
+HEADERS = [header for _, header in TASK_COLUMNS] + ["Delete"]
+DELETE_COLUMN = len(TASK_COLUMNS)
+
+
+class TaskTableModel(QAbstractTableModel):
+    """
+    Rows of a task store (see taskStore), newest first. Pages are read on demand
+    through fetchMore as the view scrolls, using the last loaded id as the cursor.
+    """
+
+    def __init__(self, store, page_size=500, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.page_size = page_size
+        self.rows = []  # (id, *TASK_COLUMNS values)
+        self.keys = []  # Negated ids, ascending, for bisecting by id
+        self.exhausted = False
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.column() == DELETE_COLUMN:
+            return None
+        if role in (Qt.DisplayRole, Qt.ToolTipRole):
+            value = self.rows[index.row()][index.column() + 1]
+            return "" if value is None else str(value)
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.exhausted:
+            return
+        cursor_id = self.rows[-1][0] if self.rows else None
+        try:
+            page = self.store.tasks_page(cursor_id, self.page_size)
+        except TaskStoreError as e:
+            # Stop paging rather than retrying on every scroll; a refresh starts over
+            print(f"Could not load tasks: {e}")
+            self.exhausted = True
+            return
+        if len(page) < self.page_size:
+            self.exhausted = True
+        if not page:
+            return
+        start = len(self.rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(page) - 1)
+        self.rows.extend(page)
+        self.keys.extend(-row[0] for row in page)
+        self.endInsertRows()
+
+    def reload(self):
+        """Drop the loaded pages, e.g. after a sync changed many tasks; the view fetches them again."""
+        self.beginResetModel()
+        self.rows = []
+        self.keys = []
+        self.exhausted = False
+        self.endResetModel()
+
+    def task_id(self, row):
+        return self.rows[row][0]
+
+    def row_of(self, task_id):
+        """Return the row showing `task_id`, or None if it is not loaded."""
+        position = bisect_left(self.keys, -task_id)
+        if position < len(self.keys) and self.keys[position] == -task_id:
+            return position
+        return None
+
+    def add_task(self, task_id):
+        """Show a newly inserted task at the top of the table."""
+        position = bisect_left(self.keys, -task_id)
+        if position == len(self.rows) and not self.exhausted:
+            return  # Below the loaded pages; fetchMore will reach it
+        row = self._read_row(task_id)
+        if row is None or self.row_of(task_id) is not None:
+            return
+        self.beginInsertRows(QModelIndex(), position, position)
+        self.rows.insert(position, row)
+        self.keys.insert(position, -task_id)
+        self.endInsertRows()
+
+    def update_task(self, task_id):
+        """Re-read the row of a task that was edited in place."""
+        position = self.row_of(task_id)
+        if position is None:
+            return
+        row = self._read_row(task_id)
+        if row is None:
+            return
+        self.rows[position] = row
+        self.dataChanged.emit(self.index(position, 0), self.index(position, len(TASK_COLUMNS) - 1))
+
+    def _read_row(self, task_id):
+        rows = self.store.task_rows([task_id])
+        return rows[0] if rows else None
+
+    def remove_task(self, task_id):
+        """Remove the row showing `task_id`; returns False if it was not loaded."""
+        position = self.row_of(task_id)
+        if position is None:
+            return False
+        self.beginRemoveRows(QModelIndex(), position, position)
+        del self.rows[position]
+        del self.keys[position]
+        self.endRemoveRows()
+        return True
@@ -0,0 +1,232 @@
+"""
+Delta-encoded task version storage.
+
+Every SNAPSHOT_EVERY-th version of a task is stored as a full JSON snapshot
+(version_kind 'full'); the versions in between store a JSON Merge Patch
+(RFC 7386) against the previous version (version_kind 'delta'): changed
+fields map to their new value and removed fields map to null. Rebuilding any
+version reads at most SNAPSHOT_EVERY rows through idx_task_versions_task_date.
+"""
+import json
+from collections import OrderedDict
+from datetime import datetime
+
+SNAPSHOT_EVERY = 10  # Versions per task between full snapshots
+
+# (field, display header) of a version, which are also the columns of the tasks table
+TASK_COLUMNS = [
+    ("task_name", "Task Name"),
+    ("description", "Description"),
+    ("start_date", "Start Date"),
+    ("due_date", "Due Date"),
+    ("time_spent", "Time Spent (hrs)"),
+    ("functional_area", "Functional Area"),
+    ("assignment", "Assignment"),
+    ("task_type", "Task Type"),
+    ("status", "Status"),
+]
+TASK_FIELDS = tuple(field for field, _ in TASK_COLUMNS)
+
+# Newest versions of a task up to and including a given one, enough to reach a full snapshot
+VERSION_CHAIN_QUERY = """
+    SELECT version_id, version_kind, version_data
+    FROM task_versions
+    WHERE task_id = ? AND (version_date, version_id) <= (?, ?)
+    ORDER BY version_date DESC, version_id DESC
+    LIMIT ?
+"""
+VERSION_POSITION_QUERY = """
+    SELECT task_id, version_date FROM task_versions WHERE version_id = ?
+"""
+LATEST_VERSIONS_QUERY = """
+    SELECT version_id, version_kind, version_date
+    FROM task_versions
+    WHERE task_id = ?
+    ORDER BY version_date DESC, version_id DESC
+    LIMIT ?
+"""
+# The first version of a task after a given date, which an older version inserted late goes before
+NEXT_VERSION_QUERY = """
+    SELECT version_id
+    FROM task_versions
+    WHERE task_id = ? AND version_date > ?
+    ORDER BY version_date, version_id
+    LIMIT 1
+"""
+TASK_HISTORY_QUERY = """
+    SELECT version_id, version_date, version_kind, version_data
+    FROM task_versions
+    WHERE task_id = ?
+    ORDER BY version_date, version_id
+"""
+# The tasks row always holds the latest version's fields, so the latest state
+# is one lookup by primary key joined to the newest version date
+LATEST_STATE_QUERY = f"""
+    SELECT v.version_date, {", ".join("t." + field for field in TASK_FIELDS)}
+    FROM tasks t JOIN task_versions v ON v.task_id = t.id
+    WHERE t.id = ?
+    ORDER BY v.version_date DESC, v.version_id DESC
+    LIMIT 1
+"""
+
+
+def dumps_compact(data):
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def make_delta(previous, current):
+    """Return the merge patch turning `previous` into `current`, or None if it cannot be expressed as one."""
+    if any(value is None for value in current.values()):
+        return None  # A null value would read back as a removal
+    delta = {key: value for key, value in current.items() if key not in previous or previous[key] != value}
+    delta.update({key: None for key in previous if key not in current})
+    return delta
+
+
+def apply_delta(state, delta):
+    """Apply a merge patch to a copy of `state`."""
+    state = dict(state)
+    for key, value in delta.items():
+        if value is None:
+            state.pop(key, None)
+        else:
+            state[key] = value
+    return state
+
+
+def encode_versions(rows, snapshot_every=SNAPSHOT_EVERY):
+    """
+    Re-encode one task's versions, given oldest first as (version_id, data)
+    pairs of full snapshots. Yields (version_id, version_kind, version_data).
+    Rows whose data is None (unreadable) are yielded as (version_id, "full", None)
+    to be left as they are, and the next version starts a new snapshot.
+    """
+    previous = None
+    since_snapshot = 0
+    for version_id, data in rows:
+        if data is None:
+            previous = None
+            yield version_id, "full", None
+            continue
+        delta = None
+        if previous is not None and since_snapshot < snapshot_every - 1:
+            delta = make_delta(previous, data)
+        if delta is None:
+            since_snapshot = 0
+            yield version_id, "full", dumps_compact(data)
+        else:
+            since_snapshot += 1
+            yield version_id, "delta", dumps_compact(delta)
+        previous = data
+
+
+class VersionStore:
+    """
+    Reads and writes task versions. Rebuilt versions are kept in a small LRU,
+    so the newest version of a task (needed for the next delta) is usually
+    a cache hit.
+    """
+
+    def __init__(self, conn, snapshot_every=SNAPSHOT_EVERY, cache_size=256):
+        self.conn = conn
+        self.snapshot_every = snapshot_every
+        self.cache_size = cache_size
+        self.cache = OrderedDict()  # version_id -> version data
+
+    def _remember(self, version_id, data):
+        self.cache[version_id] = data
+        self.cache.move_to_end(version_id)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def clear_cache(self):
+        """Forget every cached version, e.g. after a rollback undid versions that were cached when added."""
+        self.cache.clear()
+
+    def add(self, task_id, data, version_date=None, commit=False):
+        """
+        Record a new version of a task (a dict of TASK_FIELDS) and return its
+        version_id. The caller commits, unless `commit` is set.
+        """
+        version_date = version_date or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        recent = self.conn.execute(LATEST_VERSIONS_QUERY, (task_id, self.snapshot_every - 1)).fetchall()
+        if recent and version_date < recent[0][2]:
+            return self._insert_before(task_id, data, version_date, commit)
+
+        delta = None
+        # A delta is allowed while the last full snapshot is among the previous snapshot_every - 1 versions
+        if recent and any(kind == "full" for _, kind, _ in recent):
+            delta = make_delta(self.get(recent[0][0]), data)
+        kind, version_data = ("full", dumps_compact(data)) if delta is None else ("delta", dumps_compact(delta))
+        return self._insert(task_id, data, version_date, kind, version_data, commit)
+
+    def _insert_before(self, task_id, data, version_date, commit):
+        """
+        Record a version older than the task's newest one (e.g. received by
+        sync). It becomes a full snapshot, and the version after it, which was
+        a delta against the one before, is rewritten as a full snapshot too.
+        """
+        next_id = self.conn.execute(NEXT_VERSION_QUERY, (task_id, version_date)).fetchone()[0]
+        next_data = self.get(next_id)
+        self.conn.execute("UPDATE task_versions SET version_kind = 'full', version_data = ? WHERE version_id = ?",
+                          (dumps_compact(next_data), next_id))
+        return self._insert(task_id, data, version_date, "full", dumps_compact(data), commit)
+
+    def _insert(self, task_id, data, version_date, kind, version_data, commit):
+        cursor = self.conn.execute("""
+            INSERT INTO task_versions (task_id, task_name, version_date, version_data, version_kind)
+            VALUES (?, ?, ?, ?, ?)
+        """, (task_id, data.get("task_name", ""), version_date, version_data, kind))
+        self._remember(cursor.lastrowid, dict(data))
+        if commit:
+            self.conn.commit()
+        return cursor.lastrowid
+
+    def get(self, version_id):
+        """Return the full data of a version, or None if it does not exist."""
+        data = self.cache.get(version_id)
+        if data is not None:
+            self.cache.move_to_end(version_id)
+            return dict(data)
+
+        position = self.conn.execute(VERSION_POSITION_QUERY, (version_id,)).fetchone()
+        if position is None:
+            return None
+        chain = self.conn.execute(VERSION_CHAIN_QUERY,
+                                  (position[0], position[1], version_id, self.snapshot_every)).fetchall()
+
+        # Walk back to a full snapshot (or a cached version), then patch forward
+        start = None
+        for i, (chain_id, kind, _) in enumerate(chain):
+            if chain_id in self.cache:
+                start, state = i, self.cache[chain_id]
+                break
+            if kind == "full":
+                start, state = i, json.loads(chain[i][2])
+                break
+        if start is None:
+            raise ValueError(f"No full snapshot within {self.snapshot_every} versions of version {version_id}")
+        for _, _, version_data in reversed(chain[:start]):
+            state = apply_delta(state, json.loads(version_data))
+
+        self._remember(version_id, state)
+        return dict(state)
+
+    def history(self, task_id):
+        """Return [(version_id, version_date, data)] of a task, oldest first, in one pass."""
+        history = []
+        state = {}
+        for version_id, version_date, kind, version_data in self.conn.execute(TASK_HISTORY_QUERY, (task_id,)):
+            patch = json.loads(version_data)
+            state = patch if kind == "full" else apply_delta(state, patch)
+            history.append((version_id, version_date, dict(state)))
+        if history:
+            self._remember(history[-1][0], history[-1][2])
+        return history
+
+    def latest(self, task_id):
+        """Return (version_date, data) of a task's latest version, or None."""
+        row = self.conn.execute(LATEST_STATE_QUERY, (task_id,)).fetchone()
+        if row is None:
+            return None
+        return row[0], {field: value for field, value in zip(TASK_FIELDS, row[1:])}
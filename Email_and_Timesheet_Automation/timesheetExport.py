@@ -0,0 +1,317 @@
+"""
+Timesheet export: hours per day, task, functional area and assignment over any
+date range, written to CSV or XLSX.
+
+    python main.py export --from 2025-01-01 --to 2025-01-31 --output Monthly_Timesheet.xlsx
+    python main.py export --from 2025-01-01 --to 2025-12-31 --profiles profiles.json --output team.csv
+    python main.py export --from 2025-01-01 --to 2025-12-31 --data-dir /srv/timesheets --output team.xlsx
+
+time_spent is the total a task has taken so far, so on each day a version of
+it was saved, the task is credited with how far its last version of that day
+raised time_spent above what was already credited (starting from its last
+version before the range). A task saved on several days is counted once. One
+ranked query walks the range in date order; hours of the same day with the
+same task name, functional area and assignment are summed, and rows are
+written as they are produced, so memory only grows with the number of tasks.
+XLSX is written with the standard library, one streamed worksheet with inline
+strings. Nothing here imports PyQt5.
+"""
+import argparse
+import csv
+import glob
+import os
+import re
+import time
+import zipfile
+from datetime import date, datetime
+from xml.sax.saxutils import escape
+
+from Email_and_Timesheet_Automation.dbConfig import (
+    DB_FILE, SchemaVersionError, connect_readonly, day_bounds, get_data_path
+)
+from Email_and_Timesheet_Automation.taskVersions import TASK_FIELDS, VersionStore
+
+HEADERS = ["Date", "Task Name", "Functional Area", "Assignment", "Hours"]
+TEAM_HEADERS = ["User"] + HEADERS
+
+# One row per task and day in [start, end): its last version of the day
+# (ranked by date, then version_id, as saves within one second share a date)
+# and whether that is the task's newest version, in which case the tasks row
+# holds its fields and nothing needs decoding. Read through idx_task_versions_date.
+TIMESHEET_QUERY = f"""
+    WITH ranked AS (
+        SELECT substr(version_date, 1, 10) AS day, task_id, version_id,
+               ROW_NUMBER() OVER (
+                   PARTITION BY substr(version_date, 1, 10), task_id
+                   ORDER BY version_date DESC, version_id DESC
+               ) AS rank
+        FROM task_versions
+        WHERE version_date >= ? AND version_date < ?
+    )
+    SELECT r.day, r.task_id, r.version_id,
+           r.version_id = (
+               SELECT n.version_id FROM task_versions n WHERE n.task_id = r.task_id
+               ORDER BY n.version_date DESC, n.version_id DESC LIMIT 1
+           ) AS is_newest,
+           {", ".join("t." + field for field in TASK_FIELDS)}
+    FROM ranked r JOIN tasks t ON t.id = r.task_id
+    WHERE r.rank = 1
+    ORDER BY r.day, r.task_id
+"""
+# The task's last version before the range, whose time_spent was credited earlier
+PREVIOUS_VERSION_QUERY = """
+    SELECT version_id FROM task_versions
+    WHERE task_id = ? AND version_date < ?
+    ORDER BY version_date DESC, version_id DESC
+    LIMIT 1
+"""
+_TIME_SPENT = re.compile(r"^\s*(\d+):(\d{1,2})")
+_XML_ILLEGAL = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+EXCEL_EPOCH = date(1899, 12, 30)
+
+
+def parse_minutes(time_spent):
+    """Minutes of a "HH:mm" time_spent value; anything else counts as 0."""
+    match = _TIME_SPENT.match(time_spent or "")
+    return int(match.group(1)) * 60 + int(match.group(2)) if match else 0
+
+
+def timesheet_rows(conn, first_day, last_day, versions=None):
+    """
+    Yield (day, task_name, functional_area, assignment, hours) for `first_day`
+    through `last_day` inclusive (dates or "yyyy-MM-dd"), ordered by day.
+    """
+    versions = versions or VersionStore(conn)
+    start, end = day_bounds(first_day)[0], day_bounds(last_day)[1]
+    credited = {}  # task_id -> minutes of time_spent already counted
+    current_day, totals = None, {}
+    for day, task_id, version_id, is_newest, *fields in conn.execute(TIMESHEET_QUERY, (start, end)):
+        if day != current_day:
+            yield from _day_rows(current_day, totals)
+            current_day, totals = day, {}
+        # Rows are in day order, so the previous day's version of a task is usually still cached
+        task = dict(zip(TASK_FIELDS, fields)) if is_newest else versions.get(version_id)
+        if task is None:
+            continue
+        if task_id not in credited:
+            credited[task_id] = _minutes_before(conn, versions, task_id, start)
+        # Only the increase counts; a correction downwards is not taken off another day
+        minutes = parse_minutes(task.get("time_spent"))
+        added = max(0, minutes - credited[task_id])
+        credited[task_id] = max(credited[task_id], minutes)
+        key = (task.get("task_name") or "", task.get("functional_area") or "", task.get("assignment") or "")
+        totals[key] = totals.get(key, 0) + added
+    yield from _day_rows(current_day, totals)
+
+
+def _minutes_before(conn, versions, task_id, start):
+    row = conn.execute(PREVIOUS_VERSION_QUERY, (task_id, start)).fetchone()
+    task = versions.get(row[0]) if row else None
+    return parse_minutes(task.get("time_spent")) if task else 0
+
+
+def _day_rows(day, totals):
+    for (task_name, functional_area, assignment), minutes in totals.items():
+        if minutes:  # Days on which a task was saved without adding time
+            yield day, task_name, functional_area, assignment, round(minutes / 60, 2)
+
+
+def database_rows(path, first_day, last_day, user=None):
+    """
+    Timesheet rows of the tasks database at `path`, each prefixed with `user`
+    if given. The database is opened read-only and must be at the current
+    schema version (SchemaVersionError otherwise).
+    """
+    if not os.path.exists(path):
+        print(f"Skipping {user or path}: {path} does not exist.")
+        return
+    conn = connect_readonly(path)
+    try:
+        for row in timesheet_rows(conn, first_day, last_day):
+            yield row if user is None else (user, *row)
+    finally:
+        conn.close()
+
+
+def team_rows(sources, first_day, last_day, errors):
+    """Timesheet rows of every (user, path) source; users whose database cannot be read are added to `errors`."""
+    for user, path in sources:
+        try:
+            yield from database_rows(path, first_day, last_day, user)
+        except SchemaVersionError as e:
+            print(f"Error: skipping {user}: {e}")
+            errors.append(user)
+
+
+def team_sources(profiles_file=None, data_dir=None):
+    """
+    Return [(user, database path)] from a batch profiles file (see batchReport)
+    or from a task server data directory (users/<user>/tasks.db).
+    """
+    if profiles_file:
+        from Email_and_Timesheet_Automation.batchReport import load_profiles
+        return [(profile.name, profile.database) for profile in load_profiles(profiles_file)]
+    paths = sorted(glob.glob(os.path.join(os.path.abspath(data_dir), "users", "*", DB_FILE)))
+    return [(os.path.basename(os.path.dirname(path)), path) for path in paths]
+
+
+def write_csv(path, headers, rows):
+    """Write rows to a CSV file; returns the number of data rows."""
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(headers)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">\
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>\
+<Default Extension="xml" ContentType="application/xml"/>\
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>\
+<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>\
+<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>\
+</Types>"""
+_ROOT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">\
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" \
+Target="xl/workbook.xml"/></Relationships>"""
+_WORKBOOK = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" \
+xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">\
+<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets></workbook>"""
+_WORKBOOK_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">\
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" \
+Target="worksheets/sheet1.xml"/>\
+<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" \
+Target="styles.xml"/></Relationships>"""
+# Cell styles: 0 default, 1 bold header, 2 number "0.00", 3 date (built-in format 14)
+_STYLES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">\
+<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font><font><b/><sz val="11"/><name val="Calibri"/></font></fonts>\
+<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>\
+<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>\
+<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>\
+<cellXfs count="4"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>\
+<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>\
+<xf numFmtId="2" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>\
+<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>\
+<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles></styleSheet>"""
+
+
+def _column_name(index):
+    name = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        name = chr(65 + remainder) + name
+    return name
+
+
+def _cell(ref, value, header=False):
+    if isinstance(value, bool) or value is None:
+        value = "" if value is None else str(value)
+    if isinstance(value, (int, float)):
+        return f'<c r="{ref}" s="2"><v>{value}</v></c>'
+    if isinstance(value, date):
+        return f'<c r="{ref}" s="3"><v>{(value - EXCEL_EPOCH).days}</v></c>'
+    text = escape(_XML_ILLEGAL.sub("", str(value)))
+    style = ' s="1"' if header else ""
+    return f'<c r="{ref}" t="inlineStr"{style}><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def write_xlsx(path, headers, rows, sheet_name="Timesheet", flush_every=500):
+    """
+    Write rows to a single-sheet XLSX file, streaming the worksheet into the
+    zip archive; returns the number of data rows. "yyyy-MM-dd" strings in the
+    first column matching a "Date" header are written as Excel dates.
+    """
+    columns = [_column_name(i) for i in range(len(headers))]
+    date_column = headers.index("Date") if "Date" in headers else None
+    count = 0
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        archive.writestr("_rels/.rels", _ROOT_RELS)
+        archive.writestr("xl/workbook.xml", _WORKBOOK.format(name=escape(sheet_name[:31], {'"': "&quot;"})))
+        archive.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        archive.writestr("xl/styles.xml", _STYLES)
+        with archive.open("xl/worksheets/sheet1.xml", "w") as sheet:
+            widths = "".join(f'<col min="{i + 1}" max="{i + 1}" width="{40 if header == "Task Name" else 16}" '
+                             f'customWidth="1"/>' for i, header in enumerate(headers))
+            chunk = [
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                '<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" '
+                f'state="frozen"/></sheetView></sheetViews><cols>{widths}</cols><sheetData>',
+                '<row r="1">' + "".join(_cell(f"{column}1", header, header=True)
+                                        for column, header in zip(columns, headers)) + "</row>",
+            ]
+            for row in rows:
+                count += 1
+                number = count + 1
+                values = list(row)
+                if date_column is not None and isinstance(values[date_column], str):
+                    try:
+                        values[date_column] = datetime.strptime(values[date_column], "%Y-%m-%d").date()
+                    except ValueError:
+                        pass
+                chunk.append(f'<row r="{number}">' + "".join(_cell(f"{column}{number}", value)
+                                                            for column, value in zip(columns, values)) + "</row>")
+                if len(chunk) >= flush_every:
+                    sheet.write("".join(chunk).encode("utf-8"))
+                    chunk = []
+            chunk.append(f'</sheetData><autoFilter ref="A1:{columns[-1]}{count + 1}"/></worksheet>')
+            sheet.write("".join(chunk).encode("utf-8"))
+    return count
+
+
+def write_timesheet(path, headers, rows):
+    """Write rows as XLSX if `path` ends in .xlsx, else as CSV; returns the number of data rows."""
+    if path.lower().endswith(".xlsx"):
+        return write_xlsx(path, headers, rows)
+    return write_csv(path, headers, rows)
+
+
+def main(argv=None):
+    """Export a timesheet and return the process exit code."""
+    parser = argparse.ArgumentParser(prog="main.py export",
+                                     description="Export hours per day, task, functional area and assignment.")
+    parser.add_argument("--from", dest="first_day", required=True, help="First day, yyyy-MM-dd.")
+    parser.add_argument("--to", dest="last_day", required=True, help="Last day (inclusive), yyyy-MM-dd.")
+    parser.add_argument("--output", required=True, help="Output file; .xlsx for Excel, anything else for CSV.")
+    team = parser.add_mutually_exclusive_group()
+    team.add_argument("--profiles", help="Export every user of a batch profiles file (see main.py batch).")
+    team.add_argument("--data-dir", help="Export every user of a task server data directory.")
+    args = parser.parse_args(argv)
+
+    try:
+        first_day = datetime.strptime(args.first_day, "%Y-%m-%d").date()
+        last_day = datetime.strptime(args.last_day, "%Y-%m-%d").date()
+        sources = team_sources(args.profiles, args.data_dir) if args.profiles or args.data_dir else None
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 2
+    if last_day < first_day:
+        print("Error: --to is before --from")
+        return 2
+
+    started = time.perf_counter()
+    errors = []
+    if sources is None:
+        headers, rows = HEADERS, database_rows(get_data_path(DB_FILE), first_day, last_day)
+    else:
+        headers, rows = TEAM_HEADERS, team_rows(sources, first_day, last_day, errors)
+    try:
+        count = write_timesheet(args.output, headers, rows)
+    except (OSError, SchemaVersionError) as e:
+        print(f"Error: {e}")
+        return 1
+    print(f"Exported {count} rows to {args.output} in {time.perf_counter() - started:.1f}s.")
+    if errors:
+        print(f"Left out {len(errors)} user(s) whose database is at an older schema version: {', '.join(errors)}")
+        return 1
+    return 0
@@ -0,0 +1,73 @@
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from Email_and_Timesheet_Automation.dbConfig import day_bounds
+from Email_and_Timesheet_Automation.taskStore import TaskStoreError
+
+HEADERS = ["Task Name", "Version Date", "Details"]
+DETAILS_COLUMN = 2
+
+
+class VersionHistoryModel(QAbstractTableModel):
+    """
+    Task versions saved within a date range, oldest first. Only the name and
+    date of each version are paged in from the task store as the view scrolls;
+    the version's data is only read when a row is opened.
+    """
+
+    def __init__(self, store, page_size=200, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.page_size = page_size
+        self.rows = []  # (version_id, task_name, version_date)
+        self.bounds = None
+        self.exhausted = True
+
+    def set_range(self, first_day, last_day):
+        """Show versions from `first_day` through `last_day` inclusive (dates or "yyyy-MM-dd")."""
+        self.beginResetModel()
+        self.bounds = (day_bounds(first_day)[0], day_bounds(last_day)[1])
+        self.rows = []
+        self.exhausted = False
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.column() == DETAILS_COLUMN or role != Qt.DisplayRole:
+            return None
+        return self.rows[index.row()][index.column() + 1]
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.exhausted:
+            return
+        last_date, last_id = (self.rows[-1][2], self.rows[-1][0]) if self.rows else ("", 0)
+        try:
+            page = self.store.versions_page(*self.bounds, after=(last_date, last_id), limit=self.page_size)
+        except TaskStoreError as e:
+            print(f"Could not load task versions: {e}")
+            self.exhausted = True
+            return
+        if len(page) < self.page_size:
+            self.exhausted = True
+        if not page:
+            return
+        start = len(self.rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(page) - 1)
+        self.rows.extend(page)
+        self.endInsertRows()
+
+    def version_details(self, row):
+        """Return the full data of a row's version."""
+        return self.store.version(self.rows[row][0]) or {}
@@ -0,0 +1,140 @@
+import random
+import time
+from datetime import datetime
+
+import requests
+
+from Email_and_Timesheet_Automation.httpClient import get_http_client
+
+MAX_ATTEMPTS = 8
+BACKOFF_BASE = 5  # Seconds before the first retry
+BACKOFF_CAP = 15 * 60
+LEASE_SECONDS = 5 * 60  # How long a claimed row is left to its sender; well above one request's timeout
+
+
+def backoff_delay(attempts):
+    """Exponential backoff with full jitter for the given number of failed attempts."""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempts))
+
+
+class WebhookOutbox:
+    """
+    Persistent queue of webhook payloads in the `webhook_outbox` table.
+    Rows stay `pending` until delivered, so queued reports survive restarts.
+    A sender claims a row (`sending`, with a lease) before posting it, so the
+    app and the headless scheduler never post the same row twice; a lease
+    left behind by a sender that died is released once it expires.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def enqueue(self, kind, url, payload):
+        """Queue a JSON payload (str) for delivery and return its outbox id."""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            INSERT INTO webhook_outbox (kind, url, payload, status, attempts, next_attempt_at, created_at)
+            VALUES (?, ?, ?, 'pending', 0, ?, ?)
+        """, (kind, url, payload, time.time(), datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+        self.conn.commit()
+        return cursor.lastrowid
+
+    def due(self, now=None, limit=20):
+        """Return pending rows whose next attempt is due, oldest first, after releasing expired leases."""
+        now = time.time() if now is None else now
+        self.conn.execute("""
+            UPDATE webhook_outbox SET status = 'pending', lease_until = NULL
+            WHERE status = 'sending' AND lease_until < ?
+        """, (now,))
+        self.conn.commit()
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT id, kind, url, payload, attempts FROM webhook_outbox
+            WHERE status = 'pending' AND next_attempt_at <= ?
+            ORDER BY next_attempt_at LIMIT ?
+        """, (now, limit))
+        return cursor.fetchall()
+
+    def claim(self, outbox_id, now=None):
+        """Lease a pending row for sending; returns False if another sender claimed it first."""
+        now = time.time() if now is None else now
+        cursor = self.conn.execute("""
+            UPDATE webhook_outbox SET status = 'sending', lease_until = ?
+            WHERE id = ? AND status = 'pending'
+        """, (now + LEASE_SECONDS, outbox_id))
+        self.conn.commit()
+        return cursor.rowcount == 1
+
+    def next_due_at(self):
+        """Return the epoch time of the next pending attempt (or lease expiry), or None."""
+        row = self.conn.execute("""
+            SELECT MIN(CASE status WHEN 'pending' THEN next_attempt_at ELSE lease_until END)
+            FROM webhook_outbox WHERE status IN ('pending', 'sending')
+        """).fetchone()
+        return row[0]
+
+    def mark_delivered(self, outbox_id, status_code):
+        self.conn.execute("""
+            UPDATE webhook_outbox
+            SET status = 'delivered', attempts = attempts + 1, last_error = NULL, status_code = ?, delivered_at = ?,
+                lease_until = NULL
+            WHERE id = ?
+        """, (status_code, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), outbox_id))
+        self.conn.commit()
+
+    def mark_retry(self, outbox_id, attempts, error, status_code=None):
+        self.conn.execute("""
+            UPDATE webhook_outbox
+            SET status = 'pending', attempts = ?, last_error = ?, status_code = ?, next_attempt_at = ?,
+                lease_until = NULL
+            WHERE id = ?
+        """, (attempts, error, status_code, time.time() + backoff_delay(attempts), outbox_id))
+        self.conn.commit()
+
+    def mark_failed(self, outbox_id, attempts, error, status_code=None):
+        self.conn.execute("""
+            UPDATE webhook_outbox
+            SET status = 'failed', attempts = ?, last_error = ?, status_code = ?, lease_until = NULL
+            WHERE id = ?
+        """, (attempts, error, status_code, outbox_id))
+        self.conn.commit()
+
+
+def deliver(outbox, row, post=None):
+    """
+    Try to deliver one outbox row through `post(url, payload)` (the shared
+    HttpClient by default). Returns (status, message) where status is
+    "delivered", "retrying" or "failed".
+    """
+    outbox_id, kind, url, payload, attempts = row
+    attempts += 1
+    if post is None:
+        post = get_http_client().post_json
+    try:
+        status_code = post(url, payload)
+    except requests.exceptions.RequestException as e:
+        status_code, error = None, str(e)
+    else:
+        if 200 <= status_code < 300:
+            outbox.mark_delivered(outbox_id, status_code)
+            return "delivered", f"Webhook call succeeded ({status_code})."
+        error = f"Webhook call failed: {status_code}"
+
+    # Client errors other than rate limiting will not succeed on retry
+    permanent = status_code is not None and 400 <= status_code < 500 and status_code != 429
+    if permanent or attempts >= MAX_ATTEMPTS:
+        outbox.mark_failed(outbox_id, attempts, error, status_code)
+        return "failed", f"{error} (gave up after {attempts} attempt(s))."
+    outbox.mark_retry(outbox_id, attempts, error, status_code)
+    return "retrying", f"{error} (attempt {attempts}, retrying)."
+
+
+def deliver_due(outbox, post=None, on_status=None):
+    """Deliver every due row; `on_status(outbox_id, kind, status, message)` is called per row."""
+    for row in outbox.due():
+        if not outbox.claim(row[0]):
+            continue  # Being sent by another scheduler (the app or scheduler.py)
+        status, message = deliver(outbox, row, post)
+        print(f"Outbox {row[0]} ({row[1]}): {message}")
+        if on_status is not None:
+            on_status(row[0], row[1], status, message)
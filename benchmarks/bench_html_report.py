@@ -0,0 +1,90 @@
+"""
+Rendering time of the daily report HTML for growing numbers of task rows.
+
+    python benchmarks/bench_html_report.py --sizes 100 1000 10000 50000
+
+The per-row time of HtmlGenerator.generate_task_table should stay flat as
+the report grows. Every generated row contains characters that need escaping,
+so this is the worst case for the renderer.
+
+The previous approach, which appended each row with `+=`, is timed as a
+reference. It is also linear under CPython, because a string with a single
+reference is resized in place, but it does not escape anything. The
+difference between the two columns is roughly the cost of escaping.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Email_and_Timesheet_Automation.htmlGenerator import (  # noqa: E402
+    DOCUMENT_HEAD, HtmlGenerator, render_tail
+)
+from Email_and_Timesheet_Automation.settingsStore import AppSettings  # noqa: E402
+
+SETTINGS = AppSettings(role="Developer\nTeam Lead", name="Jane Doe", mobile_no="+1 555 0100",
+                       email="jane@example.com", timesheet_link="https://example.com/timesheet.xlsx")
+
+
+class TaskCollection:
+    date = datetime(2024, 1, 15)
+
+    def __init__(self, tasks):
+        self.tasks = tasks
+
+    def to_dict(self):
+        return {"Tasks": self.tasks}
+
+
+def make_tasks(count):
+    return [{"Task Name": f"Task {i} <review>", "Task Keyword": f"Keyword & notes {i}",
+             "Time Spent (hrs)": str(i % 8 + 1)} for i in range(count)]
+
+
+def render_concatenated(task_collection, settings):
+    """The previous implementation: the document is grown with += once per row, unescaped."""
+    date = task_collection.date.strftime("%Y-%m-%d")
+    tasks = task_collection.to_dict()["Tasks"]
+    html_content = DOCUMENT_HEAD
+    for i, task in enumerate(tasks):
+        html_content += "<tr>"
+        if i == 0:
+            html_content += f"<td rowspan='{len(tasks)}'>{date}</td>"
+        html_content += f"""
+            <td>{task["Task Name"]}</td>
+            <td>{task["Task Keyword"]}</td>
+            <td>{task["Time Spent (hrs)"]}</td>
+        </tr>
+        """
+    return html_content + render_tail(settings.timesheet_link, settings)
+
+
+def best_of(repeats, render, task_collection):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        render(task_collection, SETTINGS)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 50000])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'template ms':>12} {'us/row':>8} {'+= ms':>10} {'us/row':>8}")
+    for size in args.sizes:
+        task_collection = TaskCollection(make_tasks(size))
+        template = best_of(args.repeats, HtmlGenerator.generate_task_table, task_collection)
+        concatenated = best_of(args.repeats, render_concatenated, task_collection)
+        print(f"{size:>8} {template * 1000:>12.2f} {template / size * 1e6:>8.2f} "
+              f"{concatenated * 1000:>10.2f} {concatenated / size * 1e6:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
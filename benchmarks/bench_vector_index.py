@@ -0,0 +1,88 @@
+"""
+Recall/latency benchmark of the vector index backends against exact flat search.
+
+    python benchmarks/bench_vector_index.py --sizes 10000 50000 100000
+
+Vectors are synthetic: a 32-d latent space projected to `--dimension` plus noise,
+L2-normalized like sentence embeddings.
+The results were used to pick AUTO_ANN_THRESHOLD / AUTO_ANN_TYPE in vectorStore.
+"""
+import argparse
+import os
+import sys
+import time
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Email_and_Timesheet_Automation.vectorStore import (  # noqa: E402
+    DEFAULT_INDEX_CONFIG, build_backend, configure_search, resolve_index_type
+)
+
+
+def make_vectors(count, dimension, projection, rng):
+    # Low intrinsic dimension plus noise, L2-normalized, like sentence embeddings
+    latent = rng.standard_normal((count, projection.shape[0])).astype("float32")
+    vectors = latent @ projection + 0.1 * rng.standard_normal((count, dimension)).astype("float32")
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def run(size, dimension, queries, k, rng):
+    projection = rng.standard_normal((32, dimension)).astype("float32")
+    vectors = make_vectors(size, dimension, projection, rng)
+    query_vectors = make_vectors(queries, dimension, projection, rng)
+
+    exact = faiss.IndexFlatL2(dimension)
+    exact.add(vectors)
+    _, truth = exact.search(query_vectors, k)
+
+    rows = []
+    for kind in ("flat", "ivf", "ivfpq", "hnsw"):
+        config = dict(DEFAULT_INDEX_CONFIG, type=kind)
+        if resolve_index_type(config, size, dimension) != kind:
+            continue  # Too few vectors to train this backend
+
+        start = time.perf_counter()
+        index = build_backend(kind, dimension, vectors, config)
+        index.add(vectors)
+        configure_search(index, config)
+        build_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        found = np.vstack([index.search(query_vectors[i:i + 1], k)[1] for i in range(queries)])
+        latency_ms = (time.perf_counter() - start) * 1000 / queries
+
+        recall = np.mean([len(set(found[i]) & set(truth[i])) / k for i in range(queries)])
+        rows.append((kind, build_seconds, latency_ms, recall))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--min-recall", type=float, default=0.95)
+    args = parser.parse_args()
+
+    faiss.omp_set_num_threads(1)  # Interactive queries are answered one at a time
+    rng = np.random.default_rng(0)
+
+    for size in args.sizes:
+        rows = run(size, args.dimension, args.queries, args.k, rng)
+        print(f"\n{size} vectors, d={args.dimension}, k={args.k}")
+        print(f"{'backend':8} {'build s':>8} {'query ms':>9} {'recall':>7}")
+        for kind, build_seconds, latency_ms, recall in rows:
+            print(f"{kind:8} {build_seconds:8.2f} {latency_ms:9.3f} {recall:7.3f}")
+
+        candidates = [row for row in rows if row[3] >= args.min_recall]
+        best = min(candidates, key=lambda row: row[2])
+        print(f"fastest with recall >= {args.min_recall}: {best[0]}")
+
+
+if __name__ == "__main__":
+    main()
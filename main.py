@@ -1,18 +1,39 @@
 import sys
-from PyQt5.QtWidgets import QApplication
-from Email_and_Timesheet_Automation.TaskApp import TaskApp  # Import the TaskApp class from TaskApp
 
 
-def main():
+def run_gui():
     """
     Main entry point for the Task Management application.
     Initializes and runs the TaskApp.
     """
+    # Imported here so that the command-line modes never load PyQt5
+    from PyQt5.QtWidgets import QApplication
+    from Email_and_Timesheet_Automation.TaskApp import TaskApp  # Import the TaskApp class from TaskApp
+
     app = QApplication(sys.argv)  # Create a QApplication instance
     task_app = TaskApp()          # Initialize the TaskApp from TaskApp
     task_app.show()               # Show the main application window
     sys.exit(app.exec_())         # Start the Qt event loop
 
 
+def main():
+    """
+    `python main.py` opens the app. Without the GUI, `python main.py batch
+    profiles.json ...` builds and sends the daily report for many users,
+    `python main.py serve --data-dir DIR` runs the shared task server, and
+    `python main.py export --from ... --to ... --output FILE` exports a timesheet.
+    """
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        from Email_and_Timesheet_Automation.batchReport import main as batch_main
+        sys.exit(batch_main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        from Email_and_Timesheet_Automation.taskServer import main as serve_main
+        sys.exit(serve_main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "export":
+        from Email_and_Timesheet_Automation.timesheetExport import main as export_main
+        sys.exit(export_main(sys.argv[2:]))
+    run_gui()
+
+
 if __name__ == "__main__":
     main()
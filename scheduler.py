@@ -0,0 +1,40 @@
+import argparse
+import signal
+import threading
+
+from Email_and_Timesheet_Automation.dbConfig import init_sqlite_db
+from Email_and_Timesheet_Automation.reportScheduler import ReportScheduler
+from Email_and_Timesheet_Automation.settingsStore import get_settings_store
+from Email_and_Timesheet_Automation.taskStore import open_task_store
+
+
+def main(argv=None):
+    """
+    Headless entry point: sends the daily report on schedule without the GUI.
+    Safe to run alongside main.py; each report day is sent only once.
+    """
+    parser = argparse.ArgumentParser(description="Send the daily report on schedule, without the GUI.")
+    parser.add_argument("--once", action="store_true",
+                        help="Queue any due (or missed) reports, deliver the outbox once, and exit.")
+    args = parser.parse_args(argv)
+
+    conn = init_sqlite_db()
+    settings_store = get_settings_store()
+    # Like the app, read the report from the task server when server_url is set (restart after changing it)
+    scheduler = ReportScheduler(conn, settings_store, store=open_task_store(settings_store.settings, conn))
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    try:
+        if args.once:
+            scheduler.run_once()
+        else:
+            print("Report scheduler running; press Ctrl+C to stop.")
+            scheduler.run_forever(stop)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from Email_and_Timesheet_Automation.dbConfig import (
+    MIGRATIONS, SCHEMA_VERSION, SchemaVersionError, connect, connect_readonly, explain_full_scans, get_schema_version,
+    migrate
+)
+from Email_and_Timesheet_Automation.taskStore import LocalTaskStore
+from Email_and_Timesheet_Automation.taskVersions import TASK_FIELDS
+
+
+class QueryPlanTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.conn = connect(os.path.join(self.tmp.name, "tasks.db"))
+        migrate(self.conn)
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmp.cleanup()
+
+    def test_migrates_to_latest_schema(self):
+        self.assertEqual(get_schema_version(self.conn), SCHEMA_VERSION)
+
+    def test_hot_queries_use_indexes(self):
+        self.assertEqual(explain_full_scans(self.conn), {})
+
+    def test_hot_queries_use_indexes_after_analyze(self):
+        # The planner may prefer a scan once statistics say the table is small; it must not
+        self.conn.executemany(
+            "INSERT INTO tasks (task_name) VALUES (?)", [(f"task {i}",) for i in range(50)])
+        self.conn.executemany(
+            "INSERT INTO task_versions (task_id, task_name, version_date, version_data, version_kind)"
+            " VALUES (?, ?, ?, '{}', 'full')",
+            [(i % 50 + 1, f"task {i % 50}", f"2025-01-{i % 28 + 1:02d} 10:00:00") for i in range(500)])
+        self.conn.execute("ANALYZE")
+        self.assertEqual(explain_full_scans(self.conn), {})
+
+
+class MigrationTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.conn = connect(os.path.join(self.tmp.name, "tasks.db"))
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmp.cleanup()
+
+    def test_migration_keeps_history_of_deleted_tasks(self):
+        # The baseline schema, with a task that was deleted while foreign keys were not enforced
+        self.conn.execute("PRAGMA foreign_keys = OFF")
+        self.conn.execute(f"CREATE TABLE tasks (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                          f"{', '.join(field + ' TEXT' for field in TASK_FIELDS)})")
+        self.conn.execute("""
+            CREATE TABLE task_versions (
+                version_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task_id INTEGER NOT NULL REFERENCES tasks,
+                task_name TEXT NOT NULL,
+                version_date TEXT NOT NULL,
+                version_data TEXT NOT NULL
+            )
+        """)
+        self.conn.execute("INSERT INTO tasks (id, task_name) VALUES (1, 'kept'), (2, 'deleted')")
+        self.conn.executemany(
+            "INSERT INTO task_versions (task_id, task_name, version_date, version_data) VALUES (?, ?, ?, ?)",
+            [(1, "kept", "2025-01-06 09:00:00", '{"task_name": "kept"}'),
+             (2, "deleted", "2025-01-06 10:00:00", '{"task_name": "deleted"}')])
+        self.conn.execute("DELETE FROM tasks WHERE id = 2")
+        self.conn.commit()
+        self.conn.execute("PRAGMA foreign_keys = ON")
+
+        migrate(self.conn)
+        store = LocalTaskStore(self.conn)
+        self.assertEqual(len(store.history(2)), 1)
+        self.assertTrue(store.delete_task(1))
+        self.assertEqual([data["task_name"] for _, _, data in store.history(1)], ["kept"])
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM task_versions").fetchone()[0], 2)
+
+
+class ReadOnlyConnectionTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "tasks.db")
+        self.conn = connect(self.path)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmp.cleanup()
+
+    def test_current_schema_opens_read_only(self):
+        migrate(self.conn)
+        readonly = connect_readonly(self.path)
+        try:
+            self.assertEqual(get_schema_version(readonly), SCHEMA_VERSION)
+            with self.assertRaises(sqlite3.OperationalError):
+                readonly.execute("INSERT INTO tasks (task_name) VALUES ('x')")
+        finally:
+            readonly.close()
+
+    def test_older_schema_is_an_error_and_is_not_migrated(self):
+        migrate(self.conn, [migration for migration in MIGRATIONS if migration[0] < SCHEMA_VERSION])
+        with self.assertRaises(SchemaVersionError):
+            connect_readonly(self.path)
+        self.assertEqual(get_schema_version(self.conn), SCHEMA_VERSION - 1)
+
+    def test_unversioned_database_is_an_error(self):
+        with self.assertRaises(SchemaVersionError):
+            connect_readonly(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
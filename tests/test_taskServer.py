@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+
+from Email_and_Timesheet_Automation.taskServer import HttpError, TokenAuth, UserDatabases
+
+
+class TokenAuthTest(unittest.TestCase):
+    def setUp(self):
+        self.auth = TokenAuth({"jane": "jane-token", "bob": "bob-token"}, "admin-token")
+
+    def assertStatus(self, status, token, path):
+        with self.assertRaises(HttpError) as raised:
+            self.auth.check(f"Bearer {token}" if token else "", path)
+        self.assertEqual(raised.exception.status, status)
+
+    def test_user_token_only_opens_its_user(self):
+        self.auth.check("Bearer jane-token", "/api/users/jane/tasks")
+        self.assertStatus(403, "jane-token", "/api/users/bob/tasks")
+        self.assertStatus(401, "", "/api/users/jane/tasks")
+
+    def test_team_endpoints_need_the_admin_token(self):
+        self.assertStatus(403, "jane-token", "/api/users")
+        self.assertStatus(403, "jane-token", "/api/timesheets")
+        self.auth.check("Bearer admin-token", "/api/timesheets")
+        self.auth.check("Bearer admin-token", "/api/users/bob/tasks")
+
+    def test_no_tokens_allows_everything(self):
+        TokenAuth().check("", "/api/timesheets")
+
+
+class UserDatabasesTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.databases = UserDatabases(self.tmp.name, pool_size=2, max_open=2)
+
+    def tearDown(self):
+        self.databases.close()
+        self.tmp.cleanup()
+
+    def test_least_recently_used_pool_is_closed(self):
+        jane = self.databases.pool("jane", create=True)
+        self.databases.pool("bob", create=True)
+        self.databases.pool("jane")
+        self.databases.pool("ann", create=True)
+        self.assertEqual(list(self.databases.pools), ["jane", "ann"])
+        self.assertIs(self.databases.pool("jane"), jane)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, "users", "bob", "tasks.db")))
+
+    def test_pool_evicted_while_in_use_closes_its_connection_on_release(self):
+        pool = self.databases.pool("jane", create=True)
+        with pool.store() as store:
+            self.databases.pool("bob", create=True)
+            self.databases.pool("ann", create=True)
+            self.assertTrue(pool.closed)
+            self.assertEqual(store.task_ids(), [])
+        self.assertTrue(pool.idle.empty())
+        with self.assertRaises(Exception):
+            store.conn.execute("SELECT 1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+
+from Email_and_Timesheet_Automation.dbConfig import connect, migrate
+from Email_and_Timesheet_Automation.taskStore import LocalTaskStore
+from Email_and_Timesheet_Automation.taskSync import TaskSync
+from Email_and_Timesheet_Automation.taskVersions import TASK_FIELDS
+
+
+def task(**fields):
+    data = {field: "" for field in TASK_FIELDS}
+    data.update(fields)
+    return data
+
+
+class TaskSyncTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.local = self._store("local.db")
+        self.peer = self._store("peer.db")
+        self.sync = TaskSync(self.local, self.peer, peer_name="peer")
+
+    def tearDown(self):
+        self.local.conn.close()
+        self.peer.conn.close()
+        self.tmp.cleanup()
+
+    def _store(self, name):
+        conn = connect(os.path.join(self.tmp.name, name))
+        migrate(conn)
+        return LocalTaskStore(conn)
+
+    def _only_task(self, store):
+        (task_id,) = store.task_ids()
+        return task_id
+
+    def assertConsistent(self, store, expected):
+        task_id = self._only_task(store)
+        version_date, latest = store.latest(task_id)
+        history = store.history(task_id)
+        self.assertEqual(latest, expected)
+        self.assertEqual(history[-1][1:], (version_date, latest))
+        # Rebuild every version from the stored chain, not from the cache
+        store.versions.cache.clear()
+        for version_id, _, data in history:
+            self.assertEqual(store.version(version_id), data)
+        return history
+
+    def test_conflicting_offline_edits_converge(self):
+        original = task(task_name="a", description="a")
+        self.local.add_task(original, "2025-01-06 09:00:00")
+        self.sync.sync()
+
+        peer_edit = task(task_name="a", description="b-edit", status="Done")
+        local_edit = task(task_name="a", description="d")
+        self.peer.update_task(self._only_task(self.peer), peer_edit, "2025-01-06 10:00:00")
+        self.local.update_task(self._only_task(self.local), local_edit, "2025-01-06 11:00:00")
+        self.sync.sync()
+
+        local_history = self.assertConsistent(self.local, local_edit)
+        peer_history = self.assertConsistent(self.peer, local_edit)
+        expected = [("2025-01-06 09:00:00", original), ("2025-01-06 10:00:00", peer_edit),
+                    ("2025-01-06 11:00:00", local_edit)]
+        self.assertEqual([version[1:] for version in local_history], expected)
+        self.assertEqual([version[1:] for version in peer_history], expected)
+
+    def test_late_version_keeps_later_deltas(self):
+        task_id = self.local.add_task(task(task_name="a", description="0"), "2025-01-06 09:00:00")
+        for hour in range(10, 16):
+            self.local.update_task(task_id, task(task_name="a", description=str(hour)), f"2025-01-06 {hour}:00:00")
+        late = task(task_name="a", description="late", status="Done")
+        self.local.versions.add(task_id, late, "2025-01-06 09:30:00", commit=True)
+
+        history = self.assertConsistent(self.local, task(task_name="a", description="15"))
+        self.assertEqual([version[2]["description"] for version in history],
+                         ["0", "late"] + [str(hour) for hour in range(10, 16)])
+
+    def test_sync_is_idempotent(self):
+        self.local.add_task(task(task_name="a"), "2025-01-06 09:00:00")
+        self.sync.sync()
+        batch = self.local.changes_since()["changes"]
+        self.assertEqual(self.peer.apply_changes(batch, "again"), 0)
+        self.assertEqual(self.sync.sync(), (0, 0))
+
+    def test_rejected_batch_leaves_no_cached_versions(self):
+        valid = ["uid-1", "2025-01-06 09:00:00", task(task_name="pulled")]
+        with self.assertRaises(ValueError):
+            self.local.apply_changes([valid, ["uid-1"]], "peer")
+        self.assertEqual(self.local.task_ids(), [])
+
+        # Another connection to the same file reuses the rolled-back version id
+        other = LocalTaskStore(connect(os.path.join(self.tmp.name, "local.db")))
+        try:
+            task_id = other.add_task(task(task_name="saved"), "2025-01-06 10:00:00")
+            (version_id, _, data), = other.history(task_id)
+        finally:
+            other.conn.close()
+        self.assertEqual(self.local.version(version_id), data)
+
+
+if __name__ == "__main__":
+    unittest.main()
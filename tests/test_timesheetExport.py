@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+
+from Email_and_Timesheet_Automation.dbConfig import connect, migrate
+from Email_and_Timesheet_Automation.taskStore import LocalTaskStore
+from Email_and_Timesheet_Automation.taskVersions import TASK_FIELDS
+
+
+def task(**fields):
+    data = {field: "" for field in TASK_FIELDS}
+    data.update(task_name="Report", functional_area="Finance", assignment="Billable")
+    data.update(fields)
+    return data
+
+
+class TimesheetRowsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.conn = connect(os.path.join(self.tmp.name, "tasks.db"))
+        migrate(self.conn)
+        self.store = LocalTaskStore(self.conn)
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmp.cleanup()
+
+    def rows(self, first_day, last_day):
+        return list(self.store.timesheet_rows(first_day, last_day))
+
+    def test_task_edited_on_later_days_counts_once(self):
+        task_id = self.store.add_task(task(time_spent="03:00", status="In Progress"), "2025-01-06 17:00:00")
+        self.store.update_task(task_id, task(time_spent="03:00", status="Completed"), "2025-01-07 09:00:00")
+        self.assertEqual(self.rows("2025-01-06", "2025-01-07"),
+                         [("2025-01-06", "Report", "Finance", "Billable", 3.0)])
+
+    def test_each_day_gets_its_increase(self):
+        task_id = self.store.add_task(task(time_spent="01:30"), "2025-01-06 17:00:00")
+        self.store.update_task(task_id, task(time_spent="02:00"), "2025-01-06 18:00:00")
+        self.store.update_task(task_id, task(time_spent="05:00"), "2025-01-08 17:00:00")
+        self.assertEqual(self.rows("2025-01-06", "2025-01-08"),
+                         [("2025-01-06", "Report", "Finance", "Billable", 2.0),
+                          ("2025-01-08", "Report", "Finance", "Billable", 3.0)])
+        # Time credited before the range is not counted again
+        self.assertEqual(self.rows("2025-01-07", "2025-01-08"),
+                         [("2025-01-08", "Report", "Finance", "Billable", 3.0)])
+
+    def test_correction_downwards_is_not_counted_twice(self):
+        task_id = self.store.add_task(task(time_spent="03:00"), "2025-01-06 17:00:00")
+        self.store.update_task(task_id, task(time_spent="02:00"), "2025-01-07 17:00:00")
+        self.store.update_task(task_id, task(time_spent="04:00"), "2025-01-08 17:00:00")
+        self.assertEqual(sum(row[4] for row in self.rows("2025-01-06", "2025-01-08")), 4.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
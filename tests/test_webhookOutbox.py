@@ -0,0 +1,61 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from Email_and_Timesheet_Automation.dbConfig import connect, migrate
+from Email_and_Timesheet_Automation.webhookOutbox import LEASE_SECONDS, WebhookOutbox, deliver_due
+
+
+class WebhookOutboxTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "tasks.db")
+        conn = connect(self.path)
+        conn.execute("PRAGMA journal_mode = WAL")
+        migrate(conn)
+        self.outbox = WebhookOutbox(conn)
+
+    def tearDown(self):
+        self.outbox.conn.close()
+        self.tmp.cleanup()
+
+    def test_concurrent_senders_post_each_row_once(self):
+        for i in range(10):
+            self.outbox.enqueue("daily_report", "http://example.invalid/hook", f'{{"n": {i}}}')
+        posted = []
+        lock = threading.Lock()
+
+        def post(url, payload):
+            time.sleep(0.01)
+            with lock:
+                posted.append(payload)
+            return 200
+
+        def sender():
+            # Like the app's OutboxWorker and scheduler.py, each sender has its own connection
+            conn = connect(self.path, check_same_thread=False)
+            try:
+                deliver_due(WebhookOutbox(conn), post=post)
+            finally:
+                conn.close()
+
+        threads = [threading.Thread(target=sender) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(posted), sorted(f'{{"n": {i}}}' for i in range(10)))
+
+    def test_expired_lease_is_released(self):
+        outbox_id = self.outbox.enqueue("daily_report", "http://example.invalid/hook", "{}")
+        now = time.time()
+        self.assertTrue(self.outbox.claim(outbox_id, now))
+        self.assertFalse(self.outbox.claim(outbox_id, now))
+        self.assertEqual(self.outbox.due(now), [])
+        self.assertEqual([row[0] for row in self.outbox.due(now + LEASE_SECONDS + 1)], [outbox_id])
+
+
+if __name__ == "__main__":
+    unittest.main()